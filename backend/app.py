@@ -1,22 +1,34 @@
+import os
+import click
 from datetime import timedelta
 from flask import Flask, request, jsonify
 from flask_socketio import SocketIO
 from flask_login import LoginManager
-from models import db, TokenBlocklist, User
+from models import db, User
+from database import database_config
+from user_stats import rebuild_all_user_stats
+from token_revocation import revocation_store
+from mail_queue import drain_mail_queue
+from realtime import register_socket_handlers
+from exports import DATASETS, COLUMNAR_FORMATS, write_dataset
+from metrics import init_metrics
+from synthetic_data import SCALES, generate_dataset
+from search import exclude_search_index, rebuild_search_index
 from flask_migrate import Migrate
 from flask_mail import Mail
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 
 app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Set SOCKETIO_MESSAGE_QUEUE (e.g. redis://localhost:6379/0) to fan events out across several server processes
+socketio = SocketIO(app, cors_allowed_origins="*", message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE'))
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///legal_platform.db'
+# Database configuration: DATABASE_URL plus pool / SQLite tuning from the environment (see database.py)
+app.config['SQLALCHEMY_DATABASE_URI'], app.config['SQLALCHEMY_ENGINE_OPTIONS'] = database_config()
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Initialize database and migrations
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, include_object=exclude_search_index)
 db.init_app(app)
 
 
@@ -36,11 +48,60 @@ app.config['MAIL_DEFAULT_SENDER'] = 'thee.manase@gmail.com'
 
 mail = Mail(app)
 
+# Outbound mail queue: background delivery threads, retries with exponential backoff
+app.config['MAIL_QUEUE_ASYNC'] = True  # set False to deliver only via `flask drain-mail-queue`
+app.config['MAIL_QUEUE_WORKERS'] = 2
+app.config['MAIL_QUEUE_MAX_ATTEMPTS'] = 5
+app.config['MAIL_QUEUE_BACKOFF_BASE'] = 30  # seconds, doubled after every failed attempt
+
 # JWT configuration
 app.config["JWT_SECRET_KEY"] = "fkmvkfksopsdpakcmvdmskasppwx"
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
 app.config["JWT_VERIFY_SUB"] = False
 
+# Dashboard statistics cache lifetime (seconds); admin changes also invalidate it (see dashboard.py)
+app.config['DASHBOARD_SNAPSHOT_TTL'] = 30
+
+# Cached (user_type, approval_status, is_active) lifetime for role checks (seconds). The cache is
+# per process: after a role change or deactivation, other workers keep the old identity for up to
+# this long. Keep it short; admin endpoints always re-read the user instead.
+app.config['IDENTITY_CACHE_TTL'] = 15
+app.config['IDENTITY_CACHE_SIZE'] = 10000  # entries per process, least recently used evicted first
+
+# In-memory token revocation set: how often to pick up other workers' logouts, and how far back
+# each sync re-reads to catch logouts committed late (seconds). Expired blocklist rows are
+# deleted by the purge-token-blocklist command (run it from cron), never during requests.
+app.config['JWT_REVOCATION_SYNC_INTERVAL'] = 30
+app.config['JWT_REVOCATION_SYNC_MARGIN'] = 300
+
+# Keyset pagination page sizes for list endpoints
+app.config['PAGINATION_DEFAULT_PAGE_SIZE'] = 50
+app.config['PAGINATION_MAX_PAGE_SIZE'] = 200
+
+# Rows fetched per batch by streaming exports
+app.config['EXPORT_BATCH_SIZE'] = 1000
+
+# Uploads: request size limit and the content-addressed blob store
+app.config['MAX_CONTENT_LENGTH'] = 25 * 1024 * 1024  # bytes; larger requests get a 413
+app.config['BLOB_STORAGE_DIR'] = os.path.join('uploads', 'blobs')
+app.config['BLOB_CHUNK_SIZE'] = 1024 * 1024
+
+# Document downloads: let the front-end web server send file bodies instead of a Python worker.
+# Apache/lighttpd: set USE_X_SENDFILE. nginx: map an `internal` location to DOWNLOAD_ACCEL_REDIRECT_ROOT
+# and set DOWNLOAD_ACCEL_REDIRECT_PREFIX to it (e.g. '/protected-uploads').
+app.config['USE_X_SENDFILE'] = False
+app.config['DOWNLOAD_ACCEL_REDIRECT_PREFIX'] = None
+app.config['DOWNLOAD_ACCEL_REDIRECT_ROOT'] = 'uploads'
+
+# Case / invoice / transaction numbers reserved per process at a time (server databases; SQLite allocates one by one)
+app.config['NUMBER_BLOCK_SIZE'] = 20
+
+# Request / SQL metrics (Prometheus at /main/api/metrics, Server-Timing header) and slow-request logging
+app.config['METRICS_ENABLED'] = True
+app.config['METRICS_SLOW_REQUEST_MS'] = 500
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')  # scrapers send it as a Bearer token; unset disables the endpoint
+init_metrics(app)
+
 jwt = JWTManager(app)
 jwt.init_app(app)
 
@@ -66,6 +127,7 @@ from views.case import case_bp
 from views.invoice import invoice_bp
 from views.transaction import transaction_bp
 from views.notification import notification_bp
+from views.search import search_bp
 
 
 app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -80,6 +142,7 @@ app.register_blueprint(case_bp, url_prefix='/case')
 app.register_blueprint(invoice_bp, url_prefix='/invoice')
 app.register_blueprint(transaction_bp, url_prefix='/transaction')
 app.register_blueprint(notification_bp, url_prefix='/notification')
+app.register_blueprint(search_bp, url_prefix='/search')
 
 # Move CORS initialization here, after blueprints
 CORS(app, 
@@ -98,22 +161,21 @@ CORS(app,
          "Origin"
      ],
      supports_credentials=True,
-     expose_headers=["Content-Type", "Authorization"]
+     expose_headers=["Content-Type", "Authorization", "X-Next-Cursor", "Link"]
 )
 
-# SocketIO event for typing indicator
-@socketio.on('typing')
-def handle_typing(data):
-    room = data.get('room')
-    user = data.get('user')
-    socketio.emit('typing', {'user': user}, room=room)
+@app.errorhandler(413)
+def request_entity_too_large(error):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024)
+    return jsonify({'error': f'File too large. Maximum upload size is {limit_mb:g} MB'}), 413
+
+# SocketIO authentication, case rooms and typing indicator
+register_socket_handlers(socketio)
 
 # JWT token blocklist callback
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload: dict) -> bool:
-    jti = jwt_payload["jti"]
-    token = db.session.query(TokenBlocklist.id).filter_by(jti=jti).scalar()
-    return token is not None
+    return revocation_store.is_revoked(jwt_payload["jti"])
 
 # CLI command to create admin user
 @app.cli.command()
@@ -154,6 +216,71 @@ def create_admin():
         db.session.rollback()
         print(f'Error creating admin user: {str(e)}')
 
+# CLI command to rebuild the materialized per-user statistics
+@app.cli.command()
+def rebuild_user_stats():
+    """Recompute the user_stats table from scratch."""
+    try:
+        count = rebuild_all_user_stats()
+        print(f'Rebuilt statistics for {count} users!')
+    except Exception as e:
+        db.session.rollback()
+        print(f'Error rebuilding user statistics: {str(e)}')
+
+# CLI command to rebuild the full-text search index
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Re-index every case, chat message, document, lawyer and transaction."""
+    try:
+        count = rebuild_search_index()
+        print(f'Indexed {count} search entries!')
+    except Exception as e:
+        db.session.rollback()
+        print(f'Error rebuilding search index: {str(e)}')
+
+# CLI command to remove blocklisted tokens that have expired anyway
+@app.cli.command()
+def purge_token_blocklist():
+    """Delete token_blocklist rows older than JWT_ACCESS_TOKEN_EXPIRES."""
+    try:
+        count = revocation_store.purge()
+        print(f'Purged {count} expired blocklist entries!')
+    except Exception as e:
+        print(f'Error purging token blocklist: {str(e)}')
+
+# CLI command to deliver queued emails synchronously
+@app.cli.command("drain-mail-queue")
+def drain_mail_queue_command():
+    """Send every queued email that is due."""
+    try:
+        claimed, sent = drain_mail_queue()
+        print(f'Sent {sent} of {claimed} queued emails!')
+    except Exception as e:
+        db.session.rollback()
+        print(f'Error draining mail queue: {str(e)}')
+
+# CLI command to export analytics datasets in columnar formats
+@app.cli.command("export-dataset")
+@click.argument('dataset', type=click.Choice(sorted(DATASETS)))
+@click.argument('output')
+@click.option('--format', 'file_format', type=click.Choice(sorted(COLUMNAR_FORMATS)), default='parquet')
+@click.option('--partition-by-month', is_flag=True, help='Write OUTPUT/month=YYYY-MM/part-0.* files.')
+@click.option('--date-from', type=click.DateTime(formats=['%Y-%m-%d']))
+@click.option('--date-to', type=click.DateTime(formats=['%Y-%m-%d']))
+def export_dataset_command(dataset, output, file_format, partition_by_month, date_from, date_to):
+    """Write cases, invoices or transactions as Parquet or Arrow IPC files."""
+    try:
+        rows, paths = write_dataset(
+            dataset, file_format, output,
+            date_from=date_from.date() if date_from else None,
+            date_to=date_to.date() if date_to else None,
+            partition_by_month=partition_by_month
+        )
+        print(f'Exported {rows} {dataset} rows to {len(paths)} file(s)!')
+    except Exception as e:
+        db.session.rollback()
+        print(f'Error exporting {dataset}: {str(e)}')
+
 # CLI command to seed initial data
 @app.cli.command()
 def seed_data():
@@ -183,6 +310,27 @@ def seed_data():
         db.session.rollback()
         print(f'Error seeding database: {str(e)}')
 
+# CLI command to generate a large synthetic dataset for scale testing
+@app.cli.command("seed-scale")
+@click.option('--scale', type=click.Choice(list(SCALES)), default='small', show_default=True)
+@click.option('--cases', type=int, help='Override the number of cases for the scale.')
+@click.option('--lawyers', type=int, help='Override the number of lawyers for the scale.')
+@click.option('--clients', type=int, help='Override the number of clients for the scale.')
+@click.option('--seed', type=int, default=42, show_default=True, help='Random seed; the same seed gives the same data.')
+@click.option('--batch-size', type=int, default=5000, show_default=True, help='Rows per INSERT batch.')
+def seed_scale(scale, cases, lawyers, clients, seed, batch_size):
+    """Bulk-generate users, cases, requests, chats, documents, invoices, transactions and notifications."""
+    overrides = {name: value for name, value in (('cases', cases), ('lawyers', lawyers), ('clients', clients)) if value is not None}
+    try:
+        db.create_all()
+        counts = generate_dataset(scale, seed=seed, batch_size=batch_size, progress=print, **overrides)
+        for table, rows in sorted(counts.items()):
+            print(f'  {table}: {rows}')
+        print(f'Generated {sum(counts.values())} synthetic rows!')
+    except Exception as e:
+        db.session.rollback()
+        print(f'Error generating synthetic data: {str(e)}')
+
 if __name__ == "__main__":
     # Create tables if they don't exist
     with app.app_context():
@@ -191,5 +339,8 @@ if __name__ == "__main__":
             print("Database tables created successfully!")
         except Exception as e:
             print(f"Error creating database tables: {str(e)}")
+
+        # Load revoked tokens before serving requests
+        revocation_store.warm()
     # Use socketio.run instead of app.run
     socketio.run(app, debug=True)
\ No newline at end of file
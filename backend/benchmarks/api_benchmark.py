@@ -0,0 +1,396 @@
+"""API latency benchmark over a synthetic dataset.
+
+Seeds a database with ``synthetic_data.generate_dataset`` at the chosen scale,
+then drives the main flows round-robin for ``--iterations`` rounds and reports
+p50/p95/p99 latency and SQL statements per request for each endpoint:
+
+* every GET in ``Dikoras.postman_collection.json`` (dashboards, profiles, case,
+  invoice, transaction and notification lists, chat history), each called as
+  the role its folder belongs to; requests that fail their first call are
+  reported and skipped
+* login, case list, chat polling (``after_id``), sending a chat message,
+  paying an invoice and the transaction CSV export
+
+SQL counts come from the ``Server-Timing`` header, so they are also available
+against a running server. Run from ``backend/``::
+
+    python benchmarks/api_benchmark.py --scale small --save benchmarks/baselines/small.json
+    python benchmarks/api_benchmark.py --scale small --compare benchmarks/baselines/small.json
+
+The seeded SQLite database is cached under ``benchmarks/.data`` and every run
+works on a fresh copy, so write flows do not change later runs. With
+``--database`` (e.g. a PostgreSQL URL) the database is used in place and only
+seeded when it has no synthetic users yet. ``--url http://localhost:5000``
+sends the requests to a server running on that database instead of the
+in-process test client.
+
+``--compare`` exits with status 1 when an endpoint's p95 grew by more than
+``--threshold`` percent or it issues more SQL statements per request than the
+baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BACKEND_DIR, 'benchmarks', '.data')
+COLLECTION = os.path.join(BACKEND_DIR, 'Dikoras.postman_collection.json')
+
+# Postman folder -> (URL prefix, role that calls it)
+FOLDER_ROUTES = {
+    'Auth': ('/auth', 'client'),
+    'Admin': ('/admin', 'admin'),
+    'Lawyer': ('/lawyer', 'lawyer'),
+    'Client': ('', 'client'),  # the collection's client paths already start with /client
+    'Main': ('/main', None),
+    'Chat': ('/chat', 'lawyer'),
+}
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+class Scenario:
+    """One benchmarked request.
+
+    ``path`` and the string values of ``body`` may use the {case_id}, {after_id},
+    {invoice_id} and {username} placeholders, filled in per iteration.
+    """
+
+    def __init__(self, name, method, path, role, body=None, preflight=True):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.role = role
+        self.body = body
+        self.preflight = preflight  # write flows are not probed before the run
+
+class Fixtures:
+    """Signed-in users and the rows each iteration works on"""
+
+    def __init__(self, tokens, lawyer_cases, client_usernames, invoices):
+        self.tokens = tokens  # role -> [token]; lawyer i works on lawyer_cases[i]
+        self.lawyer_cases = lawyer_cases  # [(case_id, last chat id)]
+        self.client_usernames = client_usernames
+        self.invoices = invoices  # [(invoice_id, token of its client)], one per pay request
+
+    def request(self, scenario, iteration):
+        """(path, headers, body) for scenario at iteration, or None when its fixtures are used up"""
+        case_id, after_id = self.lawyer_cases[iteration % len(self.lawyer_cases)]
+        invoice_id = token = None
+        if scenario.role == 'payer':
+            if iteration >= len(self.invoices):
+                return None
+            invoice_id, token = self.invoices[iteration]
+        elif scenario.role:
+            pool = self.tokens[scenario.role]
+            token = pool[iteration % len(pool)]
+
+        values = dict(
+            case_id=case_id, after_id=after_id, invoice_id=invoice_id,
+            username=self.client_usernames[iteration % len(self.client_usernames)]
+        )
+        path = scenario.path.format(**values)
+        body = scenario.body and {key: value.format(**values) for key, value in scenario.body.items()}
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return path, headers, body
+
+def collection_scenarios(path=COLLECTION):
+    """Every GET request in the Postman collection, called as its folder's role"""
+    with open(path) as f:
+        collection = json.load(f)
+
+    scenarios = []
+    for folder in collection['item']:
+        if folder['name'] not in FOLDER_ROUTES:
+            continue
+        prefix, role = FOLDER_ROUTES[folder['name']]
+        for item in folder['item']:
+            request = item['request']
+            if request['method'] != 'GET':
+                continue
+            url = request['url']['raw'] if isinstance(request['url'], dict) else request['url']
+            route = prefix + url.replace('{{base_url}}', '').replace('<case_id>', '{case_id}')
+            scenarios.append(Scenario(f"{folder['name']}/{item['name']}", 'GET', route, role))
+    return scenarios
+
+def flow_scenarios(password):
+    return [
+        Scenario('Flow/Login', 'POST', '/auth/login', None, body={'username': '{username}', 'password': password}),
+        Scenario('Flow/Case list', 'GET', '/case/', 'client'),
+        Scenario('Flow/Chat poll', 'GET', '/chat/api/messages/{case_id}?after_id={after_id}', 'lawyer'),
+        Scenario('Flow/Send chat message', 'POST', '/chat/{case_id}/send', 'lawyer',
+                 body={'message': 'Benchmark message'}, preflight=False),
+        Scenario('Flow/Pay invoice', 'POST', '/invoice/{invoice_id}/pay', 'payer',
+                 body={'payment_method': 'mpesa'}, preflight=False),
+        Scenario('Flow/Transaction export', 'GET', '/transaction/export', 'admin'),
+    ]
+
+class TestClientTransport:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, headers, body):
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.headers, response.get_data()  # drains streamed bodies
+
+class HttpTransport:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, headers, body):
+        data = None
+        headers = dict(headers)
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+def prepare_database(args):
+    """(database URL to run against, path to cache the seeded SQLite file at or None, temp dir or None)"""
+    if args.database:
+        return args.database, None, None
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    cache = os.path.join(DATA_DIR, f'{args.scale}-seed{args.seed}.db')
+    temp_dir = tempfile.mkdtemp(prefix='dikoras-bench-')
+    working = os.path.join(temp_dir, 'bench.db')
+    if os.path.exists(cache) and not args.reseed:
+        shutil.copyfile(cache, working)
+        cache = None
+    return f'sqlite:///{working}', cache, temp_dir
+
+def seed_if_needed(app, args, cache):
+    from sqlalchemy import select
+    from models import db, User
+    from synthetic_data import generate_dataset
+
+    with app.app_context():
+        db.create_all()
+        seeded = db.session.execute(select(User.id).where(User.username.like('syn\\_%', escape='\\')).limit(1)).first()
+        if seeded is None or (args.reseed and cache):
+            print(f'Seeding {args.scale} dataset...')
+            counts = generate_dataset(args.scale, seed=args.seed, progress=lambda message: print(f'  {message}'))
+            print('  ' + ', '.join(f'{table}={rows}' for table, rows in sorted(counts.items())))
+        db.session.remove()
+        if cache:
+            db.engine.dispose()  # closing the last connection checkpoints the WAL into the file
+            shutil.copyfile(db.engine.url.database, cache)
+
+def sign_in(transport, username, password):
+    status, _, body = transport.request('POST', '/auth/login', {}, {'username': username, 'password': password})
+    if status != 200:
+        sys.exit(f'Could not sign in as {username} (HTTP {status})')
+    return json.loads(body)['access_token']
+
+def load_fixtures(app, transport, password, pool_size, iterations):
+    from sqlalchemy import func, select
+    from models import db, User, Case, Chat, Invoice
+
+    with app.app_context():
+        synthetic = User.username.like('syn\\_%', escape='\\')
+        lawyer_rows = db.session.execute(
+            select(Case.lawyer_id, func.min(Case.id)).join(User, User.id == Case.lawyer_id)
+            .where(Case.status == 'in_progress', synthetic)
+            .group_by(Case.lawyer_id).order_by(Case.lawyer_id).limit(pool_size)
+        ).all()
+        client_ids = db.session.execute(
+            select(Case.client_id).join(User, User.id == Case.client_id)
+            .where(Case.status == 'in_progress', synthetic)
+            .distinct().order_by(Case.client_id).limit(pool_size)
+        ).scalars().all()
+        admin_ids = db.session.execute(
+            select(User.id).where(User.user_type == 'admin', synthetic).order_by(User.id).limit(1)
+        ).scalars().all()
+        invoice_rows = db.session.execute(
+            select(Invoice.id, Invoice.client_id).join(User, User.id == Invoice.client_id)
+            .where(Invoice.status == 'sent', synthetic).order_by(Invoice.id).limit(iterations)
+        ).all()
+        last_chat_ids = dict(db.session.execute(
+            select(Chat.case_id, func.max(Chat.id)).where(Chat.case_id.in_([case_id for _, case_id in lawyer_rows]))
+            .group_by(Chat.case_id)
+        ).all())
+        user_ids = {lawyer_id for lawyer_id, _ in lawyer_rows} | set(client_ids) | set(admin_ids) | {c for _, c in invoice_rows}
+        usernames = dict(db.session.execute(select(User.id, User.username).where(User.id.in_(user_ids))).all())
+        db.session.remove()
+
+    if not lawyer_rows or not client_ids or not admin_ids:
+        sys.exit('The database has no synthetic dataset to benchmark against')
+
+    tokens = {user_id: sign_in(transport, usernames[user_id], password) for user_id in user_ids}
+    return Fixtures(
+        tokens={
+            'admin': [tokens[user_id] for user_id in admin_ids],
+            'client': [tokens[user_id] for user_id in client_ids],
+            'lawyer': [tokens[lawyer_id] for lawyer_id, _ in lawyer_rows],
+        },
+        lawyer_cases=[(case_id, last_chat_ids.get(case_id, 0)) for _, case_id in lawyer_rows],
+        client_usernames=[usernames[user_id] for user_id in client_ids],
+        invoices=[(invoice_id, tokens[client_id]) for invoice_id, client_id in invoice_rows],
+    )
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * fraction // 1))
+    return sorted_values[int(rank) - 1]
+
+def summarize(samples):
+    latencies = sorted(latency for latency, _, _ in samples)
+    queries = [count for _, count, _ in samples if count is not None]
+    errors = sum(1 for _, _, status in samples if status >= 400)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'sql_mean': round(statistics.fmean(queries), 2) if queries else None,
+        'sql_max': max(queries) if queries else None,
+    }
+
+def call(transport, scenario, fixtures, iteration):
+    """Run scenario once: (latency ms, SQL statements or None, status), or None when it has no fixtures left"""
+    request = fixtures.request(scenario, iteration)
+    if request is None:
+        return None
+    path, headers, body = request
+    started = time.perf_counter()
+    status, response_headers, _ = transport.request(scenario.method, path, headers, body)
+    elapsed = (time.perf_counter() - started) * 1000
+    match = SERVER_TIMING_QUERIES.search(response_headers.get('Server-Timing') or '')
+    return elapsed, int(match.group(1)) if match else None, status
+
+def run(transport, scenarios, fixtures, iterations):
+    """Probe every scenario once, then run the working ones round-robin; returns (results, skipped)"""
+    skipped = {}
+    active = []
+    for scenario in scenarios:
+        if scenario.preflight:
+            _, _, status = call(transport, scenario, fixtures, 0)
+            if status >= 400:
+                skipped[scenario.name] = status
+                continue
+        active.append(scenario)
+
+    samples = {scenario.name: [] for scenario in active}
+    for iteration in range(iterations):
+        for scenario in active:
+            sample = call(transport, scenario, fixtures, iteration)
+            if sample is not None:
+                samples[scenario.name].append(sample)
+    return {name: summarize(values) for name, values in samples.items() if values}, skipped
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results, skipped):
+    width = max(len(name) for name in list(results) + list(skipped) + ['endpoint'])
+    print(f"{'endpoint':<{width}} {'n':>5} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql':>6}")
+    for name, stats in results.items():
+        sql = '-' if stats['sql_mean'] is None else f"{stats['sql_mean']:g}"
+        print(f"{name:<{width}} {stats['requests']:>5} {stats['errors']:>4} {stats['p50_ms']:>8.2f} "
+              f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {sql:>6}")
+    for name, status in skipped.items():
+        print(f'{name:<{width}} skipped: first call returned HTTP {status}')
+
+def compare(results, baseline, threshold):
+    """Print changes against a saved baseline; returns the names of regressed endpoints"""
+    regressions = []
+    print(f"\nCompared with baseline from {baseline['meta'].get('created_at')} ({baseline['meta'].get('git_revision')}):")
+    for name, stats in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f'  {name}: new endpoint')
+            continue
+        p95_change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        more_sql = (stats['sql_mean'] or 0) >= (before['sql_mean'] or 0) + 0.5  # means vary a little with the rotated users
+        regressed = p95_change > threshold or more_sql
+        if regressed:
+            regressions.append(name)
+        print(f"  {'REGRESSION ' if regressed else ''}{name}: p95 {before['p95_ms']:.2f} -> {stats['p95_ms']:.2f} ms "
+              f"({p95_change:+.0f}%), sql {before['sql_mean']} -> {stats['sql_mean']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', default='small', help='synthetic dataset size: small, medium or large')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reseed', action='store_true', help='regenerate the cached SQLite dataset')
+    parser.add_argument('--database', help='database URL to seed/use in place instead of the cached SQLite copy')
+    parser.add_argument('--url', help='benchmark a running server (e.g. http://localhost:5000) instead of the test client')
+    parser.add_argument('--iterations', type=int, default=50, help='rounds over all endpoints')
+    parser.add_argument('--users', type=int, default=20, help='distinct clients and lawyers to rotate through')
+    parser.add_argument('--save', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=20, help='p95 increase (percent) counted as a regression')
+    args = parser.parse_args()
+
+    from synthetic_data import SCALES, SYNTHETIC_PASSWORD
+    if args.scale not in SCALES:
+        parser.error(f"--scale must be one of {', '.join(SCALES)}")
+
+    database_url, cache, temp_dir = prepare_database(args)
+    os.environ['DATABASE_URL'] = database_url  # read when the app module is imported
+    from app import app
+    app.config['MAIL_QUEUE_ASYNC'] = False
+    app.config['METRICS_SLOW_REQUEST_MS'] = float('inf')  # keep the report readable
+
+    try:
+        seed_if_needed(app, args, cache)
+        transport = HttpTransport(args.url) if args.url else TestClientTransport(app)
+        fixtures = load_fixtures(app, transport, SYNTHETIC_PASSWORD, args.users, args.iterations)
+        scenarios = collection_scenarios() + flow_scenarios(SYNTHETIC_PASSWORD)
+        results, skipped = run(transport, scenarios, fixtures, args.iterations)
+    finally:
+        if temp_dir:
+            with app.app_context():
+                from models import db
+                db.engine.dispose()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print_results(results, skipped)
+    report = {
+        'meta': {
+            'scale': args.scale, 'seed': args.seed, 'iterations': args.iterations,
+            'target': args.url or 'test-client', 'database': database_url.split(':', 1)[0],
+            'git_revision': git_revision(), 'python': platform.python_version(),
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f'\nSaved results to {args.save}')
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    sys.path.insert(0, BACKEND_DIR)
+    main()
@@ -0,0 +1,206 @@
+"""Content-addressed, deduplicated storage for uploaded files.
+
+Uploads are streamed to disk in ``BLOB_CHUNK_SIZE`` chunks while their SHA-256
+is computed, then stored once per distinct content under
+``BLOB_STORAGE_DIR/<aa>/<bb>/<sha256><ext>``. ``Document.file_path`` and
+``Chat.attachment`` hold that path, and the ``blobs`` table counts how many rows
+reference it. Deleting a document or chat message (including through a case's
+cascade) releases its reference; the file is removed once nothing references it
+and the deleting transaction has committed. A file written by an upload whose
+transaction rolls back is removed too, unless someone else now references it.
+
+Removal happens in a short transaction of its own that deletes the blob row only
+while its ``ref_count`` is still zero and unlinks the file before committing, so
+a concurrent upload of the same content (whose upsert waits on that row) either
+keeps the file alive or finds it gone and writes it again.
+
+Paths that do not point into the store (uploads from before it existed) are
+left alone.
+
+``send_stored_file`` serves a stored file with its content hash as a strong
+ETag, answers ``If-None-Match`` / ``Range`` requests, and can hand the transfer
+to the front-end web server (``USE_X_SENDFILE`` or
+``DOWNLOAD_ACCEL_REDIRECT_PREFIX`` for nginx) instead of streaming it from Python.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from flask import current_app, request, send_file
+from sqlalchemy import event, select, update, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from werkzeug.utils import secure_filename
+from models import db, Blob, Document, Chat
+
+SHA256_NAME = re.compile(r'^([0-9a-f]{64})(\.[a-z0-9]+)?$')
+
+def _storage_root():
+    return current_app.config.get('BLOB_STORAGE_DIR', os.path.join('uploads', 'blobs'))
+
+def blob_path(sha256, extension=''):
+    """Sharded location for content with this hash"""
+    return os.path.join(_storage_root(), sha256[:2], sha256[2:4], f'{sha256}{extension}')
+
+def blob_hash(path):
+    """SHA-256 of the stored blob at path, or None for paths outside the store"""
+    if not path:
+        return None
+    match = SHA256_NAME.match(os.path.basename(path))
+    return match.group(1) if match else None
+
+def _add_reference(sha256, path, size):
+    """Insert the blob row or bump its ref_count, atomically where the database allows"""
+    values = dict(sha256=sha256, path=path, size=size, ref_count=1)
+    dialect = db.session.get_bind().dialect.name
+    upsert = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}.get(dialect)
+
+    if upsert is not None:
+        db.session.execute(
+            upsert(Blob).values(**values).on_conflict_do_update(
+                index_elements=[Blob.sha256], set_={'ref_count': Blob.ref_count + 1}
+            )
+        )
+    elif db.session.get(Blob, sha256) is None:
+        db.session.add(Blob(**values))
+        db.session.flush()
+    else:
+        db.session.execute(update(Blob).where(Blob.sha256 == sha256).values(ref_count=Blob.ref_count + 1))
+
+    return db.session.execute(select(Blob.path).where(Blob.sha256 == sha256)).scalar_one()
+
+def store_upload(file_storage):
+    """Stream an uploaded file into the store and return its path.
+
+    Adds one reference to the blob in the current transaction; the caller commits
+    it together with the Document or Chat row that holds the path.
+    """
+    extension = os.path.splitext(secure_filename(file_storage.filename or ''))[1].lower()
+    chunk_size = current_app.config.get('BLOB_CHUNK_SIZE', 1024 * 1024)
+
+    temp_dir = os.path.join(_storage_root(), 'tmp')
+    os.makedirs(temp_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file_storage.stream.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+
+        sha256 = digest.hexdigest()
+        path = _add_reference(sha256, blob_path(sha256, extension), size)
+
+        if os.path.exists(path):
+            os.remove(temp_path)  # identical content is already stored
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+            # Removed again if this transaction rolls back
+            db.session.info.setdefault('blob_written', set()).add((sha256, path, size))
+        return path
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _accel_redirect_uri(path):
+    """Internal nginx URI for path, or None when offloading is off or path is outside its root"""
+    prefix = current_app.config.get('DOWNLOAD_ACCEL_REDIRECT_PREFIX')
+    if not prefix:
+        return None
+    root = os.path.abspath(current_app.config.get('DOWNLOAD_ACCEL_REDIRECT_ROOT', 'uploads'))
+    relative = os.path.relpath(path, root)
+    if relative.startswith(os.pardir):
+        return None
+    return f"{prefix.rstrip('/')}/{relative.replace(os.sep, '/')}"
+
+def send_stored_file(path, download_name):
+    """Send an uploaded file as an attachment, with conditional and byte-range support"""
+    path = os.path.abspath(path)
+    # Stored blobs never change, so their hash is a strong validator; older files fall back to mtime/size
+    etag = blob_hash(path) or True
+
+    accel_uri = _accel_redirect_uri(path)
+    if accel_uri:
+        response = current_app.response_class(status=200)
+        if etag is not True:
+            response.set_etag(etag)
+            if request.if_none_match.contains(etag):
+                response.status_code = 304
+                return response
+        # nginx streams the file (including Range requests) from its internal location
+        response.headers['X-Accel-Redirect'] = accel_uri
+        response.headers['Content-Type'] = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    response = send_file(path, as_attachment=True, download_name=download_name, etag=etag, conditional=True)
+    response.cache_control.private = True
+    return response
+
+def _release(session, path):
+    sha256 = blob_hash(path)
+    if not sha256:
+        return
+
+    connection = session.connection()
+    connection.execute(update(Blob).where(Blob.sha256 == sha256).values(ref_count=Blob.ref_count - 1))
+    unreferenced = connection.execute(
+        select(Blob.path, Blob.size).where(Blob.sha256 == sha256, Blob.ref_count <= 0)
+    ).first()
+    if unreferenced is not None:
+        # The zero-count row stays until the file is gone; see _remove_if_unreferenced
+        session.info.setdefault('blob_unlink', set()).add((sha256, unreferenced.path, unreferenced.size))
+
+def _remove_if_unreferenced(sha256, path, size):
+    """Delete the blob row and its file, unless something references the content again"""
+    with db.engine.begin() as connection:
+        upsert = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}.get(connection.dialect.name)
+        if upsert is not None:
+            # Lock the key (waiting for any uncommitted upload of the same content) via a zero-count row
+            connection.execute(
+                upsert(Blob).values(sha256=sha256, path=path, size=size, ref_count=0)
+                .on_conflict_do_nothing(index_elements=[Blob.sha256])
+            )
+        result = connection.execute(delete(Blob).where(Blob.sha256 == sha256, Blob.ref_count <= 0))
+        if result.rowcount or upsert is None:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def _cleanup(entries):
+    for sha256, path, size in entries:
+        try:
+            _remove_if_unreferenced(sha256, path, size)
+        except Exception as e:
+            # A leftover zero-count row and its file go the next time this content is released
+            current_app.logger.warning(f"Could not remove unreferenced blob {path}: {str(e)}")
+
+def _after_flush(session, flush_context):
+    for obj in session.deleted:
+        if isinstance(obj, Document):
+            _release(session, obj.file_path)
+        elif isinstance(obj, Chat):
+            _release(session, obj.attachment)
+
+def _after_commit(session):
+    session.info.pop('blob_written', None)
+    _cleanup(session.info.pop('blob_unlink', ()))
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('blob_unlink', None)
+    if session.in_transaction():
+        return  # a savepoint; the outer transaction may still commit the upload
+    _cleanup(session.info.pop('blob_written', ()))
+
+event.listen(db.session, 'after_flush', _after_flush)
+event.listen(db.session, 'after_commit', _after_commit)
+event.listen(db.session, 'after_soft_rollback', _after_rollback)
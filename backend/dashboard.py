@@ -0,0 +1,172 @@
+"""Platform-wide aggregate statistics shared by the admin dashboard and public stats API.
+
+The snapshot is cached per process for ``DASHBOARD_SNAPSHOT_TTL`` seconds. Admin
+actions that change what it counts (lawyer approval, account activation, case
+assignment, legal services) drop this process's copy right away; other changes,
+and other worker processes, catch up when the TTL expires.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, and_
+from flask import current_app
+from models import db, User, Case, Transaction, Invoice, LegalService
+
+# Number of 30-day windows shown in the dashboard charts
+MONTHLY_WINDOWS = 6
+
+_snapshot_lock = threading.Lock()
+_snapshot = {'data': None, 'expires_at': 0.0}
+
+def count_if(*conditions):
+    """COUNT of rows matching all conditions, usable inside a single SELECT"""
+    return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+
+def sum_if(column, *conditions):
+    """SUM of column over rows matching all conditions"""
+    return func.coalesce(func.sum(case((and_(*conditions), column), else_=0)), 0)
+
+def _monthly_windows(now=None):
+    """Return (start, end) pairs for the dashboard chart windows, most recent first"""
+    now = now or datetime.utcnow()
+    current_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    windows = []
+    for i in range(MONTHLY_WINDOWS):
+        month_start = current_month - timedelta(days=30*i)
+        windows.append((month_start, month_start + timedelta(days=30)))
+    return windows
+
+def _user_stats(windows):
+    is_lawyer = User.user_type == 'lawyer'
+    columns = [
+        func.count(User.id),
+        count_if(User.user_type == 'client'),
+        count_if(is_lawyer),
+        count_if(is_lawyer, User.approval_status == 'pending'),
+        count_if(is_lawyer, User.approval_status == 'approved'),
+        count_if(is_lawyer, User.approval_status == 'rejected'),
+        count_if(is_lawyer, User.approval_status == 'approved', User.is_active == True),
+    ]
+    columns += [count_if(User.created_at >= start, User.created_at < end) for start, end in windows]
+    row = db.session.query(*columns).one()
+
+    stats = {
+        'total_users': row[0],
+        'total_clients': row[1],
+        'total_lawyers': row[2],
+        'pending_lawyers': row[3],
+        'approved_lawyers': row[4],
+        'rejected_lawyers': row[5],
+        'active_approved_lawyers': row[6]
+    }
+    return stats, list(row[7:])
+
+def _case_stats(windows):
+    columns = [
+        func.count(Case.id),
+        count_if(Case.status == 'open'),
+        count_if(Case.status == 'assigned'),
+        count_if(Case.status == 'in_progress'),
+        count_if(Case.status == 'resolved'),
+        count_if(Case.status == 'closed'),
+    ]
+    columns += [count_if(Case.created_at >= start, Case.created_at < end) for start, end in windows]
+    row = db.session.query(*columns).one()
+
+    stats = {
+        'total_cases': row[0],
+        'open_cases': row[1],
+        'assigned_cases': row[2],
+        'in_progress_cases': row[3],
+        'active_cases': row[2] + row[3],
+        'resolved_cases': row[4],
+        'closed_cases': row[5]
+    }
+    return stats, list(row[6:])
+
+def _transaction_stats(windows):
+    completed = Transaction.status == 'completed'
+    columns = [
+        func.count(Transaction.id),
+        count_if(completed),
+        count_if(Transaction.status == 'pending'),
+        count_if(Transaction.status == 'failed'),
+        sum_if(Transaction.amount, completed),
+    ]
+    columns += [
+        sum_if(Transaction.amount, completed, Transaction.created_at >= start, Transaction.created_at < end)
+        for start, end in windows
+    ]
+    row = db.session.query(*columns).one()
+
+    stats = {
+        'total_transactions': row[0],
+        'completed_transactions': row[1],
+        'pending_transactions': row[2],
+        'failed_transactions': row[3],
+        'total_revenue': float(row[4] or 0)
+    }
+    return stats, [float(value or 0) for value in row[5:]]
+
+def _invoice_stats():
+    row = db.session.query(
+        func.count(Invoice.id),
+        count_if(Invoice.status == 'sent'),
+        count_if(Invoice.status == 'paid'),
+        count_if(Invoice.status == 'overdue'),
+        count_if(Invoice.status == 'draft'),
+    ).one()
+
+    return {
+        'total_invoices': row[0],
+        'pending_invoices': row[1],
+        'paid_invoices': row[2],
+        'overdue_invoices': row[3],
+        'draft_invoices': row[4]
+    }
+
+def compute_dashboard_snapshot(now=None):
+    """Compute every dashboard counter with one grouped query per table"""
+    windows = _monthly_windows(now)
+
+    user_stats, users_by_window = _user_stats(windows)
+    case_stats, cases_by_window = _case_stats(windows)
+    transaction_stats, revenue_by_window = _transaction_stats(windows)
+    invoice_stats = _invoice_stats()
+    active_services = LegalService.query.filter_by(is_active=True).count()
+
+    monthly_stats = [{
+        'month': start.strftime('%Y-%m'),
+        'month_name': start.strftime('%B %Y'),
+        'cases': cases_by_window[i],
+        'revenue': revenue_by_window[i],
+        'users': users_by_window[i]
+    } for i, (start, end) in enumerate(windows)]
+
+    return {
+        'user_stats': user_stats,
+        'case_stats': case_stats,
+        'financial_stats': dict(transaction_stats, **invoice_stats),
+        'active_services': active_services,
+        'monthly_stats': list(reversed(monthly_stats)),
+        'generated_at': (now or datetime.utcnow()).isoformat()
+    }
+
+def get_dashboard_snapshot(force_refresh=False):
+    """Return the cached dashboard snapshot, recomputing it once it is older than DASHBOARD_SNAPSHOT_TTL"""
+    ttl = current_app.config.get('DASHBOARD_SNAPSHOT_TTL', 30)
+
+    with _snapshot_lock:
+        if not force_refresh and _snapshot['data'] is not None and time.monotonic() < _snapshot['expires_at']:
+            return _snapshot['data']
+
+        data = compute_dashboard_snapshot()
+        _snapshot['data'] = data
+        _snapshot['expires_at'] = time.monotonic() + ttl
+        return data
+
+def invalidate_dashboard_snapshot():
+    """Drop this process's cached snapshot so the next read recomputes it"""
+    with _snapshot_lock:
+        _snapshot['data'] = None
+        _snapshot['expires_at'] = 0.0
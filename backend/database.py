@@ -0,0 +1,61 @@
+"""Database URL and engine options from the environment.
+
+``DATABASE_URL`` selects the database (``sqlite:///legal_platform.db`` when
+unset). PostgreSQL gets a tuned connection pool, tunable with
+``DB_POOL_SIZE``, ``DB_MAX_OVERFLOW``, ``DB_POOL_TIMEOUT``, ``DB_POOL_RECYCLE``
+and ``DB_STATEMENT_TIMEOUT_MS``. SQLite connections are switched to WAL
+journaling with ``synchronous=NORMAL`` and a ``busy_timeout`` (``SQLITE_BUSY_TIMEOUT_MS``)
+so readers never block the writer and concurrent writers wait instead of
+failing with "database is locked".
+"""
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+DEFAULT_DATABASE_URL = 'sqlite:///legal_platform.db'
+
+def _int_setting(environ, name, default):
+    return int(environ.get(name, default))
+
+def database_config(environ=os.environ):
+    """Return (SQLALCHEMY_DATABASE_URI, SQLALCHEMY_ENGINE_OPTIONS) for the environment"""
+    uri = environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]  # Heroku-style URLs
+
+    backend = make_url(uri).get_backend_name()
+    if backend == 'postgresql':
+        statement_timeout = _int_setting(environ, 'DB_STATEMENT_TIMEOUT_MS', 30000)
+        options = {
+            'pool_size': _int_setting(environ, 'DB_POOL_SIZE', 10),
+            'max_overflow': _int_setting(environ, 'DB_MAX_OVERFLOW', 20),
+            'pool_timeout': _int_setting(environ, 'DB_POOL_TIMEOUT', 30),
+            'pool_recycle': _int_setting(environ, 'DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': True,
+            'connect_args': {'options': f'-c statement_timeout={statement_timeout}'},
+        }
+    elif backend == 'sqlite':
+        # Python-level lock wait, matching the busy_timeout pragma below
+        options = {'connect_args': {'timeout': sqlite_busy_timeout(environ) / 1000}}
+    else:
+        options = {'pool_pre_ping': True}
+    return uri, options
+
+def sqlite_busy_timeout(environ=os.environ):
+    return _int_setting(environ, 'SQLITE_BUSY_TIMEOUT_MS', 5000)
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f'PRAGMA busy_timeout = {sqlite_busy_timeout()}')
+        # WAL is a property of the database file; in-memory databases keep their own journal
+        if cursor.execute('PRAGMA database_list').fetchone()[2]:
+            cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute('PRAGMA synchronous = NORMAL')
+    finally:
+        cursor.close()
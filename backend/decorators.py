@@ -1,19 +1,98 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, g, current_app
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from models import User
+from models import db, User
+
+# Minimal view of a user needed for authorization checks
+Identity = namedtuple('Identity', ['id', 'user_type', 'approval_status', 'is_active'])
+
+# user id -> (expires at, Identity), least recently used first
+_identity_cache = OrderedDict()
+_identity_cache_lock = threading.Lock()
+
+def _normalize_user_id(user_id):
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return user_id
+
+def load_identity(user_id, fresh=False):
+    """Return the Identity for user_id from the process-wide cache, querying on a miss.
+
+    ``fresh`` skips the cache (and refreshes it): the cache is per process, so
+    another worker may still hold an entry for up to IDENTITY_CACHE_TTL seconds
+    after invalidate_identity ran elsewhere. The cache keeps at most
+    IDENTITY_CACHE_SIZE entries, evicting the least recently used.
+    """
+    user_id = _normalize_user_id(user_id)
+    ttl = current_app.config.get('IDENTITY_CACHE_TTL', 15)
+    now = time.monotonic()
+
+    if not fresh:
+        with _identity_cache_lock:
+            cached = _identity_cache.get(user_id)
+            if cached and cached[0] > now:
+                _identity_cache.move_to_end(user_id)
+                return cached[1]
+            if cached:
+                del _identity_cache[user_id]  # expired
+
+    row = db.session.query(
+        User.user_type, User.approval_status, User.is_active
+    ).filter(User.id == user_id).first()
+    if not row:
+        return None
+
+    identity = Identity(user_id, row.user_type, row.approval_status, row.is_active)
+    _cache_identity(identity, now + ttl, current_app.config.get('IDENTITY_CACHE_SIZE', 10000))
+    return identity
+
+def _cache_identity(identity, expires_at, max_size):
+    with _identity_cache_lock:
+        _identity_cache[identity.id] = (expires_at, identity)
+        _identity_cache.move_to_end(identity.id)
+        while len(_identity_cache) > max_size:
+            _identity_cache.popitem(last=False)
+
+def invalidate_identity(user_id):
+    """Drop a cached identity after the user's type, approval status or active flag changes.
+
+    Only this process's cache is cleared; other workers see the change once
+    their entry expires (IDENTITY_CACHE_TTL).
+    """
+    with _identity_cache_lock:
+        _identity_cache.pop(_normalize_user_id(user_id), None)
+
+def get_current_identity(fresh=False):
+    """Identity of the JWT user, resolved at most once per request (``fresh`` bypasses the cache)"""
+    user_id = _normalize_user_id(get_jwt_identity())
+    identity = g.get('current_identity')
+    if identity is None or identity.id != user_id or (fresh and not g.get('current_identity_fresh')):
+        identity = g.current_identity = load_identity(user_id, fresh=fresh)
+        g.current_identity_fresh = fresh
+    return identity
+
+def get_current_user():
+    """Full User row of the JWT user, loaded at most once per request"""
+    user_id = _normalize_user_id(get_jwt_identity())
+    user = g.get('current_user')
+    if user is None or user.id != user_id:
+        user = g.current_user = db.session.get(User, user_id)
+    return user
 
 def lawyer_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
-            
-            if not user or user.user_type != 'lawyer':  # Changed 'role' to 'user_type'
+            identity = get_current_identity()
+
+            if not identity or identity.user_type != 'lawyer':  # Changed 'role' to 'user_type'
                 return jsonify({"message": "Lawyer access required"}), 403
-                
+
             return f(*args, **kwargs)
         except Exception as e:
             return jsonify({"message": "Invalid token"}), 401
@@ -24,12 +103,11 @@ def client_required(f):
     def decorated_function(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
-            
-            if not user or user.user_type != 'client':  # Changed 'role' to 'user_type'
+            identity = get_current_identity()
+
+            if not identity or identity.user_type != 'client':  # Changed 'role' to 'user_type'
                 return jsonify({"message": "Client access required"}), 403
-                
+
             return f(*args, **kwargs)
         except Exception as e:
             return jsonify({"message": "Invalid token"}), 401
@@ -40,13 +118,13 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
-            
-            if not user or user.user_type != 'admin':  # Changed 'role' to 'user_type'
+            # Read from the database: a revoked admin must lose access on every worker at once
+            identity = get_current_identity(fresh=True)
+
+            if not identity or identity.user_type != 'admin' or not identity.is_active:  # Changed 'role' to 'user_type'
                 return jsonify({"message": "Admin access required"}), 403
-                
+
             return f(*args, **kwargs)
         except Exception as e:
             return jsonify({"message": "Invalid token"}), 401
-    return decorated_function
\ No newline at end of file
+    return decorated_function
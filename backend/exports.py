@@ -0,0 +1,188 @@
+"""Streaming file exports.
+
+Exports never hold the full result set: rows are read as Core tuples in
+``EXPORT_BATCH_SIZE`` batches (``yield_per``), each batch is encoded and handed
+to the WSGI server straight away, optionally through an incremental gzip
+compressor. Memory use stays flat however many rows are exported.
+
+The ``cases``, ``invoices`` and ``transactions`` datasets can also be written as
+Parquet or Arrow IPC files for analytics tooling, one record batch per database
+batch, optionally split into hive-style ``month=YYYY-MM`` partitions. These
+formats need the optional ``pyarrow`` package.
+"""
+import csv
+import io
+import os
+import zlib
+from datetime import datetime, timedelta
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import select, types
+from models import db, Case, Invoice, Transaction
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Arrow exports are unavailable without pyarrow
+    pa = pq = None
+
+# dataset name -> (model, column used for date filtering and month partitions)
+DATASETS = {
+    'cases': (Case, Case.created_at),
+    'invoices': (Invoice, Invoice.issue_date),
+    'transactions': (Transaction, Transaction.created_at),
+}
+
+COLUMNAR_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+def iter_batches(statement, batch_size=None):
+    """Yield lists of Core rows for statement, batch_size at a time"""
+    batch_size = batch_size or current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    try:
+        for batch in result.partitions():
+            yield batch
+    finally:
+        result.close()
+
+def _csv_chunks(header, batches, format_row):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(header)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows(format_row(row) for row in batch)
+        yield buffer.getvalue()
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def csv_response(filename, header, statement, format_row, compress=False):
+    """Stream the rows of statement as a CSV attachment, gzipped when compress is set"""
+    chunks = (chunk.encode('utf-8') for chunk in _csv_chunks(header, iter_batches(statement), format_row))
+    mimetype = 'text/csv'
+    if compress:
+        chunks = _gzip_chunks(chunks)
+        mimetype = 'application/gzip'
+        filename = f'{filename}.gz'
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+def columnar_exports_available():
+    return pa is not None
+
+def _arrow_type(column_type):
+    if isinstance(column_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, types.Numeric) and column_type.asdecimal:
+        return pa.decimal128(column_type.precision or 38, column_type.scale or 0)
+    if isinstance(column_type, types.Float):
+        return pa.float64()
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp('us')
+    if isinstance(column_type, types.Date):
+        return pa.date32()
+    return pa.string()
+
+def _arrow_schema(model):
+    return pa.schema([pa.field(column.name, _arrow_type(column.type)) for column in model.__table__.columns])
+
+def _record_batch(schema, rows):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for field, values in zip(schema, columns)],
+        schema=schema
+    )
+
+def _open_writer(sink, schema, file_format):
+    if file_format == 'parquet':
+        return pq.ParquetWriter(sink, schema, compression='snappy')
+    return pa.ipc.new_file(sink, schema)
+
+def _month_key(value):
+    return value.strftime('%Y-%m') if value is not None else 'unknown'
+
+def dataset_statement(name, date_from=None, date_to=None):
+    """SELECT of every column of dataset name, oldest first, limited to [date_from, date_to] (dates)"""
+    model, date_column = DATASETS[name]
+    statement = select(*model.__table__.columns).order_by(date_column, model.id)
+
+    if isinstance(date_column.type, types.DateTime):
+        if date_from:
+            statement = statement.where(date_column >= datetime.combine(date_from, datetime.min.time()))
+        if date_to:
+            statement = statement.where(date_column < datetime.combine(date_to, datetime.min.time()) + timedelta(days=1))
+    else:
+        if date_from:
+            statement = statement.where(date_column >= date_from)
+        if date_to:
+            statement = statement.where(date_column <= date_to)
+    return statement
+
+def write_dataset(name, file_format, output, date_from=None, date_to=None, partition_by_month=False):
+    """Write dataset name as Parquet or Arrow IPC, reading it from the database in batches.
+
+    ``output`` is a file path or binary file object, or with ``partition_by_month``
+    a directory that receives ``month=YYYY-MM/part-0.<ext>`` files.
+    Returns ``(rows_written, paths_written)``.
+    """
+    if pa is None:
+        raise RuntimeError('Parquet and Arrow exports require the pyarrow package')
+
+    model, date_column = DATASETS[name]
+    schema = _arrow_schema(model)
+    month_index = schema.get_field_index(date_column.key)
+    extension = COLUMNAR_FORMATS[file_format]
+
+    rows_written = 0
+    paths = []
+    writer = None
+    current_month = None
+    try:
+        if not partition_by_month:
+            writer = _open_writer(output, schema, file_format)
+            paths.append(output)
+
+        for batch in iter_batches(dataset_statement(name, date_from, date_to)):
+            rows_written += len(batch)
+            if not partition_by_month:
+                writer.write_batch(_record_batch(schema, batch))
+                continue
+
+            # Rows arrive ordered by date, so each month is one contiguous run
+            start = 0
+            while start < len(batch):
+                month = _month_key(batch[start][month_index])
+                end = start
+                while end < len(batch) and _month_key(batch[end][month_index]) == month:
+                    end += 1
+
+                if month != current_month:
+                    if writer is not None:
+                        writer.close()
+                    directory = os.path.join(output, f'month={month}')
+                    os.makedirs(directory, exist_ok=True)
+                    path = os.path.join(directory, f'part-0{extension}')
+                    writer = _open_writer(path, schema, file_format)
+                    paths.append(path)
+                    current_month = month
+
+                writer.write_batch(_record_batch(schema, batch[start:end]))
+                start = end
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows_written, paths
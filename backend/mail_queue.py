@@ -0,0 +1,178 @@
+"""Persisted outbound mail queue.
+
+Views call ``enqueue_email`` inside their own transaction, so a message is only
+queued if the change it announces is committed and the request never waits on
+SMTP. Each commit that queued mail wakes a small pool of worker threads
+(``MAIL_QUEUE_WORKERS``). They lease due rows, deliver them over one reused
+SMTP connection per batch and reschedule failures with exponential backoff
+until ``MAIL_QUEUE_MAX_ATTEMPTS`` is reached. Rows left in 'sending' by a
+crashed worker become due again once their lease expires.
+
+``flask drain-mail-queue`` delivers everything that is due synchronously, e.g.
+from cron or a separate process when ``MAIL_QUEUE_ASYNC`` is disabled.
+"""
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import event, update
+from models import db, OutboundEmail
+
+CLAIMABLE_STATUSES = ('pending', 'sending')
+
+_wakeup = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+
+def enqueue_email(subject, recipients, body, sender=None):
+    """Queue a message; it is delivered after the current transaction commits"""
+    if isinstance(recipients, str):
+        recipients = [recipients]
+
+    email = OutboundEmail(
+        recipients=','.join(recipients),
+        sender=sender or current_app.config.get('MAIL_DEFAULT_SENDER'),
+        subject=subject,
+        body=body
+    )
+    db.session.add(email)
+    db.session.info['mail_enqueued'] = True
+    return email
+
+def _claim_batch(batch_size):
+    """Lease up to batch_size due messages to the calling worker, returning their ids"""
+    now = datetime.utcnow()
+    lease_expires = now + timedelta(seconds=current_app.config.get('MAIL_QUEUE_LEASE', 300))
+
+    due = db.session.query(OutboundEmail.id).filter(
+        OutboundEmail.status.in_(CLAIMABLE_STATUSES),
+        OutboundEmail.next_attempt_at <= now
+    ).order_by(OutboundEmail.next_attempt_at, OutboundEmail.id).limit(batch_size).all()
+
+    claimed = []
+    for (email_id,) in due:
+        # Conditional update so concurrent workers never claim the same row
+        result = db.session.execute(
+            update(OutboundEmail)
+            .where(
+                OutboundEmail.id == email_id,
+                OutboundEmail.status.in_(CLAIMABLE_STATUSES),
+                OutboundEmail.next_attempt_at <= now
+            )
+            .values(status='sending', next_attempt_at=lease_expires)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            claimed.append(email_id)
+    db.session.commit()
+    return claimed
+
+def _retry_delay(attempts):
+    base = current_app.config.get('MAIL_QUEUE_BACKOFF_BASE', 30)
+    ceiling = current_app.config.get('MAIL_QUEUE_BACKOFF_MAX', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+def _close(connection):
+    try:
+        connection.__exit__(None, None, None)
+    except Exception:
+        pass  # the server may already have dropped the connection
+
+def _deliver(email_ids):
+    """Send claimed messages over a single SMTP connection, returning the number sent"""
+    mail = current_app.extensions['mail']
+    max_attempts = current_app.config.get('MAIL_QUEUE_MAX_ATTEMPTS', 5)
+    emails = OutboundEmail.query.filter(OutboundEmail.id.in_(email_ids)).order_by(OutboundEmail.id).all()
+
+    sent = 0
+    connection = None
+    try:
+        for email in emails:
+            email.attempts += 1
+            try:
+                if connection is None:
+                    connection = mail.connect()
+                    connection.__enter__()
+                connection.send(Message(
+                    subject=email.subject,
+                    recipients=email.recipients.split(','),
+                    sender=email.sender,
+                    body=email.body
+                ))
+                email.status = 'sent'
+                email.sent_at = datetime.utcnow()
+                email.last_error = None
+                sent += 1
+            except Exception as e:
+                # Reconnect for the next message in case the connection is broken
+                if connection is not None:
+                    _close(connection)
+                    connection = None
+                email.last_error = str(e)[:1000]
+                if email.attempts >= max_attempts:
+                    email.status = 'failed'
+                else:
+                    email.status = 'pending'
+                    email.next_attempt_at = datetime.utcnow() + _retry_delay(email.attempts)
+                current_app.logger.warning(f"Mail delivery failed for outbound email {email.id}: {str(e)}")
+
+            # Record each outcome right away so a crash never re-sends delivered mail
+            db.session.commit()
+    finally:
+        if connection is not None:
+            _close(connection)
+    return sent
+
+def process_mail_queue(batch_size=None):
+    """Claim and deliver one batch of due messages, returning (claimed, sent)"""
+    email_ids = _claim_batch(batch_size or current_app.config.get('MAIL_QUEUE_BATCH_SIZE', 50))
+    if not email_ids:
+        return 0, 0
+    return len(email_ids), _deliver(email_ids)
+
+def drain_mail_queue():
+    """Deliver every message that is currently due, returning (claimed, sent)"""
+    total_claimed = total_sent = 0
+    while True:
+        claimed, sent = process_mail_queue()
+        if not claimed:
+            return total_claimed, total_sent
+        total_claimed += claimed
+        total_sent += sent
+
+def _worker_loop(app):
+    with app.app_context():
+        poll_interval = app.config.get('MAIL_QUEUE_POLL_INTERVAL', 5)
+        while True:
+            try:
+                claimed, _ = process_mail_queue()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Mail queue worker error: {str(e)}")
+                claimed = 0
+
+            if not claimed:
+                # Sleep until new mail is committed or retries may have become due
+                _wakeup.wait(poll_interval)
+                _wakeup.clear()
+
+def start_mail_workers(app):
+    """Start the background delivery threads once per process"""
+    with _workers_lock:
+        if _workers:
+            return
+        for i in range(app.config.get('MAIL_QUEUE_WORKERS', 2)):
+            worker = threading.Thread(target=_worker_loop, args=(app,), name=f'mail-queue-{i}', daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+def _after_commit(session):
+    if session.info.pop('mail_enqueued', False) and current_app.config.get('MAIL_QUEUE_ASYNC', True):
+        start_mail_workers(current_app._get_current_object())
+        _wakeup.set()
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('mail_enqueued', None)
+
+event.listen(db.session, 'after_commit', _after_commit)
+event.listen(db.session, 'after_soft_rollback', _after_rollback)
@@ -0,0 +1,194 @@
+"""Per-endpoint request metrics.
+
+Every request, including one that fails with an unhandled exception (counted
+as a 500), records its wall time, the number of SQL statements it executed,
+their total time and the response size into in-process histograms labelled by
+route and method. ``render_metrics`` exposes them in the Prometheus text format
+(served at ``/main/api/metrics`` to scrapers holding ``METRICS_TOKEN``; the
+endpoint is disabled when no token is configured), and each response carries a
+``Server-Timing`` header (``app``, ``db``) for browser dev tools.
+
+Requests slower than ``METRICS_SLOW_REQUEST_MS`` are logged together with their
+slowest statements. SQL issued while a streamed response body is being sent
+happens after the request has been recorded and is not counted.
+
+Histograms live in process memory: with several workers each one exposes its
+own, and Prometheus aggregates them per instance.
+"""
+import bisect
+import re
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Statements kept per request for the slow-request log
+MAX_RECORDED_STATEMENTS = 100
+
+class Histogram:
+    """Cumulative-bucket histogram for one label set"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+# metric name -> (help text, buckets)
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Request wall time', DURATION_BUCKETS),
+    'http_request_sql_queries': ('SQL statements executed per request', QUERY_COUNT_BUCKETS),
+    'http_request_sql_duration_seconds': ('Time spent executing SQL per request', DURATION_BUCKETS),
+    'http_response_size_bytes': ('Response body size (buffered responses only)', SIZE_BUCKETS),
+}
+
+_lock = threading.Lock()
+# (metric name, endpoint, method) -> Histogram
+_histograms = {}
+# (endpoint, method, status) -> count
+_requests_total = {}
+
+def _observe(name, endpoint, method, value):
+    key = (name, endpoint, method)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = Histogram(HISTOGRAMS[name][1])
+    histogram.observe(value)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_count' in g:
+        # The execution context is per statement, so a failed statement leaves nothing behind
+        context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    if started is None or not has_request_context() or 'sql_count' not in g:
+        return
+
+    elapsed = time.perf_counter() - started
+    g.sql_count += 1
+    g.sql_time += elapsed
+    if len(g.sql_statements) < MAX_RECORDED_STATEMENTS:
+        g.sql_statements.append((elapsed, statement))
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.sql_statements = []
+
+def _endpoint_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+def _format_statement(statement):
+    statement = re.sub(r'\s+', ' ', statement).strip()
+    return statement if len(statement) <= 500 else statement[:500] + '...'
+
+def _log_slow_request(endpoint, elapsed):
+    slowest = sorted(g.sql_statements, key=lambda item: item[0], reverse=True)[:5]
+    statements = '\n'.join(f'  {duration * 1000:.1f} ms  {_format_statement(statement)}' for duration, statement in slowest)
+    current_app.logger.warning(
+        f"Slow request {request.method} {request.path} ({endpoint}): {elapsed * 1000:.0f} ms, "
+        f"{g.sql_count} SQL statements in {g.sql_time * 1000:.0f} ms\n{statements}"
+    )
+
+def _record(status, size):
+    """Observe the current request once; returns its wall time, or None if already recorded"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return None
+
+    elapsed = time.perf_counter() - started
+    endpoint = _endpoint_label()
+    method = request.method
+
+    with _lock:
+        _observe('http_request_duration_seconds', endpoint, method, elapsed)
+        _observe('http_request_sql_queries', endpoint, method, g.sql_count)
+        _observe('http_request_sql_duration_seconds', endpoint, method, g.sql_time)
+        if size is not None:
+            _observe('http_response_size_bytes', endpoint, method, size)
+        status_key = (endpoint, method, str(status))
+        _requests_total[status_key] = _requests_total.get(status_key, 0) + 1
+
+    if elapsed * 1000 >= current_app.config.get('METRICS_SLOW_REQUEST_MS', 500):
+        _log_slow_request(endpoint, elapsed)
+    return elapsed
+
+def _finish_request(response):
+    # calculate_content_length() is None for streamed bodies
+    elapsed = _record(response.status_code, response.calculate_content_length())
+    if elapsed is not None:
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={elapsed * 1000:.1f}, db;dur={g.sql_time * 1000:.1f};desc="{g.sql_count} queries"'
+        )
+    return response
+
+def _teardown_request(error):
+    # after_request never ran: an unhandled exception propagated (debug/testing),
+    # or an after_request hook registered later failed first
+    _record(500, None)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_metrics(prefix='dikoras_'):
+    """All recorded metrics in the Prometheus text exposition format"""
+    with _lock:
+        histograms = {key: (list(h.counts), h.sum, h.count, h.buckets) for key, h in _histograms.items()}
+        requests_total = dict(_requests_total)
+
+    lines = [
+        f'# HELP {prefix}http_requests_total Requests handled, by route, method and status',
+        f'# TYPE {prefix}http_requests_total counter',
+    ]
+    for (endpoint, method, status), count in sorted(requests_total.items()):
+        lines.append(
+            f'{prefix}http_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",status="{status}"}} {count}'
+        )
+
+    for name, (help_text, _) in HISTOGRAMS.items():
+        metric = prefix + name
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} histogram')
+        for (metric_name, endpoint, method), (counts, total, count, buckets) in sorted(histograms.items()):
+            if metric_name != name:
+                continue
+            labels = f'endpoint="{_escape(endpoint)}",method="{method}"'
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{labels}}} {_format_value(total)}')
+            lines.append(f'{metric}_count{{{labels}}} {count}')
+    return '\n'.join(lines) + '\n'
+
+def reset_metrics():
+    with _lock:
+        _histograms.clear()
+        _requests_total.clear()
+
+def init_metrics(app):
+    """Record request and SQL metrics for app's requests"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
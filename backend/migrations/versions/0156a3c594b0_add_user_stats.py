@@ -0,0 +1,44 @@
+"""Add user_stats
+
+Revision ID: 0156a3c594b0
+Revises: fa4862e14c7a
+Create Date: 2026-10-16 09:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0156a3c594b0'
+down_revision = 'fa4862e14c7a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_cases', sa.Integer(), nullable=False),
+    sa.Column('open_cases', sa.Integer(), nullable=False),
+    sa.Column('assigned_cases', sa.Integer(), nullable=False),
+    sa.Column('in_progress_cases', sa.Integer(), nullable=False),
+    sa.Column('resolved_cases', sa.Integer(), nullable=False),
+    sa.Column('closed_cases', sa.Integer(), nullable=False),
+    sa.Column('total_transactions', sa.Integer(), nullable=False),
+    sa.Column('completed_transactions', sa.Integer(), nullable=False),
+    sa.Column('pending_transactions', sa.Integer(), nullable=False),
+    sa.Column('failed_transactions', sa.Integer(), nullable=False),
+    sa.Column('completed_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('pending_invoices', sa.Integer(), nullable=False),
+    sa.Column('pending_requests', sa.Integer(), nullable=False),
+    sa.Column('unread_notifications', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Populate the table afterwards with `flask rebuild-user-stats`
+
+
+def downgrade():
+    op.drop_table('user_stats')
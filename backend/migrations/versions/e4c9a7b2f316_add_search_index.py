@@ -0,0 +1,111 @@
+"""Add full-text search_index with sync triggers
+
+Revision ID: e4c9a7b2f316
+Revises: d7b3e5a1f804
+Create Date: 2026-10-17 09:41:22.604913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c9a7b2f316'
+down_revision = 'd7b3e5a1f804'
+branch_labels = None
+depends_on = None
+
+# Not a model: written by hand. search_index rowid = source id * 8 + code
+SOURCES = [
+    # (code, table, title, body, condition, columns that change the indexed text)
+    (1, 'cases', '{row}.title', '{row}.description', None, 'title, description'),
+    (2, 'chats', 'NULL', '{row}.message', None, 'message'),
+    (3, 'documents', '{row}.title', '{row}.description', None, 'title, description'),
+    (4, 'users', "{row}.first_name || ' ' || {row}.last_name",
+     "trim(coalesce({row}.bio, '') || ' ' || coalesce({row}.education, ''))",
+     "{row}.user_type = 'lawyer'", 'first_name, last_name, bio, education, user_type'),
+    (5, 'transactions', '{row}.transaction_number', '{row}.description', None, 'transaction_number, description'),
+]
+
+
+def _sqlite_upgrade():
+    op.execute("CREATE VIRTUAL TABLE search_index USING fts5(title, body, tokenize = 'porter unicode61')")
+    for code, table, title, body, condition, columns in SOURCES:
+        new_title, new_body = title.format(row='new'), body.format(row='new')
+        new_condition = (condition or '1 = 1').format(row='new')
+        op.execute(
+            f"CREATE TRIGGER search_index_{table}_insert AFTER INSERT ON {table} WHEN {new_condition} BEGIN "
+            f"INSERT INTO search_index (rowid, title, body) VALUES (new.id * 8 + {code}, {new_title}, {new_body}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER search_index_{table}_update AFTER UPDATE OF {columns} ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = old.id * 8 + {code}; "
+            f"INSERT INTO search_index (rowid, title, body) "
+            f"SELECT new.id * 8 + {code}, {new_title}, {new_body} WHERE {new_condition}; END"
+        )
+        op.execute(
+            f"CREATE TRIGGER search_index_{table}_delete AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = old.id * 8 + {code}; END"
+        )
+
+
+def _postgresql_upgrade():
+    op.execute(
+        "CREATE TABLE search_index ("
+        "rowid BIGINT PRIMARY KEY, title TEXT, body TEXT, "
+        "document tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED)"
+    )
+    op.execute("CREATE INDEX ix_search_index_document ON search_index USING GIN (document)")
+    for code, table, title, body, condition, columns in SOURCES:
+        op.execute(
+            f"CREATE FUNCTION search_index_{table}() RETURNS trigger AS $$\n"
+            f"BEGIN\n"
+            f"    IF TG_OP <> 'INSERT' THEN\n"
+            f"        DELETE FROM search_index WHERE rowid = OLD.id * 8 + {code};\n"
+            f"    END IF;\n"
+            f"    IF TG_OP <> 'DELETE' THEN\n"
+            f"        INSERT INTO search_index (rowid, title, body)\n"
+            f"        SELECT NEW.id * 8 + {code}, {title.format(row='NEW')}, {body.format(row='NEW')}\n"
+            f"        WHERE {(condition or 'TRUE').format(row='NEW')};\n"
+            f"    END IF;\n"
+            f"    RETURN NULL;\n"
+            f"END\n"
+            f"$$ LANGUAGE plpgsql"
+        )
+        op.execute(
+            f"CREATE TRIGGER search_index_{table} AFTER INSERT OR DELETE OR UPDATE OF {columns} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION search_index_{table}()"
+        )
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _sqlite_upgrade()
+    elif dialect == 'postgresql':
+        _postgresql_upgrade()
+    else:
+        return  # no full-text search on other databases
+
+    # Index the rows that already exist
+    for code, table, title, body, condition, columns in SOURCES:
+        where = f" WHERE {condition.format(row=table)}" if condition else ''
+        op.execute(
+            f"INSERT INTO search_index (rowid, title, body) "
+            f"SELECT {table}.id * 8 + {code}, {title.format(row=table)}, {body.format(row=table)} FROM {table}{where}"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for code, table, title, body, condition, columns in SOURCES:
+        if dialect == 'sqlite':
+            for action in ('insert', 'update', 'delete'):
+                op.execute(f"DROP TRIGGER IF EXISTS search_index_{table}_{action}")
+        elif dialect == 'postgresql':
+            op.execute(f"DROP TRIGGER IF EXISTS search_index_{table} ON {table}")
+            op.execute(f"DROP FUNCTION IF EXISTS search_index_{table}()")
+    if dialect in ('sqlite', 'postgresql'):
+        op.execute("DROP TABLE IF EXISTS search_index")
@@ -1,14 +1,21 @@
+import os
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime, date
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import MetaData, CheckConstraint
-import random
-import string
 
 metadata = MetaData()
 db = SQLAlchemy(metadata=metadata)
 
+# Lawyer <-> legal service specializations, kept in sync with User.specializations
+lawyer_specializations = db.Table(
+    'lawyer_specializations',
+    db.Column('lawyer_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    db.Column('legal_service_id', db.Integer, db.ForeignKey('legal_services.id'), primary_key=True),
+    db.Index('ix_lawyer_specializations_service_lawyer', 'legal_service_id', 'lawyer_id')
+)
+
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
     
@@ -65,6 +72,7 @@ class User(db.Model, UserMixin):
     invoices_as_client = db.relationship('Invoice', foreign_keys='Invoice.client_id', backref='client')
     invoices_as_lawyer = db.relationship('Invoice', foreign_keys='Invoice.lawyer_id', backref='lawyer')
     lawyer_requests = db.relationship('LawyerRequest', backref='lawyer')
+    specialized_services = db.relationship('LegalService', secondary=lawyer_specializations, backref='specialized_lawyers')
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -75,6 +83,20 @@ class User(db.Model, UserMixin):
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
     
+    def set_specializations(self, service_ids):
+        """Store specializations (service IDs or names) as the legacy string and as lawyer_specializations rows"""
+        self.specializations = ','.join(map(str, service_ids)) if service_ids else None
+        values = [str(value).strip() for value in service_ids or []]
+        ids = [int(value) for value in values if value.isdigit()]
+        names = [value.lower() for value in values if value and not value.isdigit()]
+        if not ids and not names:
+            self.specialized_services = []
+            return
+        # Older clients send service names instead of IDs
+        self.specialized_services = LegalService.query.filter(
+            LegalService.id.in_(ids) | db.func.lower(LegalService.name).in_(names)
+        ).all()
+    
     def __repr__(self):
         return f"<User {self.username} ({self.user_type})>"
 
@@ -130,6 +152,14 @@ class Case(db.Model):
             "status IN ('open', 'assigned', 'in_progress', 'resolved', 'closed')",
             name='valid_case_status'
         ),
+        db.Index('ix_cases_client_status_created', 'client_id', 'status', 'created_at'),
+        db.Index('ix_cases_lawyer_status_created', 'lawyer_id', 'status', 'created_at'),
+        db.Index('ix_cases_status_created', 'status', 'created_at'),
+        # Owner-only lists page on (created_at, id)
+        db.Index('ix_cases_client_created', 'client_id', 'created_at', 'id'),
+        db.Index('ix_cases_lawyer_created', 'lawyer_id', 'created_at', 'id'),
+        # Newest cases overall (admin chat activity)
+        db.Index('ix_cases_created', 'created_at', 'id'),
     )
     
     # Relationships
@@ -146,7 +176,8 @@ class Case(db.Model):
             self.case_number = self.generate_case_number()
     
     def generate_case_number(self):
-        return f"CASE-{datetime.utcnow().strftime('%Y%m%d')}-{''.join(random.choices(string.digits, k=4))}"
+        from numbering import next_number
+        return next_number('CASE')
     
     def __repr__(self):
         return f"<Case {self.case_number}: {self.title}>"
@@ -169,6 +200,8 @@ class LawyerRequest(db.Model):
             "status IN ('pending', 'accepted', 'rejected')",
             name='valid_lawyer_request_status'
         ),
+        db.Index('ix_lawyer_requests_lawyer_case', 'lawyer_id', 'case_id'),
+        db.Index('ix_lawyer_requests_case_created', 'case_id', 'created_at'),
     )
     
     def __repr__(self):
@@ -185,6 +218,12 @@ class Chat(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_chats_case_created', 'case_id', 'created_at'),
+        db.Index('ix_chats_case_id', 'case_id', 'id'),
+        db.Index('ix_chats_created', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f"<Chat from {self.sender.get_full_name()} in {self.case.case_number}>"
 
@@ -201,6 +240,22 @@ class Document(db.Model):
     is_confidential = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_documents_case_created', 'case_id', 'created_at'),
+    )
+    
+    @property
+    def file_name(self):
+        return os.path.basename(self.file_path)
+    
+    @property
+    def file_size(self):
+        """Size of the stored file in bytes, or None if it is missing"""
+        try:
+            return os.path.getsize(self.file_path)
+        except OSError:
+            return None
+    
     def __repr__(self):
         return f"<Document {self.title} - {self.case.case_number}>"
 
@@ -231,6 +286,11 @@ class Transaction(db.Model):
             "status IN ('pending', 'completed', 'failed')",
             name='valid_transaction_status'
         ),
+        db.Index('ix_transactions_client_status_created', 'client_id', 'status', 'created_at'),
+        db.Index('ix_transactions_lawyer_status_created', 'lawyer_id', 'status', 'created_at'),
+        db.Index('ix_transactions_case_created', 'case_id', 'created_at'),
+        db.Index('ix_transactions_client_created', 'client_id', 'created_at', 'id'),
+        db.Index('ix_transactions_lawyer_created', 'lawyer_id', 'created_at', 'id'),
     )
     
     def __init__(self, **kwargs):
@@ -239,7 +299,8 @@ class Transaction(db.Model):
             self.transaction_number = self.generate_transaction_number()
     
     def generate_transaction_number(self):
-        return f"TXN-{datetime.utcnow().strftime('%Y%m%d')}-{''.join(random.choices(string.digits, k=6))}"
+        from numbering import next_number
+        return next_number('TXN')
     
     def __repr__(self):
         return f"<Transaction {self.transaction_number}: {self.transaction_type} - ${self.amount}>"
@@ -268,6 +329,11 @@ class Invoice(db.Model):
             "status IN ('draft', 'sent', 'paid', 'overdue')",
             name='valid_invoice_status'
         ),
+        db.Index('ix_invoices_client_status', 'client_id', 'status'),
+        db.Index('ix_invoices_lawyer_status', 'lawyer_id', 'status'),
+        db.Index('ix_invoices_case_issue_date', 'case_id', 'issue_date'),
+        db.Index('ix_invoices_client_issue_date', 'client_id', 'issue_date', 'id'),
+        db.Index('ix_invoices_lawyer_issue_date', 'lawyer_id', 'issue_date', 'id'),
     )
     
     # Relationship
@@ -282,7 +348,8 @@ class Invoice(db.Model):
             self.total_amount = self.amount + (self.tax_amount or 0)
     
     def generate_invoice_number(self):
-        return f"INV-{datetime.utcnow().strftime('%Y%m%d')}-{''.join(random.choices(string.digits, k=4))}"
+        from numbering import next_number
+        return next_number('INV')
     
     def __repr__(self):
         return f"<Invoice {self.invoice_number}: ${self.total_amount}>"
@@ -299,6 +366,11 @@ class Notification(db.Model):
     related_case_id = db.Column(db.Integer, db.ForeignKey('cases.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_notifications_recipient_read_created', 'recipient_id', 'is_read', 'created_at'),
+        db.Index('ix_notifications_recipient_created', 'recipient_id', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f"<Notification for {self.recipient.get_full_name()}: {self.title}>"
 
@@ -325,4 +397,78 @@ class ActivityLog(db.Model):
     user = db.relationship('User', backref='activity_logs')
     
     def __repr__(self):
-        return f"<ActivityLog {self.user.get_full_name()} {self.action} at {self.created_at}>"
\ No newline at end of file
+        return f"<ActivityLog {self.user.get_full_name()} {self.action} at {self.created_at}>"
+
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+    
+    # Materialized per-user counters, kept in sync by user_stats.py session events
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_cases = db.Column(db.Integer, nullable=False, default=0)
+    open_cases = db.Column(db.Integer, nullable=False, default=0)
+    assigned_cases = db.Column(db.Integer, nullable=False, default=0)
+    in_progress_cases = db.Column(db.Integer, nullable=False, default=0)
+    resolved_cases = db.Column(db.Integer, nullable=False, default=0)
+    closed_cases = db.Column(db.Integer, nullable=False, default=0)
+    total_transactions = db.Column(db.Integer, nullable=False, default=0)
+    completed_transactions = db.Column(db.Integer, nullable=False, default=0)
+    pending_transactions = db.Column(db.Integer, nullable=False, default=0)
+    failed_transactions = db.Column(db.Integer, nullable=False, default=0)
+    completed_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)  # earnings for lawyers, spending for clients
+    pending_invoices = db.Column(db.Integer, nullable=False, default=0)  # invoices with status 'sent'
+    pending_requests = db.Column(db.Integer, nullable=False, default=0)
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<UserStats for user {self.user_id}>"
+
+class OutboundEmail(db.Model):
+    __tablename__ = 'outbound_emails'
+    
+    # Persisted mail queue, delivered by mail_queue.py workers
+    id = db.Column(db.Integer, primary_key=True)
+    recipients = db.Column(db.Text, nullable=False)  # comma-separated addresses
+    sender = db.Column(db.String(255))
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'sending', 'sent', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # retry time, or lease expiry while sending
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('pending', 'sending', 'sent', 'failed')",
+            name='valid_outbound_email_status'
+        ),
+        db.Index('ix_outbound_emails_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    def __repr__(self):
+        return f"<OutboundEmail {self.id} to {self.recipients}: {self.status}>"
+
+class Blob(db.Model):
+    __tablename__ = 'blobs'
+    
+    # Content-addressed upload storage, managed by blob_store.py
+    sha256 = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(255), nullable=False)  # sharded file path, referenced by Document.file_path / Chat.attachment
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Blob {self.sha256} ({self.ref_count} refs)>"
+
+class NumberSequence(db.Model):
+    __tablename__ = 'number_sequences'
+    
+    # Per-day counters behind case, invoice and transaction numbers, managed by numbering.py
+    name = db.Column(db.String(50), primary_key=True)  # '<prefix>:<YYYYMMDD>'
+    next_value = db.Column(db.BigInteger, nullable=False, default=1)
+    
+    def __repr__(self):
+        return f"<NumberSequence {self.name}: {self.next_value}>"
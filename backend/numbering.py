@@ -0,0 +1,86 @@
+"""Collision-free case, invoice and transaction numbers.
+
+Numbers look like ``CASE-20261016-000042``: a prefix, the UTC date and a
+zero-padded per-day counter kept in the ``number_sequences`` table (one row per
+prefix and day). They are unique by construction, so inserts never fail on the
+unique constraint and need no retry, and because the counter only grows they
+sort by allocation order and append to the end of their unique index.
+
+On PostgreSQL and other server databases each process reserves
+``NUMBER_BLOCK_SIZE`` values at a time in a short transaction of its own and
+hands them out from memory, so concurrent requests do not queue on the counter
+row. Numbers from different processes interleave block by block, and a block
+that a process did not use up before exiting leaves a gap.
+
+SQLite has a single writer anyway, so there the counter is bumped one value at
+a time inside the caller's transaction: nothing is reserved unless the row
+that carries the number commits.
+"""
+import os
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, update, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, NumberSequence
+
+# prefix -> digits of the daily counter (older random numbers used 4 and 6 digits, so these can never collide with them)
+NUMBER_FORMATS = {
+    'CASE': 6,
+    'CHAT': 6,
+    'INV': 6,
+    'TXN': 8,
+}
+
+sequence_table = NumberSequence.__table__
+
+_blocks = {}  # sequence name -> [next value, end of block (exclusive), owning pid]
+_blocks_lock = threading.Lock()
+
+def _reserve(connection, name, count):
+    """Advance sequence name by count and return the first reserved value"""
+    upsert = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}.get(connection.dialect.name)
+    if upsert is not None:
+        connection.execute(
+            upsert(sequence_table).values(name=name, next_value=1 + count).on_conflict_do_update(
+                index_elements=[sequence_table.c.name],
+                set_={'next_value': sequence_table.c.next_value + count}
+            )
+        )
+    else:
+        result = connection.execute(
+            update(sequence_table).where(sequence_table.c.name == name)
+            .values(next_value=sequence_table.c.next_value + count)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(sequence_table).values(name=name, next_value=1 + count))
+
+    next_value = connection.execute(
+        select(sequence_table.c.next_value).where(sequence_table.c.name == name)
+    ).scalar_one()
+    return next_value - count
+
+def _allocate(prefix, day):
+    name = f'{prefix}:{day}'
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return _reserve(db.session.connection(), name, 1)
+
+    block_size = max(1, current_app.config.get('NUMBER_BLOCK_SIZE', 20))
+    with _blocks_lock:
+        block = _blocks.get(name)
+        # A forked worker must not reuse the block its parent was handing out
+        if block is None or block[0] >= block[1] or block[2] != os.getpid():
+            with db.engine.begin() as connection:
+                start = _reserve(connection, name, block_size)
+            for key in [key for key in _blocks if key.startswith(f'{prefix}:') and key != name]:
+                del _blocks[key]  # an earlier day's leftovers
+            block = _blocks[name] = [start, start + block_size, os.getpid()]
+        value = block[0]
+        block[0] += 1
+        return value
+
+def next_number(prefix):
+    """Allocate the next number for prefix ('CASE', 'CHAT', 'INV' or 'TXN')"""
+    day = datetime.utcnow().strftime('%Y%m%d')
+    value = _allocate(prefix, day)
+    return f'{prefix}-{day}-{value:0{NUMBER_FORMATS[prefix]}d}'
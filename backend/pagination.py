@@ -0,0 +1,125 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered newest first on ``(sort_column, id)`` — ``created_at`` for most
+tables — and each page continues from an opaque cursor encoding the last row's
+key, so deep pages cost the same as the first one instead of scanning and
+discarding ``OFFSET`` rows.
+
+List endpoints keep returning a JSON array and advertise the following page in
+the ``X-Next-Cursor`` and ``Link`` response headers; pass it back as ``?cursor=``.
+Every response is capped at ``?limit=`` rows (``PAGINATION_DEFAULT_PAGE_SIZE``
+when absent); clients that need the whole list follow the cursor.
+"""
+import base64
+import binascii
+import json
+from urllib.parse import urlencode
+from collections import namedtuple
+from datetime import date, datetime
+from flask import current_app, request, jsonify
+from sqlalchemy import or_, and_
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded"""
+
+def encode_cursor(sort_value, row_id):
+    """Opaque token for the position just after (sort_value, row_id)"""
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(token, sort_column):
+    """Return the (sort_value, row_id) encoded in token, typed for sort_column"""
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        sort_value, row_id = json.loads(payload)
+        python_type = sort_column.type.python_type
+        if python_type in (datetime, date):
+            sort_value = python_type.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor('Invalid cursor')
+
+def get_page_size(default=None):
+    """Page size from ?limit=, clamped to PAGINATION_MAX_PAGE_SIZE"""
+    max_size = current_app.config.get('PAGINATION_MAX_PAGE_SIZE', 200)
+    default = default or current_app.config.get('PAGINATION_DEFAULT_PAGE_SIZE', 50)
+    size = request.args.get('limit', default, type=int)
+    return max(1, min(size, max_size))
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, limit=None):
+    """Fetch one page of query, newest first, starting after cursor.
+
+    ``cursor`` and ``limit`` default to the ``cursor`` and ``limit`` request arguments.
+    Raises InvalidCursor for a malformed token.
+    """
+    if cursor is None:
+        cursor = request.args.get('cursor')
+    if limit is None:
+        limit = get_page_size()
+
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_column)
+        query = query.filter(or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, id_column < row_id)
+        ))
+
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return Page(rows, next_cursor)
+
+class CursorPagination:
+    """Keyset page exposing the attributes of a Flask-SQLAlchemy Pagination"""
+
+    def __init__(self, page, per_page, cursor):
+        self.items = page.items
+        self.next_cursor = page.next_cursor
+        self.per_page = per_page
+        self.has_prev = bool(cursor)
+        self.has_next = page.next_cursor is not None
+        # Page numbers and totals are unknown without counting/skipping rows
+        self.page = self.pages = self.total = None
+        self.prev_num = self.next_num = None
+
+def paginate_query(query, sort_column, id_column, page, per_page):
+    """Admin list pagination: keyset when ?cursor= is given, numbered pages otherwise.
+
+    Either way the result carries ``next_cursor`` so clients can switch to cursors
+    for deep pages. Raises InvalidCursor for a malformed token.
+    """
+    per_page = max(1, min(per_page, current_app.config.get('PAGINATION_MAX_PAGE_SIZE', 200)))
+    cursor = request.args.get('cursor')
+    if cursor:
+        return CursorPagination(keyset_paginate(query, sort_column, id_column, cursor, per_page), per_page, cursor)
+
+    pagination = query.order_by(sort_column.desc(), id_column.desc()).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+    pagination.next_cursor = None
+    if pagination.has_next and pagination.items:
+        last = pagination.items[-1]
+        pagination.next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return pagination
+
+def paginated_response(data, page, status=200):
+    """jsonify a list page, advertising the next cursor in the response headers"""
+    response = jsonify(data)
+    response.status_code = status
+    if page.next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = page.next_cursor
+        response.headers['X-Next-Cursor'] = page.next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
+
+def invalid_cursor_response():
+    return jsonify({'error': 'Invalid cursor'}), 400
@@ -0,0 +1,62 @@
+"""Query builders that eager-load the relationships list serializers read.
+
+Serializers touch e.g. ``case.client`` / ``case.lawyer`` / ``case.legal_service``
+for every row; loading those lazily costs one SELECT per row and relationship.
+Each builder returns ``Model.query`` with loader options for the named
+relationships (all of the model's defaults when none are given). Many-to-one
+relationships are joined into the main SELECT, collections use a single
+``SELECT ... IN`` per relationship, and dotted names such as ``'case.client'``
+load nested relationships.
+"""
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import joinedload, selectinload
+from models import Case, Document, Chat, Transaction, Invoice, lawyer_specializations
+
+CASE_RELATIONSHIPS = ('client', 'lawyer', 'legal_service')
+DOCUMENT_RELATIONSHIPS = ('case', 'uploaded_by')
+CHAT_RELATIONSHIPS = ('sender',)
+TRANSACTION_RELATIONSHIPS = ('case', 'client', 'lawyer')
+INVOICE_RELATIONSHIPS = ('case', 'client', 'lawyer')
+
+def _loader(model, path):
+    loader = None
+    for name in path.split('.'):
+        relationship = inspect(model).relationships[name]
+        attribute = relationship.class_attribute
+        if relationship.uselist:
+            loader = loader.selectinload(attribute) if loader else selectinload(attribute)
+        else:
+            loader = loader.joinedload(attribute) if loader else joinedload(attribute)
+        model = relationship.mapper.class_
+    return loader
+
+def eager_query(model, relationships):
+    """model.query with every relationship path in relationships eager-loaded"""
+    return model.query.options(*[_loader(model, path) for path in relationships])
+
+def case_query(*relationships):
+    return eager_query(Case, relationships or CASE_RELATIONSHIPS)
+
+def document_query(*relationships):
+    return eager_query(Document, relationships or DOCUMENT_RELATIONSHIPS)
+
+def chat_query(*relationships):
+    return eager_query(Chat, relationships or CHAT_RELATIONSHIPS)
+
+def transaction_query(*relationships):
+    return eager_query(Transaction, relationships or TRANSACTION_RELATIONSHIPS)
+
+def invoice_query(*relationships):
+    return eager_query(Invoice, relationships or INVOICE_RELATIONSHIPS)
+
+def cases_matching_specializations(lawyer_id, query=None):
+    """Restrict a Case query (Case.query by default) to the legal services lawyer_id specializes in.
+
+    Uses an IN over the lawyer_specializations primary key rather than a join so that
+    later ``filter_by`` calls still apply to Case.
+    """
+    query = query if query is not None else Case.query
+    service_ids = select(lawyer_specializations.c.legal_service_id).where(
+        lawyer_specializations.c.lawyer_id == lawyer_id
+    )
+    return query.filter(Case.legal_service_id.in_(service_ids))
@@ -0,0 +1,48 @@
+"""Set-based read-state updates for notifications and chat messages.
+
+Marking rows read one ORM object at a time costs a SELECT of every unread row
+plus one UPDATE each. These helpers issue a single
+``UPDATE ... WHERE <owner> = ? AND is_read = 0`` instead and return the number
+of rows changed. Bulk UPDATEs bypass the flush events in ``user_stats``, so the
+notification helper adjusts ``unread_notifications`` itself in the same
+transaction. Callers commit.
+"""
+from sqlalchemy import update
+from models import db, Notification, Chat
+from user_stats import apply_user_stats_deltas, record_unread_counts
+
+def mark_notifications_read(user_id, notification_ids=None, until=None):
+    """Mark user_id's unread notifications read, returning the affected count.
+
+    With no arguments every unread notification is marked. ``notification_ids``
+    restricts the update to those ids, ``until`` to notifications created at or
+    before that datetime.
+    """
+    statement = update(Notification).where(
+        Notification.recipient_id == user_id,
+        Notification.is_read == False
+    )
+    if notification_ids is not None:
+        if not notification_ids:
+            return 0
+        statement = statement.where(Notification.id.in_(notification_ids))
+    if until is not None:
+        statement = statement.where(Notification.created_at <= until)
+
+    result = db.session.execute(statement.values(is_read=True))
+    if result.rowcount:
+        apply_user_stats_deltas(db.session.connection(), {user_id: {'unread_notifications': -result.rowcount}})
+        record_unread_counts(db.session, [user_id])
+    return result.rowcount
+
+def mark_chats_read(case_id, reader_id, until=None):
+    """Mark messages in case_id that reader_id did not send as read, returning the affected count"""
+    statement = update(Chat).where(
+        Chat.case_id == case_id,
+        Chat.sender_id != reader_id,
+        Chat.is_read == False
+    )
+    if until is not None:
+        statement = statement.where(Chat.created_at <= until)
+
+    return db.session.execute(statement.values(is_read=True)).rowcount
@@ -0,0 +1,164 @@
+"""Socket.IO rooms and server-side fan-out.
+
+Sockets authenticate on connect with the same JWT access token as the REST API
+(``auth: {token}`` from socket.io-client, ``?token=`` or an ``Authorization``
+header) and join a ``user_<id>`` room for per-user pushes such as
+notifications. ``join_case`` / ``leave_case`` subscribe a socket to a
+``case_<id>`` room once the user is known to be the case's client, its lawyer
+or an admin; chat messages and typing events only go to those rooms.
+
+Whenever a committed transaction changes a user's unread notification counter
+(``user_stats.unread_notifications``), the new value is pushed to that user's
+room as an ``unread_count`` event, so clients need not poll
+``/notification/unread-count``.
+
+With several server processes, set ``SOCKETIO_MESSAGE_QUEUE`` (e.g.
+``redis://localhost:6379/0``) so an event emitted by any process reaches the
+sockets connected to the others. Without it events stay in-process.
+"""
+import threading
+from flask import current_app, request
+from flask_jwt_extended import decode_token
+from flask_socketio import emit, join_room, leave_room, rooms
+from sqlalchemy import event
+from models import db, Case
+from decorators import load_identity
+from token_revocation import revocation_store
+
+# socket id -> authenticated user id, for the sockets connected to this process
+_socket_users = {}
+_socket_users_lock = threading.Lock()
+
+def case_room(case_id):
+    return f'case_{case_id}'
+
+def user_room(user_id):
+    return f'user_{user_id}'
+
+def emit_to_case(case_id, event, data):
+    """Send event to every socket that joined case_id"""
+    socketio = current_app.extensions.get('socketio')
+    if socketio:
+        socketio.emit(event, data, to=case_room(case_id))
+
+def emit_to_user(user_id, event, data):
+    """Send event to every socket user_id has open"""
+    socketio = current_app.extensions.get('socketio')
+    if socketio:
+        socketio.emit(event, data, to=user_room(user_id))
+
+def can_access_case(user_id, case_id):
+    """True if user_id is an admin or the case's client or lawyer"""
+    identity = load_identity(user_id)
+    if not identity:
+        return False
+    if identity.user_type == 'admin':
+        return db.session.query(Case.id).filter(Case.id == case_id).first() is not None
+
+    participants = db.session.query(Case.client_id, Case.lawyer_id).filter(Case.id == case_id).first()
+    return participants is not None and identity.id in participants
+
+def _token_from_request(auth):
+    if isinstance(auth, dict) and auth.get('token'):
+        return auth['token']
+    if request.args.get('token'):
+        return request.args['token']
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[len('Bearer '):]
+    return None
+
+def _current_socket_user():
+    with _socket_users_lock:
+        return _socket_users.get(request.sid)
+
+def _case_id_from(data):
+    """case_id from {'case_id': 5} or the legacy {'room': 'case_5'} payload"""
+    data = data or {}
+    case_id = data.get('case_id')
+    if case_id is None and str(data.get('room', '')).startswith('case_'):
+        case_id = data['room'][len('case_'):]
+    try:
+        return int(case_id)
+    except (TypeError, ValueError):
+        return None
+
+def handle_connect(auth=None):
+    token = _token_from_request(auth)
+    if not token:
+        raise ConnectionRefusedError('Authentication required')
+
+    try:
+        claims = decode_token(token)
+    except Exception:
+        raise ConnectionRefusedError('Invalid token')
+    # Long-lived refresh tokens only mint access tokens; they never open a session
+    if claims.get('type') != 'access':
+        raise ConnectionRefusedError('Access token required')
+    if revocation_store.is_revoked(claims['jti']):
+        raise ConnectionRefusedError('Token has been revoked')
+
+    identity = load_identity(claims['sub'])
+    if not identity or not identity.is_active:
+        raise ConnectionRefusedError('Account is not active')
+
+    with _socket_users_lock:
+        _socket_users[request.sid] = identity.id
+    join_room(user_room(identity.id))
+
+def handle_disconnect(reason=None):
+    with _socket_users_lock:
+        _socket_users.pop(request.sid, None)
+
+def handle_join_case(data):
+    user_id = _current_socket_user()
+    case_id = _case_id_from(data)
+    if user_id is None:
+        return {'error': 'Authentication required'}
+    if case_id is None:
+        return {'error': 'case_id is required'}
+    if not can_access_case(user_id, case_id):
+        return {'error': 'Access denied'}
+
+    join_room(case_room(case_id))
+    return {'success': True, 'room': case_room(case_id)}
+
+def handle_leave_case(data):
+    case_id = _case_id_from(data)
+    if case_id is None:
+        return {'error': 'case_id is required'}
+
+    leave_room(case_room(case_id))
+    return {'success': True}
+
+def handle_typing(data):
+    user_id = _current_socket_user()
+    case_id = _case_id_from(data)
+    # Only relay typing events for cases this socket has joined
+    if user_id is None or case_id is None or case_room(case_id) not in rooms():
+        return
+
+    emit('typing', {
+        'room': case_room(case_id),
+        'case_id': case_id,
+        'user': (data or {}).get('user'),
+        'user_id': user_id
+    }, to=case_room(case_id), include_self=False)
+
+def register_socket_handlers(socketio):
+    socketio.on_event('connect', handle_connect)
+    socketio.on_event('disconnect', handle_disconnect)
+    socketio.on_event('join_case', handle_join_case)
+    socketio.on_event('join', handle_join_case)  # older clients
+    socketio.on_event('leave_case', handle_leave_case)
+    socketio.on_event('typing', handle_typing)
+
+def _push_unread_counts(session):
+    for user_id, count in session.info.pop('unread_counts', {}).items():
+        emit_to_user(user_id, 'unread_count', {'count': count})
+
+def _discard_unread_counts(session, previous_transaction):
+    session.info.pop('unread_counts', None)
+
+event.listen(db.session, 'after_commit', _push_unread_counts)
+event.listen(db.session, 'after_soft_rollback', _discard_unread_counts)
@@ -0,0 +1,242 @@
+"""Ranked full-text search over cases, chat messages, documents, lawyer profiles and transactions.
+
+Everything searchable is copied into one ``search_index`` table: an FTS5
+virtual table on SQLite, a table with a weighted ``tsvector`` column and a GIN
+index on PostgreSQL. Database triggers on the source tables keep it in sync on
+every insert, update and delete, including bulk Core inserts that bypass the
+ORM. Each entry's ``rowid`` encodes what it points at (``id * 8 + kind code``),
+so triggers find an entry by primary key.
+
+``db.create_all()`` creates the index and its triggers; existing databases get
+them from the migration, and ``flask rebuild-search-index`` re-reads every
+source row. Other databases have no search.
+"""
+import re
+from collections import namedtuple
+from sqlalchemy import BigInteger, Column, MetaData, Table, Text, and_, case, event, func, literal_column, or_, select, text
+from models import db, Case, Chat, Document, Transaction, User
+from pagination import Page, decode_cursor, encode_cursor
+
+# title/body are SQL expressions over {row}; condition limits which rows are indexed
+SearchSource = namedtuple('SearchSource', ['code', 'table', 'title', 'body', 'condition', 'columns'])
+
+SEARCH_SOURCES = {
+    'case': SearchSource(1, 'cases', '{row}.title', '{row}.description', None, ('title', 'description')),
+    'chat': SearchSource(2, 'chats', 'NULL', '{row}.message', None, ('message',)),
+    'document': SearchSource(3, 'documents', '{row}.title', '{row}.description', None, ('title', 'description')),
+    'lawyer': SearchSource(
+        4, 'users', "{row}.first_name || ' ' || {row}.last_name",
+        "trim(coalesce({row}.bio, '') || ' ' || coalesce({row}.education, ''))",
+        "{row}.user_type = 'lawyer'", ('first_name', 'last_name', 'bio', 'education', 'user_type')
+    ),
+    'transaction': SearchSource(
+        5, 'transactions', '{row}.transaction_number', '{row}.description', None, ('transaction_number', 'description')
+    ),
+}
+KIND_SLOTS = 8
+SEARCH_DIALECTS = ('sqlite', 'postgresql')
+SNIPPET_MARKERS = ('**', '**')
+
+# Only used to build queries; the DDL below is dialect-specific
+search_index = Table(
+    'search_index', MetaData(),
+    Column('rowid', BigInteger, primary_key=True),
+    Column('title', Text),
+    Column('body', Text),
+)
+
+def _values(source, row):
+    return f"{row}.id * {KIND_SLOTS} + {source.code}", source.title.format(row=row), source.body.format(row=row)
+
+def _sqlite_ddl():
+    statements = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(title, body, tokenize = 'porter unicode61')"
+    ]
+    for source in SEARCH_SOURCES.values():
+        rowid, title, body = _values(source, 'new')
+        condition = (source.condition or '1 = 1').format(row='new')
+        old_rowid = _values(source, 'old')[0]
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS search_index_{source.table}_insert AFTER INSERT ON {source.table} "
+            f"WHEN {condition} BEGIN "
+            f"INSERT INTO search_index (rowid, title, body) VALUES ({rowid}, {title}, {body}); END",
+            f"CREATE TRIGGER IF NOT EXISTS search_index_{source.table}_update "
+            f"AFTER UPDATE OF {', '.join(source.columns)} ON {source.table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {old_rowid}; "
+            f"INSERT INTO search_index (rowid, title, body) SELECT {rowid}, {title}, {body} WHERE {condition}; END",
+            f"CREATE TRIGGER IF NOT EXISTS search_index_{source.table}_delete AFTER DELETE ON {source.table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {old_rowid}; END",
+        ]
+    return statements
+
+def _postgresql_ddl():
+    statements = [
+        "CREATE TABLE IF NOT EXISTS search_index ("
+        "rowid BIGINT PRIMARY KEY, title TEXT, body TEXT, "
+        "document tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED)",
+        "CREATE INDEX IF NOT EXISTS ix_search_index_document ON search_index USING GIN (document)",
+    ]
+    for source in SEARCH_SOURCES.values():
+        rowid, title, body = _values(source, 'NEW')
+        condition = (source.condition or 'TRUE').format(row='NEW')
+        statements += [
+            f"CREATE OR REPLACE FUNCTION search_index_{source.table}() RETURNS trigger AS $$\n"
+            f"BEGIN\n"
+            f"    IF TG_OP <> 'INSERT' THEN\n"
+            f"        DELETE FROM search_index WHERE rowid = {_values(source, 'OLD')[0]};\n"
+            f"    END IF;\n"
+            f"    IF TG_OP <> 'DELETE' THEN\n"
+            f"        INSERT INTO search_index (rowid, title, body) SELECT {rowid}, {title}, {body} WHERE {condition};\n"
+            f"    END IF;\n"
+            f"    RETURN NULL;\n"
+            f"END\n"
+            f"$$ LANGUAGE plpgsql",
+            f"DROP TRIGGER IF EXISTS search_index_{source.table} ON {source.table}",
+            f"CREATE TRIGGER search_index_{source.table} "
+            f"AFTER INSERT OR DELETE OR UPDATE OF {', '.join(source.columns)} ON {source.table} "
+            f"FOR EACH ROW EXECUTE FUNCTION search_index_{source.table}()",
+        ]
+    return statements
+
+def search_available(connection=None):
+    bind = connection if connection is not None else db.session.get_bind()
+    return bind.dialect.name in SEARCH_DIALECTS
+
+def create_search_index(connection):
+    """Create search_index and its triggers if they are missing"""
+    if not search_available(connection):
+        return
+    statements = _sqlite_ddl() if connection.dialect.name == 'sqlite' else _postgresql_ddl()
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+def rebuild_search_index():
+    """Re-read every source row into search_index; returns the number of entries"""
+    connection = db.session.connection()
+    create_search_index(connection)
+    connection.execute(text('DELETE FROM search_index'))
+    for source in SEARCH_SOURCES.values():
+        rowid, title, body = _values(source, source.table)
+        where = f' WHERE {source.condition.format(row=source.table)}' if source.condition else ''
+        connection.execute(text(
+            f'INSERT INTO search_index (rowid, title, body) SELECT {rowid}, {title}, {body} FROM {source.table}{where}'
+        ))
+    count = connection.execute(select(func.count()).select_from(search_index)).scalar()
+    db.session.commit()
+    return count
+
+def exclude_search_index(obj, name, type_, reflected, compare_to):
+    """Alembic include_object hook: search_index (and FTS5's shadow tables) are not in the models"""
+    return not (type_ == 'table' and reflected and compare_to is None and name.startswith('search_index'))
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_with_tables(target, connection, **kw):
+    create_search_index(connection)
+
+def _fts5_query(terms):
+    """FTS5 query matching every word of terms, the last one as a prefix (as-you-type)"""
+    words = re.findall(r'\w+', terms)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words[:-1]) + f' "{words[-1]}"*'
+
+def _match(dialect, terms):
+    """(WHERE clause, relevance expression, snippet expression); lower relevance ranks first"""
+    start, stop = SNIPPET_MARKERS
+    if dialect == 'sqlite':
+        query = _fts5_query(terms)
+        if query is None:
+            return None
+        table = literal_column('search_index')
+        return (
+            table.op('MATCH')(query),
+            func.bm25(table, 10.0, 1.0),  # title matches weigh more than body matches
+            func.snippet(table, -1, start, stop, '…', 12),
+        )
+
+    query = func.websearch_to_tsquery('english', terms)
+    document = literal_column('search_index.document')
+    return (
+        document.op('@@')(query),
+        -func.ts_rank(document, query),
+        func.ts_headline('english', func.coalesce(search_index.c.body, search_index.c.title), query,
+                         f'StartSel={start}, StopSel={stop}, MaxWords=20, MinWords=5'),
+    )
+
+def search(identity, terms, kinds=None, cursor=None, limit=20):
+    """One page of entries matching terms that identity may see, best match first.
+
+    ``kinds`` restricts results to some of SEARCH_SOURCES. Returns a Page of dicts;
+    raises InvalidCursor for a malformed cursor.
+    """
+    match = _match(db.session.get_bind().dialect.name, terms)
+    if match is None:
+        return Page([], None)
+    condition, relevance, snippet = match
+
+    kind = search_index.c.rowid % KIND_SLOTS
+    ref_id = search_index.c.rowid // KIND_SLOTS
+    codes = {source.code: name for name, source in SEARCH_SOURCES.items()}
+    case_id = case(
+        (kind == SEARCH_SOURCES['case'].code, ref_id),
+        (kind == SEARCH_SOURCES['chat'].code, Chat.case_id),
+        (kind == SEARCH_SOURCES['document'].code, Document.case_id),
+        (kind == SEARCH_SOURCES['transaction'].code, Transaction.case_id),
+    )
+
+    statement = (
+        select(
+            search_index.c.rowid, kind.label('kind'), ref_id.label('ref_id'), case_id.label('case_id'),
+            func.coalesce(search_index.c.title, Case.title).label('title'),
+            snippet.label('snippet'), relevance.label('relevance')
+        )
+        .select_from(
+            search_index
+            .outerjoin(Chat, and_(kind == SEARCH_SOURCES['chat'].code, Chat.id == ref_id))
+            .outerjoin(Document, and_(kind == SEARCH_SOURCES['document'].code, Document.id == ref_id))
+            .outerjoin(Transaction, and_(kind == SEARCH_SOURCES['transaction'].code, Transaction.id == ref_id))
+            .outerjoin(Case, Case.id == case_id)
+            .outerjoin(User, and_(kind == SEARCH_SOURCES['lawyer'].code, User.id == ref_id))
+        )
+        .where(condition)
+    )
+
+    if kinds:
+        statement = statement.where(kind.in_([SEARCH_SOURCES[name].code for name in kinds]))
+
+    if identity.user_type != 'admin':
+        case_kinds = [SEARCH_SOURCES[name].code for name in ('case', 'chat', 'document')]
+        statement = statement.where(or_(
+            and_(kind.in_(case_kinds), or_(Case.client_id == identity.id, Case.lawyer_id == identity.id)),
+            and_(kind == SEARCH_SOURCES['transaction'].code,
+                 or_(Transaction.client_id == identity.id, Transaction.lawyer_id == identity.id)),
+            and_(kind == SEARCH_SOURCES['lawyer'].code,
+                 User.approval_status == 'approved', User.is_active.is_(True)),
+        ))
+
+    if cursor:
+        last_relevance, last_rowid = decode_cursor(cursor, literal_column('relevance', db.Float))
+        statement = statement.where(or_(
+            relevance > last_relevance,
+            and_(relevance == last_relevance, search_index.c.rowid > last_rowid)
+        ))
+
+    rows = db.session.execute(
+        statement.order_by(relevance, search_index.c.rowid).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].relevance, rows[-1].rowid)
+
+    return Page([{
+        'type': codes[row.kind],
+        'id': row.ref_id,
+        'case_id': row.case_id,
+        'title': row.title,
+        'snippet': row.snippet,
+        'score': round(-row.relevance, 6),
+    } for row in rows], next_cursor)
@@ -0,0 +1,278 @@
+"""Synthetic data for benchmarks and scale testing.
+
+``generate_dataset`` bulk-inserts admins, clients, lawyers, cases, lawyer
+requests, chats, documents, notifications, invoices and transactions with Core
+``INSERT``s in batches, bypassing the ORM unit of work, then rebuilds
+``user_stats``. Status mixes follow ``*_WEIGHTS`` and every foreign key points
+at a row of the right kind (e.g. only approved lawyers take cases).
+Generation is deterministic for a given seed, rows get ids after the current
+maximum so an existing database is extended rather than overwritten, and the
+numbers given to cases, invoices and transactions (``CASE-SYN-…``) cannot
+collide with the ones the application generates.
+
+Every generated account uses the password ``SYNTHETIC_PASSWORD``. Generated
+documents point at ``uploads/synthetic/`` paths that have no file behind them.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import func, insert, select, text
+from werkzeug.security import generate_password_hash
+from models import (db, User, LegalService, Case, LawyerRequest, Chat, Document, Notification, Invoice,
+                    Transaction, lawyer_specializations)
+from user_stats import rebuild_all_user_stats
+
+SYNTHETIC_PASSWORD = 'synthetic-password'
+
+# Named dataset sizes; the *_per_case entries are averages
+PER_CASE = dict(chats_per_case=6, documents_per_case=1, requests_per_case=1.5, notifications_per_case=2)
+SCALES = {
+    'small': dict(PER_CASE, admins=1, lawyers=50, clients=500, cases=2000),
+    'medium': dict(PER_CASE, admins=1, lawyers=500, clients=10000, cases=25000),
+    'large': dict(PER_CASE, admins=2, lawyers=5000, clients=100000, cases=250000),
+}
+
+CASE_STATUS_WEIGHTS = {'open': 20, 'assigned': 15, 'in_progress': 30, 'resolved': 20, 'closed': 15}
+CASE_PRIORITY_WEIGHTS = {'low': 20, 'medium': 50, 'high': 20, 'urgent': 10}
+APPROVAL_STATUS_WEIGHTS = {'approved': 85, 'pending': 10, 'rejected': 5}
+# Status of an unpaid invoice (cases still being worked on)
+OPEN_INVOICE_STATUS_WEIGHTS = {'draft': 25, 'sent': 50, 'overdue': 25}
+# Outcome of a payment attempt on a sent or overdue invoice
+PAYMENT_ATTEMPT_WEIGHTS = {None: 70, 'pending': 15, 'failed': 15}
+DOCUMENT_TYPES = ['contract', 'evidence', 'legal_document', 'correspondence', 'identification']
+
+DEFAULT_SERVICES = ['Corporate Law', 'Family Law', 'Criminal Defense', 'Personal Injury',
+                    'Real Estate Law', 'Employment Law', 'Immigration Law', 'Intellectual Property']
+
+FIRST_NAMES = ['Amina', 'Brian', 'Carol', 'David', 'Esther', 'Felix', 'Grace', 'Hassan', 'Irene', 'James',
+               'Kevin', 'Lucy', 'Mercy', 'Nathan', 'Olive', 'Peter', 'Ruth', 'Samuel', 'Tabitha', 'Victor']
+LAST_NAMES = ['Achieng', 'Barasa', 'Chege', 'Kamau', 'Kariuki', 'Mwangi', 'Njoroge', 'Ochieng', 'Otieno', 'Wanjiku']
+SUBJECTS = ['contract dispute', 'tenancy agreement', 'land title transfer', 'employment termination',
+            'child custody', 'company registration', 'insurance claim', 'trademark registration',
+            'traffic offence', 'debt recovery', 'divorce settlement', 'work permit application']
+MESSAGES = ['Please find the documents attached.', 'When is the next hearing?', 'I have reviewed the draft.',
+            'Can we schedule a call this week?', 'The other party has responded.', 'Thank you for the update.',
+            'I need a copy of the agreement.', 'The filing deadline is next Friday.']
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+def _count(rng, average):
+    """Random row count with the given average (uniform over 0..2*average)"""
+    return rng.randint(0, round(2 * average))
+
+def _next_id(connection, model):
+    return (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+class _BatchInserter:
+    """Buffers rows per table and inserts them batch_size at a time"""
+
+    def __init__(self, connection, batch_size):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.pending = {}
+        self.counts = {}
+
+    def add(self, table, row):
+        rows = self.pending.setdefault(table, [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self.flush()
+
+    def total(self):
+        return sum(self.counts.values()) + sum(len(rows) for rows in self.pending.values())
+
+    def flush(self):
+        # Parents before children, so foreign keys hold whatever the database checks
+        for table in db.metadata.sorted_tables:
+            rows = self.pending.get(table)
+            if rows:
+                self.connection.execute(insert(table), rows)
+                self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+                self.pending[table] = []
+
+def _sync_sequences(connection, tables):
+    """Move PostgreSQL id sequences past explicitly inserted ids"""
+    if connection.dialect.name != 'postgresql':
+        return
+    for table in tables:
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), (SELECT max(id) FROM {table.name}))"
+        ))
+
+def _ensure_services(connection):
+    service_ids = list(connection.execute(select(LegalService.id).where(LegalService.is_active.is_(True))).scalars())
+    if service_ids:
+        return service_ids
+    connection.execute(insert(LegalService.__table__), [
+        dict(name=name, description=f'{name} services', is_active=True, created_at=datetime.utcnow())
+        for name in DEFAULT_SERVICES
+    ])
+    return list(connection.execute(select(LegalService.id)).scalars())
+
+def generate_dataset(scale='small', seed=42, batch_size=5000, days=365, progress=None, **sizes):
+    """Insert a synthetic dataset of the named scale (sizes override its entries).
+
+    Returns a dict of table name -> rows inserted. ``progress`` is called with a
+    message after each stage.
+    """
+    sizes = dict(SCALES[scale], **sizes)
+    rng = random.Random(seed)
+    report = progress or (lambda message: None)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    connection = db.session.connection()
+    inserter = _BatchInserter(connection, batch_size)
+    service_ids = _ensure_services(connection)
+    password_hash = generate_password_hash(SYNTHETIC_PASSWORD)  # hashing per user would dominate the run
+
+    def created_at(after=None):
+        earliest = after or now - timedelta(days=days)
+        return earliest + (now - earliest) * rng.random()
+
+    # Users
+    user_id = _next_id(connection, User)
+    lawyer_ids, client_ids = [], []
+    for user_type, count in (('admin', sizes['admins']), ('lawyer', sizes['lawyers']), ('client', sizes['clients'])):
+        for _ in range(count):
+            approval_status = _weighted(rng, APPROVAL_STATUS_WEIGHTS) if user_type == 'lawyer' else 'approved'
+            specializations = rng.sample(service_ids, min(len(service_ids), rng.randint(1, 3)))
+            row = dict(
+                id=user_id, username=f'syn_{user_type}_{user_id}', email=f'syn_{user_type}_{user_id}@example.com',
+                password_hash=password_hash, first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                user_type=user_type, phone=f'+2547{rng.randint(10000000, 99999999)}', is_active=True,
+                approval_status=approval_status, created_at=created_at(),
+                years_of_experience=None, education=None, hourly_rate=None, bio=None,
+                specializations=None
+            )
+            if user_type == 'lawyer':
+                row.update(
+                    years_of_experience=rng.randint(1, 30),
+                    education='LLB, University of Nairobi', hourly_rate=Decimal(rng.randrange(50, 500, 5)),
+                    bio=f'Advocate focusing on {rng.choice(SUBJECTS)} matters.',
+                    specializations=','.join(map(str, specializations))
+                )
+                for service_id in specializations:
+                    inserter.add(lawyer_specializations, dict(lawyer_id=user_id, legal_service_id=service_id))
+                if approval_status == 'approved':
+                    lawyer_ids.append(user_id)
+            elif user_type == 'client':
+                client_ids.append(user_id)
+            inserter.add(User.__table__, row)
+            user_id += 1
+    inserter.flush()
+    report(f"users: {len(client_ids)} clients, {sizes['lawyers']} lawyers")
+
+    # Cases and everything hanging off them
+    case_id = _next_id(connection, Case)
+    document_id = _next_id(connection, Document)
+    invoice_id = _next_id(connection, Invoice)
+    transaction_id = _next_id(connection, Transaction)
+    progress_step = max(1, sizes['cases'] // 10)
+    for case_index in range(sizes['cases']):
+        status = _weighted(rng, CASE_STATUS_WEIGHTS) if lawyer_ids else 'open'
+        client_id = rng.choice(client_ids)
+        lawyer_id = rng.choice(lawyer_ids) if status != 'open' else None
+        opened = created_at()
+        assigned = created_at(opened) if lawyer_id else None
+        resolved = created_at(assigned) if status in ('resolved', 'closed') else None
+        subject = rng.choice(SUBJECTS)
+        case_number = f'CASE-SYN-{case_id:08d}'
+        inserter.add(Case.__table__, dict(
+            id=case_id, case_number=case_number, client_id=client_id, lawyer_id=lawyer_id,
+            legal_service_id=rng.choice(service_ids), title=f'{subject.capitalize()} #{case_id}',
+            description=f'Client needs assistance with a {subject}.', priority=_weighted(rng, CASE_PRIORITY_WEIGHTS),
+            status=status, budget=Decimal(rng.randrange(100, 10000, 50)), deadline=opened + timedelta(days=rng.randint(14, 180)),
+            created_at=opened, updated_at=resolved or assigned or opened, assigned_at=assigned, resolved_at=resolved
+        ))
+
+        # Lawyers offering to take the case: all pending while it is open, then one accepted and the rest rejected
+        offering = rng.sample(lawyer_ids, min(len(lawyer_ids), _count(rng, sizes['requests_per_case'])))
+        if lawyer_id and lawyer_id not in offering:
+            offering.append(lawyer_id)
+        for offering_lawyer in offering:
+            request_status = 'pending' if not lawyer_id else 'accepted' if offering_lawyer == lawyer_id else 'rejected'
+            inserter.add(LawyerRequest.__table__, dict(
+                case_id=case_id, lawyer_id=offering_lawyer, message=f'I can help with your {subject}.',
+                proposed_fee=Decimal(rng.randrange(100, 5000, 25)), status=request_status,
+                created_at=created_at(opened) if not assigned else opened + (assigned - opened) * rng.random(),
+                responded_at=assigned if lawyer_id else None
+            ))
+
+        if lawyer_id:
+            sent_at = assigned
+            for index in range(_count(rng, sizes['chats_per_case'])):
+                sent_at = created_at(sent_at)
+                inserter.add(Chat.__table__, dict(
+                    case_id=case_id, sender_id=client_id if index % 2 == 0 else lawyer_id,
+                    message=rng.choice(MESSAGES), attachment=None, is_read=rng.random() < 0.8, created_at=sent_at
+                ))
+
+            for _ in range(_count(rng, sizes['documents_per_case'])):
+                document_type = rng.choice(DOCUMENT_TYPES)
+                inserter.add(Document.__table__, dict(
+                    id=document_id, case_id=case_id, uploaded_by_id=rng.choice((client_id, lawyer_id)),
+                    title=f"{document_type.replace('_', ' ').capitalize()} for {case_number}", document_type=document_type,
+                    file_path=f'uploads/synthetic/{document_id}.pdf', description=f'Supporting document: {subject}',
+                    is_confidential=rng.random() < 0.2, created_at=created_at(assigned)
+                ))
+                document_id += 1
+
+            if status != 'assigned' and rng.random() < 0.7:
+                amount = Decimal(rng.randrange(100, 5000, 25))
+                tax = (amount * Decimal('0.16')).quantize(Decimal('0.01'))
+                invoice_number = f'INV-SYN-{invoice_id:08d}'
+                invoice_status = 'paid' if resolved else _weighted(rng, OPEN_INVOICE_STATUS_WEIGHTS)
+                issued = created_at(assigned)
+
+                payment = None
+                if invoice_status == 'paid':
+                    payment = ('completed', resolved)
+                elif invoice_status != 'draft':
+                    attempt = _weighted(rng, PAYMENT_ATTEMPT_WEIGHTS)
+                    if attempt:
+                        payment = (attempt, created_at(issued))
+
+                paid_transaction = None
+                if payment:
+                    payment_status, paid_at = payment
+                    inserter.add(Transaction.__table__, dict(
+                        id=transaction_id, transaction_number=f'TXN-SYN-{transaction_id:08d}', case_id=case_id,
+                        client_id=client_id, lawyer_id=lawyer_id, transaction_type='payment', amount=amount + tax,
+                        status=payment_status, description=f'Payment for invoice {invoice_number}',
+                        payment_method=rng.choice(['mpesa', 'credit_card', 'bank_transfer']),
+                        payment_reference=None, created_at=paid_at,
+                        completed_at=paid_at if payment_status == 'completed' else None
+                    ))
+                    if payment_status == 'completed':
+                        paid_transaction = transaction_id
+                    transaction_id += 1
+                inserter.add(Invoice.__table__, dict(
+                    id=invoice_id, invoice_number=invoice_number, case_id=case_id, client_id=client_id,
+                    lawyer_id=lawyer_id, amount=amount, tax_amount=tax, total_amount=amount + tax,
+                    description=f'Legal fees: {subject}', status=invoice_status, issue_date=issued.date(),
+                    due_date=(issued + timedelta(days=30)).date(),
+                    paid_date=resolved.date() if paid_transaction else None, transaction_id=paid_transaction
+                ))
+                invoice_id += 1
+
+        for _ in range(_count(rng, sizes['notifications_per_case'])):
+            recipient_id = lawyer_id if lawyer_id and rng.random() < 0.5 else client_id
+            inserter.add(Notification.__table__, dict(
+                recipient_id=recipient_id, notification_type=rng.choice(['case_update', 'new_message', 'invoice_sent']),
+                title='Case update', message=f'There is an update on case {case_number}',
+                is_read=rng.random() < 0.7, related_case_id=case_id, created_at=created_at(opened)
+            ))
+        case_id += 1
+
+        if (case_index + 1) % progress_step == 0:
+            report(f"cases: {case_index + 1}/{sizes['cases']} ({inserter.total()} rows)")
+    inserter.flush()
+    _sync_sequences(connection, [User.__table__, Case.__table__, Document.__table__, Invoice.__table__, Transaction.__table__])
+
+    db.session.commit()
+    rebuild_all_user_stats()
+    report(f'inserted {sum(inserter.counts.values())} rows in {time.perf_counter() - started:.1f}s')
+    return inserter.counts
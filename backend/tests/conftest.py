@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Point the app at a scratch database before it is imported
+_database_dir = tempfile.mkdtemp(prefix='dikoras-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+
+from flask_jwt_extended import create_access_token
+from app import app as flask_app
+from models import db, User, LegalService
+import decorators
+
+@pytest.fixture
+def app():
+    flask_app.config.update(TESTING=True, MAIL_QUEUE_ASYNC=False)
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+        db.session.execute(db.text('DROP TABLE IF EXISTS search_index'))
+        db.session.commit()
+    with decorators._identity_cache_lock:
+        decorators._identity_cache.clear()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(app):
+    counter = iter(range(1, 100000))
+
+    def make(user_type='client', **fields):
+        n = next(counter)
+        user = User(
+            username=f'{user_type}{n}', email=f'{user_type}{n}@example.com',
+            first_name=user_type.title(), last_name=str(n), user_type=user_type, **fields
+        )
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+@pytest.fixture
+def service(app):
+    legal_service = LegalService(name='Contracts', description='Contract law')
+    db.session.add(legal_service)
+    db.session.commit()
+    return legal_service
+
+def auth_headers(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
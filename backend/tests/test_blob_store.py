@@ -0,0 +1,87 @@
+"""Reference counting, rollback cleanup and unlink races in the content-addressed upload store"""
+import io
+import os
+import pytest
+from werkzeug.datastructures import FileStorage
+import blob_store
+from blob_store import store_upload
+from models import db, Blob, Case, Document
+
+@pytest.fixture
+def storage(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'BLOB_STORAGE_DIR', str(tmp_path / 'blobs'))
+    return tmp_path
+
+@pytest.fixture
+def case(make_user, service):
+    owner = make_user('client')
+    new_case = Case(client_id=owner.id, legal_service_id=service.id, title='Lease', description='d')
+    db.session.add(new_case)
+    db.session.commit()
+    return new_case
+
+def upload(content, filename='contract.pdf'):
+    return store_upload(FileStorage(stream=io.BytesIO(content), filename=filename))
+
+def add_document(case, path):
+    document = Document(case_id=case.id, uploaded_by_id=case.client_id, title='Doc',
+                        document_type='contract', file_path=path)
+    db.session.add(document)
+    db.session.commit()
+    return document
+
+def ref_count(path):
+    blob = db.session.get(Blob, blob_store.blob_hash(path), populate_existing=True)
+    return blob.ref_count if blob else None
+
+def test_identical_uploads_share_one_file(storage, case):
+    first = add_document(case, upload(b'same bytes'))
+    second = add_document(case, upload(b'same bytes'))
+
+    assert first.file_path == second.file_path
+    assert ref_count(first.file_path) == 2
+
+    db.session.delete(first)
+    db.session.commit()
+    assert os.path.exists(second.file_path)
+    assert ref_count(second.file_path) == 1
+
+    db.session.delete(second)
+    db.session.commit()
+    assert not os.path.exists(second.file_path)
+    assert ref_count(second.file_path) is None
+
+def test_rolled_back_upload_leaves_no_file(storage, case):
+    path = upload(b'never committed')
+    assert os.path.exists(path)
+
+    db.session.rollback()
+    assert not os.path.exists(path)
+    assert ref_count(path) is None
+
+def test_rollback_keeps_content_that_is_still_referenced(storage, case):
+    kept = add_document(case, upload(b'shared'))
+
+    path = upload(b'shared')
+    db.session.rollback()
+
+    assert os.path.exists(path)
+    assert ref_count(kept.file_path) == 1
+
+def test_reupload_between_release_and_unlink_keeps_the_file(storage, case, monkeypatch):
+    document = add_document(case, upload(b'contended'))
+    path = document.file_path
+
+    # Hold back the post-commit cleanup to open the window a concurrent upload could hit
+    cleanup = blob_store._cleanup
+    deferred = []
+    monkeypatch.setattr(blob_store, '_cleanup', deferred.extend)
+    db.session.delete(document)
+    db.session.commit()
+    assert ref_count(path) == 0 and os.path.exists(path)
+
+    again = add_document(case, upload(b'contended'))
+    assert again.file_path == path
+    cleanup(deferred)
+    assert os.path.exists(path)
+    assert ref_count(path) == 1
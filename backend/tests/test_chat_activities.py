@@ -0,0 +1,57 @@
+"""Admin chat activity: latest message per case, most recently active first"""
+from datetime import datetime, timedelta
+from models import db, Case, Chat
+from conftest import auth_headers
+
+START = datetime(2026, 3, 1, 9, 0)
+
+def add_case(world, title, minutes, messages=()):
+    """A case created at START + minutes, with (sender, minutes) messages"""
+    client_user, lawyer, service = world
+    case = Case(client_id=client_user.id, lawyer_id=lawyer.id, legal_service_id=service.id, title=title,
+                description='Contract dispute', status='assigned', created_at=START + timedelta(minutes=minutes))
+    db.session.add(case)
+    db.session.flush()
+    for sender, at in messages:
+        db.session.add(Chat(case_id=case.id, sender_id=sender.id, message=f'{title} at {at}',
+                            created_at=START + timedelta(minutes=at)))
+    db.session.commit()
+    return case
+
+def activities(client, admin, **params):
+    response = client.get('/admin/chat-activities', query_string=params, headers=auth_headers(admin))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()
+
+def test_latest_cases_first_with_counts(client, make_user, service):
+    admin = make_user('admin')
+    world = (make_user('client'), make_user('lawyer', approval_status='approved'), service)
+    client_user, lawyer, _ = world
+    add_case(world, 'Old', 0, [(client_user, 1)])
+    add_case(world, 'Busy', 2, [(client_user, 3), (lawyer, 4), (client_user, 50), (client_user, 51)])
+    add_case(world, 'Quiet', 40)
+    # Many messages on one case must not crowd the other cases out of the candidates
+    add_case(world, 'Chatty', 5, [(lawyer, 20 + i / 100) for i in range(300)])
+
+    rows = activities(client, admin, limit=3)
+
+    assert [row['case_title'] for row in rows] == ['Busy', 'Quiet', 'Chatty']
+    busy, quiet, chatty = rows
+    assert busy['last_message'] == 'Busy at 51'
+    assert busy['message_count'] == 4
+    assert busy['unread_count'] == 1  # the lawyer's message; the client sent the latest
+    assert quiet['message_count'] == 0 and quiet['last_message'] == 'No messages yet'
+    assert chatty['message_count'] == 300
+
+def test_since_returns_only_newer_activity(client, make_user, service):
+    admin = make_user('admin')
+    world = (make_user('client'), make_user('lawyer', approval_status='approved'), service)
+    client_user, lawyer, _ = world
+    add_case(world, 'Old', 0, [(client_user, 1)])
+    add_case(world, 'Replied', 2, [(client_user, 3), (lawyer, 30)])
+    add_case(world, 'New', 25)
+
+    rows = activities(client, admin, since=(START + timedelta(minutes=10)).isoformat())
+
+    assert [row['case_title'] for row in rows] == ['Replied', 'New']
+    assert rows[0]['message_count'] == 2
@@ -0,0 +1,39 @@
+"""The cached dashboard snapshot is dropped by the admin actions that change its counters"""
+import pytest
+from dashboard import invalidate_dashboard_snapshot
+from conftest import auth_headers
+
+@pytest.fixture
+def admin(app, make_user, monkeypatch):
+    monkeypatch.setitem(app.config, 'DASHBOARD_SNAPSHOT_TTL', 3600)
+    invalidate_dashboard_snapshot()  # the cache outlives each test's database
+    yield make_user('admin')
+    invalidate_dashboard_snapshot()
+
+def user_stats(client, admin):
+    response = client.get('/admin/dashboard', headers=auth_headers(admin))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()['user_stats']
+
+@pytest.mark.parametrize('action, expected', [
+    ('approve', {'pending_lawyers': 0, 'approved_lawyers': 1}),
+    ('reject', {'pending_lawyers': 0, 'rejected_lawyers': 1}),
+])
+def test_lawyer_review_refreshes_the_snapshot(client, admin, make_user, action, expected):
+    lawyer = make_user('lawyer', approval_status='pending')
+    assert user_stats(client, admin)['pending_lawyers'] == 1
+
+    response = client.post(f'/admin/lawyers/{lawyer.id}/{action}', json={'reason': 'Incomplete documents'},
+                           headers=auth_headers(admin))
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    stats = user_stats(client, admin)
+    assert {key: stats[key] for key in expected} == expected
+
+def test_snapshot_is_cached_until_invalidated(client, admin, make_user):
+    assert user_stats(client, admin)['total_clients'] == 0
+    make_user('client')  # not an admin action: served from the cache until the TTL expires
+    assert user_stats(client, admin)['total_clients'] == 0
+
+    invalidate_dashboard_snapshot()
+    assert user_stats(client, admin)['total_clients'] == 1
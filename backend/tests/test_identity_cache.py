@@ -0,0 +1,49 @@
+"""Role checks against the per-process identity cache"""
+from flask import g
+from models import db, User
+import decorators
+from decorators import load_identity
+from conftest import auth_headers
+
+def demote_elsewhere(user):
+    """Change the role the way another worker would: in the database, without touching this process's cache"""
+    db.session.execute(db.update(User).where(User.id == user.id).values(user_type='client'))
+    db.session.commit()
+
+def test_cached_identity_survives_until_ttl(app, make_user):
+    user = make_user('admin')
+    assert load_identity(user.id).user_type == 'admin'
+    demote_elsewhere(user)
+
+    assert load_identity(user.id).user_type == 'admin'
+    assert load_identity(user.id, fresh=True).user_type == 'client'
+
+def test_admin_endpoints_do_not_trust_the_cache(client, make_user):
+    admin = make_user('admin')
+    headers = auth_headers(admin)
+    assert client.get('/admin/lawyers', headers=headers).status_code == 200
+    load_identity(admin.id)  # cached as admin
+
+    demote_elsewhere(admin)
+    g.pop('current_identity', None)  # the test's app context (and g) outlives each request
+    assert client.get('/admin/lawyers', headers=headers).status_code == 403
+
+def test_cache_evicts_least_recently_used(app, make_user, monkeypatch):
+    monkeypatch.setitem(app.config, 'IDENTITY_CACHE_SIZE', 2)
+    first, second, third = make_user(), make_user(), make_user()
+
+    load_identity(first.id)
+    load_identity(second.id)
+    load_identity(first.id)  # hit: first is now the most recently used
+    load_identity(third.id)
+
+    assert list(decorators._identity_cache) == [first.id, third.id]
+
+def test_expired_identity_is_read_again(app, make_user, monkeypatch):
+    monkeypatch.setitem(app.config, 'IDENTITY_CACHE_TTL', 0)
+    user = make_user('admin')
+    assert load_identity(user.id).user_type == 'admin'
+    demote_elsewhere(user)
+
+    assert load_identity(user.id).user_type == 'client'
+    assert len(decorators._identity_cache) == 1
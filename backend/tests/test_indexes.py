@@ -0,0 +1,77 @@
+"""The hot list queries are served by their composite indexes: no full scan, no sort step"""
+import re
+from datetime import date, datetime
+import pytest
+from sqlalchemy import and_, or_
+from models import db, Case, Chat, Document, Invoice, LawyerRequest, Notification, Transaction
+
+def page(query, sort_column, id_column, after=None):
+    """The shape keyset_paginate sends: newest first on (sort_column, id), optionally after a cursor"""
+    if after is not None:
+        query = query.filter(or_(sort_column < after, and_(sort_column == after, id_column < 100)))
+    return query.order_by(sort_column.desc(), id_column.desc()).limit(51)
+
+CURSOR_TIME = datetime(2026, 1, 1)
+
+HOT_QUERIES = [
+    # Owner-only keyset pages
+    (lambda: page(Case.query.filter_by(client_id=1), Case.created_at, Case.id), 'ix_cases_client_created'),
+    (lambda: page(Case.query.filter_by(lawyer_id=1), Case.created_at, Case.id), 'ix_cases_lawyer_created'),
+    (lambda: page(Case.query.filter_by(lawyer_id=1), Case.created_at, Case.id, after=CURSOR_TIME),
+     'ix_cases_lawyer_created'),
+    (lambda: page(Notification.query.filter_by(recipient_id=1), Notification.created_at, Notification.id),
+     'ix_notifications_recipient_created'),
+    (lambda: page(Transaction.query.filter_by(client_id=1), Transaction.created_at, Transaction.id),
+     'ix_transactions_client_created'),
+    (lambda: page(Transaction.query.filter_by(lawyer_id=1), Transaction.created_at, Transaction.id),
+     'ix_transactions_lawyer_created'),
+    (lambda: page(Invoice.query.filter_by(client_id=1), Invoice.issue_date, Invoice.id),
+     'ix_invoices_client_issue_date'),
+    (lambda: page(Invoice.query.filter_by(lawyer_id=1), Invoice.issue_date, Invoice.id),
+     'ix_invoices_lawyer_issue_date'),
+    (lambda: page(Invoice.query.filter_by(lawyer_id=1), Invoice.issue_date, Invoice.id, after=date(2026, 1, 1)),
+     'ix_invoices_lawyer_issue_date'),
+
+    # Admin chat activity: newest messages and newest cases overall
+    (lambda: Chat.query.order_by(Chat.created_at.desc(), Chat.id.desc()).limit(200), 'ix_chats_created'),
+    (lambda: page(Chat.query.filter(Chat.created_at > CURSOR_TIME), Chat.created_at, Chat.id), 'ix_chats_created'),
+    (lambda: page(Case.query, Case.created_at, Case.id), 'ix_cases_created'),
+
+    # Status-filtered pages
+    (lambda: page(Case.query.filter_by(client_id=1, status='open'), Case.created_at, Case.id),
+     'ix_cases_client_status_created'),
+    (lambda: page(Case.query.filter_by(lawyer_id=1, status='open'), Case.created_at, Case.id),
+     'ix_cases_lawyer_status_created'),
+    (lambda: page(Case.query.filter_by(status='open'), Case.created_at, Case.id), 'ix_cases_status_created'),
+    (lambda: page(Notification.query.filter_by(recipient_id=1, is_read=False), Notification.created_at, Notification.id),
+     'ix_notifications_recipient_read_created'),
+    (lambda: page(Transaction.query.filter_by(client_id=1, status='completed'), Transaction.created_at, Transaction.id),
+     'ix_transactions_client_status_created'),
+    (lambda: page(Transaction.query.filter_by(lawyer_id=1, status='completed'), Transaction.created_at, Transaction.id),
+     'ix_transactions_lawyer_status_created'),
+
+    # Per-case lookups
+    (lambda: Chat.query.filter_by(case_id=1).order_by(Chat.created_at.desc()), 'ix_chats_case_created'),
+    (lambda: Chat.query.filter(Chat.case_id == 1, Chat.id > 10).order_by(Chat.id), 'ix_chats_case_id'),
+    (lambda: Document.query.filter_by(case_id=1).order_by(Document.created_at.desc()), 'ix_documents_case_created'),
+    (lambda: Transaction.query.filter_by(case_id=1).order_by(Transaction.created_at.desc()),
+     'ix_transactions_case_created'),
+    (lambda: Invoice.query.filter_by(case_id=1).order_by(Invoice.issue_date.desc()), 'ix_invoices_case_issue_date'),
+    (lambda: Invoice.query.filter_by(client_id=1, status='sent'), 'ix_invoices_client_status'),
+    (lambda: Invoice.query.filter_by(lawyer_id=1, status='sent'), 'ix_invoices_lawyer_status'),
+    (lambda: LawyerRequest.query.filter_by(lawyer_id=1, case_id=1), 'ix_lawyer_requests_lawyer_case'),
+    (lambda: LawyerRequest.query.filter_by(case_id=1).order_by(LawyerRequest.created_at.desc()),
+     'ix_lawyer_requests_case_created'),
+]
+
+def query_plan(query):
+    statement = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {statement}')).all()
+    return '\n'.join(row[-1] for row in rows)
+
+@pytest.mark.parametrize('build_query, index_name', HOT_QUERIES, ids=[f'{i}-{name}' for i, (_, name) in enumerate(HOT_QUERIES)])
+def test_hot_query_uses_index(app, build_query, index_name):
+    plan = query_plan(build_query())
+    assert re.search(rf'USING (COVERING )?INDEX {index_name}\b', plan), plan
+    assert 'TEMP B-TREE' not in plan, plan
+    assert not re.search(r'^SCAN \w+$', plan, re.MULTILINE), plan  # full table scan
@@ -0,0 +1,173 @@
+"""Outbound mail queue delivery, retries with backoff, final failure and lease expiry"""
+from datetime import datetime, timedelta
+import socketserver
+import threading
+from email import message_from_bytes
+import pytest
+from flask_mail import Mail
+from models import db, OutboundEmail
+from mail_queue import enqueue_email, drain_mail_queue, _claim_batch
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib; drops the connection at MAIL FROM while failures remain"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 localhost test SMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 localhost')
+            elif command.startswith('MAIL FROM'):
+                with server.lock:
+                    if server.failures:
+                        server.failures -= 1
+                        return  # hang up mid-transaction
+                recipients = []
+                self.reply('250 OK')
+            elif command.startswith('RCPT TO'):
+                recipients.append(line.decode().strip()[len('RCPT TO:'):].strip('<> '))
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for data_line in iter(self.rfile.readline, b''):
+                    if data_line == b'.\r\n':
+                        break
+                    data.append(data_line[1:] if data_line.startswith(b'..') else data_line)
+                with server.lock:
+                    server.outbox.append((recipients, message_from_bytes(b''.join(data))))
+                self.reply('250 OK queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:  # RSET, NOOP
+                self.reply('250 OK')
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    """In-process SMTP server on a free local port; the first ``failures`` messages are refused"""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.lock = threading.Lock()
+        self.outbox = []  # (envelope recipients, parsed message)
+        self.failures = 0
+        self.connections = 0
+
+@pytest.fixture
+def smtp_server(app, monkeypatch):
+    server = SMTPServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+
+    for key, value in {
+        'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': server.server_address[1], 'MAIL_USE_TLS': False,
+        'MAIL_USE_SSL': False, 'MAIL_USERNAME': None, 'MAIL_PASSWORD': None, 'MAIL_SUPPRESS_SEND': False,
+        'MAIL_QUEUE_BACKOFF_BASE': 30, 'MAIL_QUEUE_MAX_ATTEMPTS': 3,
+    }.items():
+        monkeypatch.setitem(app.config, key, value)
+    # Flask-Mail reads its settings when it is initialised
+    monkeypatch.setitem(app.extensions, 'mail', Mail().init_mail(app.config, app.debug, app.testing))
+
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+def queue(count=1):
+    emails = [enqueue_email(f'Subject {i}', f'user{i}@example.com', 'Body') for i in range(count)]
+    db.session.commit()
+    return emails
+
+def make_due(email):
+    email.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+def test_delivers_queued_mail_over_one_connection(smtp_server):
+    emails = queue(3)
+
+    assert drain_mail_queue() == (3, 3)
+
+    assert [recipients for recipients, _ in smtp_server.outbox] == [[f'user{i}@example.com'] for i in range(3)]
+    assert [message['Subject'] for _, message in smtp_server.outbox] == [f'Subject {i}' for i in range(3)]
+    assert smtp_server.outbox[0][1].get_payload().strip() == 'Body'
+    assert smtp_server.connections == 1
+    for email in emails:
+        assert email.status == 'sent'
+        assert email.attempts == 1
+        assert email.sent_at is not None
+    assert drain_mail_queue() == (0, 0)
+
+def test_transient_failure_is_retried_with_backoff(smtp_server):
+    smtp_server.failures = 2
+    email, = queue()
+
+    before = datetime.utcnow()
+    assert drain_mail_queue() == (1, 0)
+    assert email.status == 'pending'
+    assert email.attempts == 1
+    assert 'unexpectedly closed' in email.last_error
+    assert timedelta(seconds=29) <= email.next_attempt_at - before <= timedelta(seconds=31)
+
+    # Not due again until the backoff has passed
+    assert drain_mail_queue() == (0, 0)
+
+    make_due(email)
+    before = datetime.utcnow()
+    assert drain_mail_queue() == (1, 0)
+    assert email.attempts == 2
+    assert timedelta(seconds=59) <= email.next_attempt_at - before <= timedelta(seconds=61)  # doubled
+
+    make_due(email)
+    assert drain_mail_queue() == (1, 1)
+    assert email.status == 'sent'
+    assert email.attempts == 3
+    assert email.last_error is None
+    assert len(smtp_server.outbox) == 1
+
+def test_failure_after_max_attempts_is_final(smtp_server):
+    smtp_server.failures = 100
+    email, = queue()
+
+    for attempt in range(3):
+        make_due(email)
+        assert drain_mail_queue() == (1, 0)
+
+    assert email.status == 'failed'
+    assert email.attempts == 3
+    make_due(email)
+    assert drain_mail_queue() == (0, 0)
+    assert smtp_server.outbox == []
+
+def test_failed_message_does_not_hold_up_the_rest_of_the_batch(smtp_server):
+    smtp_server.failures = 1
+    emails = queue(3)
+
+    assert drain_mail_queue() == (3, 2)
+    assert [email.status for email in emails] == ['pending', 'sent', 'sent']
+    assert smtp_server.connections == 2  # reconnected after the failure
+
+def test_expired_lease_is_claimed_again(smtp_server, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'MAIL_QUEUE_LEASE', 300)
+    email, = queue()
+
+    # A worker leases the message and dies before delivering it
+    assert _claim_batch(10) == [email.id]
+    db.session.refresh(email)
+    assert email.status == 'sending'
+    assert _claim_batch(10) == []
+
+    make_due(email)  # lease expired
+    assert drain_mail_queue() == (1, 1)
+    assert email.status == 'sent'
+    assert email.attempts == 1
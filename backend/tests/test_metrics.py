@@ -0,0 +1,38 @@
+"""Access to the Prometheus metrics endpoint and what it records"""
+import pytest
+from metrics import reset_metrics
+
+def test_metrics_hidden_without_configured_token(client, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', None)
+    assert client.get('/main/api/metrics').status_code == 404
+
+def test_metrics_require_the_configured_token(client, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'scrape-secret')
+    client.get('/main/api/stats')
+
+    assert client.get('/main/api/metrics').status_code == 401
+    assert client.get('/main/api/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    response = client.get('/main/api/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert 'dikoras_http_requests_total{endpoint="/main/api/stats"' in response.get_data(as_text=True)
+
+@pytest.mark.parametrize('propagate', [True, False], ids=['propagated', 'handled'])
+def test_unhandled_exceptions_are_recorded_as_500(client, app, monkeypatch, propagate):
+    def failing_view():
+        raise RuntimeError('boom')
+
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'scrape-secret')
+    monkeypatch.setitem(app.config, 'PROPAGATE_EXCEPTIONS', propagate)
+    monkeypatch.setitem(app.view_functions, 'main.api_stats', failing_view)
+    reset_metrics()
+
+    if propagate:
+        with pytest.raises(RuntimeError):
+            client.get('/main/api/stats')
+    else:
+        assert client.get('/main/api/stats').status_code == 500
+
+    body = client.get('/main/api/metrics', headers={'Authorization': 'Bearer scrape-secret'}).get_data(as_text=True)
+    assert 'dikoras_http_requests_total{endpoint="/main/api/stats",method="GET",status="500"} 1' in body
+    assert 'dikoras_http_request_duration_seconds_count{endpoint="/main/api/stats",method="GET"} 1' in body
@@ -0,0 +1,126 @@
+"""Case / invoice / transaction numbers: per-day counters, SQLite in-transaction path and server block reservation"""
+import threading
+from datetime import datetime
+import pytest
+import numbering
+from models import db, Case, NumberSequence
+from numbering import next_number
+
+class Clock(datetime):
+    now_value = datetime(2026, 3, 1, 23, 59)
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now_value
+
+@pytest.fixture(autouse=True)
+def clock(app, monkeypatch):
+    monkeypatch.setattr(numbering, 'datetime', Clock)
+    monkeypatch.setattr(Clock, 'now_value', datetime(2026, 3, 1, 23, 59))
+    numbering._blocks.clear()
+    yield Clock
+    numbering._blocks.clear()
+
+@pytest.fixture
+def server_database(app, monkeypatch):
+    """Take the block-reservation path that PostgreSQL uses (still on the SQLite test database)"""
+    class Dialect:
+        name = 'postgresql'
+
+    class Bind:
+        dialect = Dialect
+
+    monkeypatch.setattr(db.session, 'get_bind', lambda *args, **kwargs: Bind)
+    monkeypatch.setitem(app.config, 'NUMBER_BLOCK_SIZE', 5)
+
+def counter(name):
+    db.session.expire_all()
+    sequence = db.session.get(NumberSequence, name)
+    return sequence.next_value if sequence else None
+
+def run_threads(app, count, work):
+    results, errors = [], []
+
+    def run():
+        with app.app_context():
+            try:
+                results.extend(work())
+            except Exception as e:  # surfaced below; a thread's exception would otherwise be lost
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert not errors, errors
+    return results
+
+def test_numbers_count_up_per_prefix_and_day(clock):
+    assert [next_number('CASE') for _ in range(2)] == ['CASE-20260301-000001', 'CASE-20260301-000002']
+    assert next_number('TXN') == 'TXN-20260301-00000001'
+    db.session.commit()
+
+    clock.now_value = datetime(2026, 3, 2, 0, 0, 1)
+    assert next_number('CASE') == 'CASE-20260302-000001'
+    assert next_number('INV') == 'INV-20260302-000001'
+    db.session.commit()
+    assert counter('CASE:20260301') == 3
+    assert counter('CASE:20260302') == 2
+
+def test_back_to_back_constructors_get_distinct_numbers(make_user, service):
+    client_user = make_user('client')
+    cases = [Case(client_id=client_user.id, legal_service_id=service.id, title=f'Case {i}', description='Dispute')
+             for i in range(20)]
+    db.session.add_all(cases)
+    db.session.commit()
+
+    assert [case.case_number for case in cases] == [f'CASE-20260301-{i:06d}' for i in range(1, 21)]
+
+def test_sqlite_numbers_are_only_used_when_the_transaction_commits():
+    assert next_number('CASE') == 'CASE-20260301-000001'
+    db.session.rollback()
+
+    assert next_number('CASE') == 'CASE-20260301-000001'
+    db.session.commit()
+    assert next_number('CASE') == 'CASE-20260301-000002'
+
+def test_concurrent_sqlite_allocations_are_unique(app):
+    def work():
+        numbers = []
+        for _ in range(25):
+            numbers.append(next_number('CASE'))
+            db.session.commit()
+        return numbers
+
+    numbers = run_threads(app, 4, work)
+    assert sorted(numbers) == [f'CASE-20260301-{i:06d}' for i in range(1, 101)]
+
+def test_server_databases_reserve_blocks(server_database):
+    numbers = [next_number('INV') for _ in range(7)]
+    db.session.rollback()  # reserved in their own transactions: the caller's rollback returns nothing
+
+    assert numbers == [f'INV-20260301-{i:06d}' for i in range(1, 8)]
+    assert counter('INV:20260301') == 11  # two blocks of 5
+    assert next_number('INV') == 'INV-20260301-000008'
+
+def test_forked_worker_does_not_reuse_its_parents_block(server_database):
+    assert next_number('INV') == 'INV-20260301-000001'
+    numbering._blocks['INV:20260301'][2] = -1  # the block belongs to another process
+
+    assert next_number('INV') == 'INV-20260301-000006'  # a fresh block; the rest of the old one is a gap
+
+def test_block_reservation_rolls_over_with_the_day(server_database, clock):
+    assert next_number('TXN') == 'TXN-20260301-00000001'
+    clock.now_value = datetime(2026, 3, 2, 0, 0)
+
+    assert next_number('TXN') == 'TXN-20260302-00000001'
+    assert list(numbering._blocks) == ['TXN:20260302']  # the previous day's leftovers are dropped
+
+def test_concurrent_block_allocations_are_unique(app, server_database):
+    numbers = run_threads(app, 4, lambda: [next_number('TXN') for _ in range(50)])
+
+    # 200 numbers in blocks of 5 use every block up completely
+    assert sorted(numbers) == [f'TXN-20260301-{i:08d}' for i in range(1, 201)]
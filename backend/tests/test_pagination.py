@@ -0,0 +1,42 @@
+"""Keyset list pages are capped by default and followed through X-Next-Cursor"""
+from models import db, Case
+from conftest import auth_headers
+
+def test_list_is_capped_and_cursor_reaches_every_row(client, app, make_user, service, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAGINATION_DEFAULT_PAGE_SIZE', 10)
+    owner = make_user('client')
+    for i in range(25):
+        db.session.add(Case(client_id=owner.id, legal_service_id=service.id, title=f'Case {i}', description='d'))
+    db.session.commit()
+    headers = auth_headers(owner)
+
+    response = client.get('/case/', headers=headers)
+    assert len(response.get_json()) == 10
+    assert response.headers['X-Next-Cursor']
+    assert 'rel="next"' in response.headers['Link']
+
+    seen = []
+    cursor = None
+    while True:
+        response = client.get('/case/', headers=headers, query_string={'cursor': cursor} if cursor else {})
+        assert response.status_code == 200
+        seen += [case['id'] for case in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 25
+    assert seen == sorted(seen, reverse=True)
+
+def test_limit_parameter_is_clamped(client, app, make_user, service, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAGINATION_MAX_PAGE_SIZE', 5)
+    owner = make_user('client')
+    for i in range(8):
+        db.session.add(Case(client_id=owner.id, legal_service_id=service.id, title=f'Case {i}', description='d'))
+    db.session.commit()
+
+    response = client.get('/case/?limit=1000', headers=auth_headers(owner))
+    assert len(response.get_json()) == 5
+
+def test_malformed_cursor_is_rejected(client, make_user):
+    response = client.get('/case/?cursor=not-a-cursor', headers=auth_headers(make_user('client')))
+    assert response.status_code == 400
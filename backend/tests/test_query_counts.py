@@ -0,0 +1,105 @@
+"""List endpoints issue a constant number of SQL statements however many rows they return"""
+from contextlib import contextmanager
+from datetime import date, timedelta
+import itertools
+from decimal import Decimal
+import pytest
+from sqlalchemy import event
+from models import db, Case, Chat, Document, Invoice, Transaction, User
+from conftest import auth_headers
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+@pytest.fixture
+def world(make_user, service):
+    return make_user('client'), make_user('lawyer', approval_status='approved'), service
+
+_user_numbers = itertools.count(1)
+
+def counterpart(user_type):
+    """A fresh user without a real password (hashing one per row would dominate the test time)"""
+    n = next(_user_numbers)
+    user = User(username=f'other_{user_type}{n}', email=f'other_{user_type}{n}@example.com', first_name='Other',
+                last_name=str(n), user_type=user_type, approval_status='approved', password_hash='-')
+    db.session.add(user)
+    return user
+
+def add_rows(world, count):
+    """count cases, each with an invoice, a transaction, a document and two chat messages.
+
+    Cases alternate between the world's client (with a new lawyer) and the world's lawyer
+    (with a new client), so every list row refers to users no other row loaded.
+    """
+    client_user, lawyer, service = world
+    for i in range(count):
+        if i % 2:
+            case_client, case_lawyer = counterpart('client'), lawyer
+        else:
+            case_client, case_lawyer = client_user, counterpart('lawyer')
+        db.session.flush()
+        case = Case(client_id=case_client.id, lawyer_id=case_lawyer.id, legal_service_id=service.id,
+                    title=f'Case {i}', description='Contract dispute', status='assigned')
+        db.session.add(case)
+        db.session.flush()
+        db.session.add(Invoice(case_id=case.id, client_id=case_client.id, lawyer_id=case_lawyer.id,
+                               amount=Decimal('100'), tax_amount=Decimal('16'), total_amount=Decimal('116'),
+                               description='Fees', status='sent', due_date=date.today() + timedelta(days=14)))
+        db.session.add(Transaction(case_id=case.id, client_id=case_client.id, lawyer_id=case_lawyer.id,
+                                   transaction_type='payment', amount=Decimal('116'), description='Fees'))
+        db.session.add(Document(case_id=case.id, uploaded_by_id=case_client.id, title=f'Contract {i}',
+                                document_type='contract', file_path=f'uploads/contract-{i}.pdf'))
+        db.session.add(Chat(case_id=case.id, sender_id=case_client.id, message='Hello'))
+        db.session.add(Chat(case_id=case.id, sender_id=case_lawyer.id, message='Hi'))
+    db.session.commit()
+    return case
+
+def statements_for(client, path, user):
+    headers = auth_headers(user)
+    client.get(path, headers=headers)  # warm per-process caches (identity, revocation set)
+    db.session.expire_all()
+    with count_statements() as statements:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements)
+
+LIST_ENDPOINTS = [
+    ('/case/', 'client'),
+    ('/invoice/', 'client'),
+    ('/transaction/', 'client'),
+    ('/lawyer/cases', 'lawyer'),
+    ('/lawyer/documents', 'lawyer'),
+    ('/admin/cases', 'admin'),
+]
+
+@pytest.mark.parametrize('path, role', LIST_ENDPOINTS)
+def test_list_statements_do_not_grow_with_rows(client, world, make_user, path, role):
+    viewer = {'client': world[0], 'lawyer': world[1], 'admin': make_user('admin')}[role]
+    add_rows(world, 4)
+    few = statements_for(client, path, viewer)
+    add_rows(world, 20)
+    many = statements_for(client, path, viewer)
+    assert many == few
+
+def test_chat_history_statements_do_not_grow_with_messages(client, world):
+    client_user = world[0]
+    case = add_rows(world, 1)
+    path = f'/chat/api/messages/{case.id}'
+    few = statements_for(client, path, client_user)
+    for i in range(20):
+        sender = counterpart('lawyer') if i % 2 else client_user
+        db.session.flush()
+        db.session.add(Chat(case_id=case.id, sender_id=sender.id, message=f'm{i}'))
+    db.session.commit()
+    many = statements_for(client, path, client_user)
+    assert many == few
@@ -0,0 +1,17 @@
+"""Socket.IO connection authentication"""
+from flask_jwt_extended import create_access_token, create_refresh_token
+from app import socketio
+
+def test_access_token_opens_a_socket(app, make_user):
+    user = make_user('client')
+    socket = socketio.test_client(app, auth={'token': create_access_token(identity=user.id)})
+    assert socket.is_connected()
+    socket.disconnect()
+
+def test_refresh_token_is_refused(app, make_user):
+    user = make_user('client')
+    socket = socketio.test_client(app, auth={'token': create_refresh_token(identity=user.id)})
+    assert not socket.is_connected()
+
+def test_missing_token_is_refused(app):
+    assert not socketio.test_client(app).is_connected()
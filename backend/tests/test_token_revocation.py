@@ -0,0 +1,75 @@
+"""In-memory revocation set: syncing other workers' logouts, one sync at a time"""
+import threading
+from datetime import datetime
+from models import db, TokenBlocklist
+from token_revocation import RevocationStore
+
+def revoke_elsewhere(jti):
+    """A logout committed by another worker: in the table, not in this process's set"""
+    db.session.add(TokenBlocklist(jti=jti, created_at=datetime.utcnow()))
+    db.session.commit()
+
+def slow_sync(store):
+    """Make store's syncs block until the returned event is set; returns (started, release, calls)"""
+    started, release, calls = threading.Event(), threading.Event(), []
+    sync = store._sync
+
+    def blocking_sync():
+        calls.append(threading.current_thread().name)
+        started.set()
+        assert release.wait(5)
+        sync()
+    store._sync = blocking_sync
+    return started, release, calls
+
+def in_thread(app, target):
+    def run():
+        with app.app_context():
+            target()
+    thread = threading.Thread(target=run, name='refresher')
+    thread.start()
+    return thread
+
+def test_sync_picks_up_other_workers_logouts(app):
+    store = RevocationStore()
+    store.warm()
+    revoke_elsewhere('logged-out-elsewhere')
+    assert not store.is_revoked('logged-out-elsewhere')  # not due yet
+
+    store._next_sync = 0.0
+    assert store.is_revoked('logged-out-elsewhere')
+    assert not store.is_revoked('still-valid')
+
+def test_checks_do_not_wait_for_a_running_sync(app):
+    store = RevocationStore()
+    store.warm()
+    store.revoke('revoked-here')
+    store._next_sync = 0.0  # due
+    started, release, calls = slow_sync(store)
+
+    refresher = in_thread(app, lambda: store.is_revoked('anything'))
+    assert started.wait(5)
+
+    # Meanwhile other requests check against the current set instead of syncing too
+    assert store.is_revoked('revoked-here')
+    assert not store.is_revoked('still-valid')
+    assert calls == ['refresher']
+
+    release.set()
+    refresher.join(5)
+    assert calls == ['refresher']
+    assert store._next_sync > 0
+
+def test_first_check_waits_for_the_initial_load(app):
+    revoke_elsewhere('revoked-before-start')
+    store = RevocationStore()
+    started, release, calls = slow_sync(store)
+
+    loader = in_thread(app, lambda: store.is_revoked('anything'))
+    assert started.wait(5)
+    threading.Timer(0.1, release.set).start()
+
+    # Nothing is loaded yet, so this check waits for the load rather than answering "not revoked"
+    assert store.is_revoked('revoked-before-start')
+    loader.join(5)
+    assert calls == ['refresher']
@@ -0,0 +1,164 @@
+"""In-memory JWT revocation set.
+
+Revoked JTIs are mirrored from ``token_blocklist`` into a process-local set fronted
+by a bloom filter, so checking a token that was never revoked costs a few hashes
+and no database round trip. Other workers' logouts are picked up by an
+incremental sync every ``JWT_REVOCATION_SYNC_INTERVAL`` seconds, run by one
+request thread while the others keep checking against the current set. The sync
+re-reads rows created up to ``JWT_REVOCATION_SYNC_MARGIN`` seconds before the
+previous sync, so a logout whose transaction committed late (or out of id
+order) is still seen.
+
+Checks never write: rows older than ``JWT_ACCESS_TOKEN_EXPIRES`` (whose tokens
+have expired anyway) are only forgotten in memory during a sync, and deleted
+from the table by the ``purge-token-blocklist`` CLI command.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, TokenBlocklist
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class RevocationStore:
+    """Process-wide mirror of the token blocklist"""
+
+    def __init__(self, capacity=10000, error_rate=0.001):
+        self._lock = threading.Lock()  # guards _revoked and _bloom
+        self._sync_lock = threading.Lock()  # one sync at a time
+        self._initial_capacity = capacity
+        self._error_rate = error_rate
+        self._revoked = {}  # jti -> revoked at (naive UTC)
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._synced_since = None  # naive UTC start of the last sync
+        self._warmed = False
+        self._next_sync = 0.0
+
+    def _rebuild_bloom(self):
+        capacity = self._initial_capacity
+        while capacity < len(self._revoked) * 2:
+            capacity *= 2
+        bloom = BloomFilter(capacity, self._error_rate)
+        for jti in self._revoked:
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def _add(self, jti, revoked_at):
+        if jti in self._revoked:
+            return
+        self._revoked[jti] = revoked_at
+        self._bloom.add(jti)
+        if self._bloom.count > self._bloom.capacity:
+            self._rebuild_bloom()
+
+    def _forget_expired(self, cutoff):
+        with self._lock:
+            expired = [jti for jti, revoked_at in self._revoked.items() if revoked_at < cutoff]
+            for jti in expired:
+                del self._revoked[jti]
+            if expired:
+                self._rebuild_bloom()
+
+    def _sync(self):
+        """Load blocklist rows created since shortly before the last sync (all rows on first use)"""
+        started = datetime.utcnow()
+        query = db.session.query(TokenBlocklist.jti, TokenBlocklist.created_at)
+        if self._synced_since is not None:
+            # Rows are not committed in id or created_at order, so re-read a trailing window
+            margin = timedelta(seconds=current_app.config.get('JWT_REVOCATION_SYNC_MARGIN', 300))
+            query = query.filter(TokenBlocklist.created_at >= self._synced_since - margin)
+        rows = query.all()
+
+        with self._lock:
+            for row in rows:
+                self._add(row.jti, _naive_utc(row.created_at))  # already known jtis are skipped
+            self._synced_since = started
+            self._warmed = True
+
+        expires = current_app.config.get('JWT_ACCESS_TOKEN_EXPIRES', timedelta(hours=24))
+        self._forget_expired(started - expires)
+
+    def _sync_and_schedule(self):
+        # Caller holds _sync_lock
+        self._sync()
+        self._next_sync = time.monotonic() + current_app.config.get('JWT_REVOCATION_SYNC_INTERVAL', 30)
+
+    def warm(self):
+        """Load every currently revoked JTI into memory"""
+        with self._sync_lock:
+            self._sync_and_schedule()
+
+    def _refresh_if_due(self):
+        if not self._warmed:
+            # Nothing to check against yet: wait for whichever thread is loading it
+            with self._sync_lock:
+                if not self._warmed:
+                    self._sync_and_schedule()
+        elif time.monotonic() >= self._next_sync and self._sync_lock.acquire(blocking=False):
+            # One thread refreshes; the others keep checking against the current set
+            try:
+                if time.monotonic() >= self._next_sync:
+                    self._sync_and_schedule()
+            finally:
+                self._sync_lock.release()
+
+    def is_revoked(self, jti):
+        self._refresh_if_due()
+        if jti not in self._bloom:
+            return False
+        return jti in self._revoked
+
+    def revoke(self, jti, revoked_at=None):
+        """Record a JTI that has just been written to token_blocklist"""
+        with self._lock:
+            self._add(jti, _naive_utc(revoked_at or datetime.utcnow()))
+
+    def purge(self):
+        """Delete blocklist rows whose tokens can no longer be valid, returning the number removed"""
+        expires = current_app.config.get('JWT_ACCESS_TOKEN_EXPIRES', timedelta(hours=24))
+        cutoff = datetime.utcnow() - expires
+
+        try:
+            deleted = TokenBlocklist.query.filter(
+                TokenBlocklist.created_at < cutoff
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        self._forget_expired(cutoff)
+        return deleted
+
+def _naive_utc(value):
+    if value is not None and value.tzinfo is not None:
+        return value.replace(tzinfo=None) - value.utcoffset()
+    return value
+
+revocation_store = RevocationStore()
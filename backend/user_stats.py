@@ -0,0 +1,275 @@
+"""Incremental maintenance of the materialized per-user counters in ``user_stats``.
+
+Every flush that inserts, updates or deletes a Case, Transaction, Invoice,
+LawyerRequest or Notification is turned into per-user deltas that are applied
+with a single ``UPDATE ... SET col = col + :delta`` per affected user. Rows are
+built from scratch the first time a user is touched, and ``flask rebuild-user-stats``
+recomputes the whole table if counters ever drift (e.g. after bulk SQL changes).
+"""
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import event, func, inspect, select, update, insert, delete
+from sqlalchemy.exc import IntegrityError
+from models import db, User, Case, Transaction, Invoice, LawyerRequest, Notification, UserStats
+from dashboard import count_if, sum_if
+
+CASE_STATUSES = ('open', 'assigned', 'in_progress', 'resolved', 'closed')
+TRANSACTION_STATUSES = ('completed', 'pending', 'failed')
+
+COUNTER_COLUMNS = (
+    'total_cases', 'open_cases', 'assigned_cases', 'in_progress_cases', 'resolved_cases', 'closed_cases',
+    'total_transactions', 'completed_transactions', 'pending_transactions', 'failed_transactions',
+    'completed_amount', 'pending_invoices', 'pending_requests', 'unread_notifications'
+)
+
+# Attributes whose old value is needed to compute a delta on update
+TRACKED_ATTRIBUTES = {
+    Case: ('client_id', 'lawyer_id', 'status'),
+    Transaction: ('client_id', 'lawyer_id', 'status', 'amount'),
+    Invoice: ('client_id', 'lawyer_id', 'status'),
+    LawyerRequest: ('case_id', 'lawyer_id', 'status'),
+    Notification: ('recipient_id', 'is_read'),
+}
+
+stats_table = UserStats.__table__
+
+# ---------------------------------------------------------------------------
+# Full recomputation
+# ---------------------------------------------------------------------------
+
+def _grouped(connection, key_column, columns, *criteria, user_id=None):
+    query = select(key_column, *columns).where(key_column.isnot(None), *criteria).group_by(key_column)
+    if user_id is not None:
+        query = query.where(key_column == user_id)
+    return connection.execute(query).all()
+
+def compute_user_stats(connection, user_id=None):
+    """Recompute counters from the source tables, for one user or for everyone.
+
+    Returns a dict of ``{user_id: {column: value}}``.
+    """
+    stats = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+
+    case_columns = [func.count(Case.id)] + [count_if(Case.status == status) for status in CASE_STATUSES]
+    for key_column in (Case.client_id, Case.lawyer_id):
+        for row in _grouped(connection, key_column, case_columns, user_id=user_id):
+            row_stats = stats[row[0]]
+            row_stats['total_cases'] += row[1]
+            for i, status in enumerate(CASE_STATUSES):
+                row_stats[f'{status}_cases'] += row[i + 2]
+
+    transaction_columns = [func.count(Transaction.id)]
+    transaction_columns += [count_if(Transaction.status == status) for status in TRANSACTION_STATUSES]
+    transaction_columns.append(sum_if(Transaction.amount, Transaction.status == 'completed'))
+    for key_column in (Transaction.client_id, Transaction.lawyer_id):
+        for row in _grouped(connection, key_column, transaction_columns, user_id=user_id):
+            row_stats = stats[row[0]]
+            row_stats['total_transactions'] += row[1]
+            for i, status in enumerate(TRANSACTION_STATUSES):
+                row_stats[f'{status}_transactions'] += row[i + 2]
+            row_stats['completed_amount'] += Decimal(str(row[5] or 0))
+
+    for key_column in (Invoice.client_id, Invoice.lawyer_id):
+        for row in _grouped(connection, key_column, [func.count(Invoice.id)], Invoice.status == 'sent', user_id=user_id):
+            stats[row[0]]['pending_invoices'] += row[1]
+
+    for row in _grouped(connection, LawyerRequest.lawyer_id, [func.count(LawyerRequest.id)],
+                        LawyerRequest.status == 'pending', user_id=user_id):
+        stats[row[0]]['pending_requests'] += row[1]
+
+    # Clients see the pending requests made on their cases
+    client_requests = select(Case.client_id, func.count(LawyerRequest.id)).join(
+        Case, LawyerRequest.case_id == Case.id
+    ).where(LawyerRequest.status == 'pending').group_by(Case.client_id)
+    if user_id is not None:
+        client_requests = client_requests.where(Case.client_id == user_id)
+    for row in connection.execute(client_requests):
+        stats[row[0]]['pending_requests'] += row[1]
+
+    for row in _grouped(connection, Notification.recipient_id, [func.count(Notification.id)],
+                        Notification.is_read == False, user_id=user_id):
+        stats[row[0]]['unread_notifications'] += row[1]
+
+    if user_id is not None and user_id not in stats:
+        stats[user_id]  # users without any activity still get an all-zero row
+    return stats
+
+def _insert_stats_row(connection, user_id):
+    values = compute_user_stats(connection, user_id)[user_id]
+    connection.execute(insert(stats_table).values(user_id=user_id, updated_at=datetime.utcnow(), **values))
+
+def rebuild_all_user_stats():
+    """Recompute the entire user_stats table from the source tables"""
+    connection = db.session.connection()
+    stats = compute_user_stats(connection)
+    user_ids = set(connection.execute(select(User.id)).scalars())
+
+    connection.execute(delete(stats_table))
+    now = datetime.utcnow()
+    rows = [dict(stats[uid], user_id=uid, updated_at=now) for uid in user_ids]
+    if rows:
+        connection.execute(insert(stats_table), rows)
+    db.session.commit()
+    return len(rows)
+
+def get_user_stats(user_id):
+    """Return the UserStats row for a user, materializing it on first access"""
+    user_stats = db.session.get(UserStats, user_id)
+    if user_stats is not None:
+        return user_stats
+
+    try:
+        _insert_stats_row(db.session.connection(), user_id)
+        db.session.commit()
+    except IntegrityError:
+        # Another request materialized the row first
+        db.session.rollback()
+    return db.session.get(UserStats, user_id)
+
+# ---------------------------------------------------------------------------
+# Incremental maintenance
+# ---------------------------------------------------------------------------
+
+def _case_counters(values, add, sign):
+    counters = {'total_cases': sign}
+    if values('status') in CASE_STATUSES:
+        counters[f"{values('status')}_cases"] = sign
+    add(values('client_id'), counters)
+    add(values('lawyer_id'), counters)
+
+def _transaction_counters(values, add, sign):
+    status = values('status')
+    counters = {'total_transactions': sign}
+    if status in TRANSACTION_STATUSES:
+        counters[f'{status}_transactions'] = sign
+    if status == 'completed' and values('amount') is not None:
+        counters['completed_amount'] = sign * Decimal(str(values('amount')))
+    add(values('client_id'), counters)
+    add(values('lawyer_id'), counters)
+
+def _invoice_counters(values, add, sign):
+    if values('status') == 'sent':
+        add(values('client_id'), {'pending_invoices': sign})
+        add(values('lawyer_id'), {'pending_invoices': sign})
+
+def _lawyer_request_counters(values, add, sign, case_client_id):
+    if values('status') == 'pending':
+        add(values('lawyer_id'), {'pending_requests': sign})
+        add(case_client_id(values('case_id')), {'pending_requests': sign})
+
+def _notification_counters(values, add, sign):
+    if not values('is_read'):
+        add(values('recipient_id'), {'unread_notifications': sign})
+
+def _current_values(obj):
+    return lambda key: getattr(obj, key)
+
+def _previous_values(obj):
+    state = inspect(obj)
+
+    def values(key):
+        history = state.attrs[key].history
+        if history.deleted:
+            return history.deleted[0]
+        return getattr(obj, key)
+    return values
+
+def _has_tracked_changes(obj):
+    state = inspect(obj)
+    return any(state.attrs[key].history.has_changes() for key in TRACKED_ATTRIBUTES[type(obj)])
+
+def apply_user_stats_deltas(connection, deltas):
+    """Apply ``{user_id: {column: delta}}`` to user_stats, one UPDATE per user"""
+    for user_id, counters in deltas.items():
+        counters = {column: delta for column, delta in counters.items() if delta}
+        if not counters:
+            continue
+        result = connection.execute(
+            update(stats_table)
+            .where(stats_table.c.user_id == user_id)
+            .values({stats_table.c[column]: stats_table.c[column] + delta for column, delta in counters.items()})
+        )
+        if result.rowcount == 0:
+            # First change for this user: build the row from the (already flushed) source tables
+            _insert_stats_row(connection, user_id)
+
+def record_unread_counts(session, user_ids):
+    """Stash the current unread_notifications of user_ids in session.info['unread_counts']
+
+    Called after the counters change inside a transaction; ``realtime`` pushes
+    the stashed values to the users' sockets once the transaction commits.
+    """
+    if not user_ids:
+        return
+    rows = session.connection().execute(
+        select(stats_table.c.user_id, stats_table.c.unread_notifications)
+        .where(stats_table.c.user_id.in_(user_ids))
+    ).all()
+    session.info.setdefault('unread_counts', {}).update(dict(rows))
+
+def _after_flush(session, flush_context):
+    deltas = defaultdict(lambda: defaultdict(int))
+    connection = session.connection()
+    case_clients = {}
+
+    def add(user_id, counters):
+        if user_id is None:
+            return
+        for column, delta in counters.items():
+            deltas[user_id][column] += delta
+
+    def case_client_id(case_id):
+        if case_id not in case_clients:
+            case_clients[case_id] = connection.execute(
+                select(Case.client_id).where(Case.id == case_id)
+            ).scalar()
+        return case_clients[case_id]
+
+    def contribute(obj, values, sign):
+        if isinstance(obj, Case):
+            _case_counters(values, add, sign)
+        elif isinstance(obj, Transaction):
+            _transaction_counters(values, add, sign)
+        elif isinstance(obj, Invoice):
+            _invoice_counters(values, add, sign)
+        elif isinstance(obj, LawyerRequest):
+            _lawyer_request_counters(values, add, sign, case_client_id)
+        elif isinstance(obj, Notification):
+            _notification_counters(values, add, sign)
+
+    deleted_users = []
+    for obj in session.new:
+        if type(obj) in TRACKED_ATTRIBUTES:
+            contribute(obj, _current_values(obj), 1)
+    for obj in session.dirty:
+        if type(obj) in TRACKED_ATTRIBUTES and _has_tracked_changes(obj):
+            contribute(obj, _previous_values(obj), -1)
+            contribute(obj, _current_values(obj), 1)
+    for obj in session.deleted:
+        if type(obj) in TRACKED_ATTRIBUTES:
+            contribute(obj, _current_values(obj), -1)
+        elif isinstance(obj, User):
+            deleted_users.append(obj.id)
+
+    if deleted_users:
+        connection.execute(delete(stats_table).where(stats_table.c.user_id.in_(deleted_users)))
+        for user_id in deleted_users:
+            deltas.pop(user_id, None)
+
+    if deltas:
+        apply_user_stats_deltas(connection, deltas)
+        record_unread_counts(session, [
+            user_id for user_id, counters in deltas.items() if counters.get('unread_notifications')
+        ])
+
+def _noop_set(target, value, oldvalue, initiator):
+    return value
+
+# Make sure the replaced value is loaded on assignment, even for expired attributes,
+# so that updates can subtract the old contribution.
+for model, attributes in TRACKED_ATTRIBUTES.items():
+    for attribute in attributes:
+        event.listen(getattr(model, attribute), 'set', _noop_set, active_history=True, retval=True)
+
+event.listen(db.session, 'after_flush', _after_flush)
@@ -1,10 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import (db, User, Case, LegalService, Transaction, 
                    Invoice, Document, Notification, ActivityLog, LawyerRequest, Chat)
+import os
+import tempfile
+import zipfile
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, and_, or_, case as sql_case
+from sqlalchemy.orm import aliased
 from functools import wraps
+from dashboard import get_dashboard_snapshot, invalidate_dashboard_snapshot
+from decorators import get_current_identity, invalidate_identity
+from queries import case_query, document_query, chat_query, transaction_query
+from pagination import paginate_query, InvalidCursor, invalid_cursor_response
+from exports import DATASETS, COLUMNAR_FORMATS, columnar_exports_available, write_dataset
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -13,9 +22,9 @@ def admin_required(f):
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        if not user or user.user_type != 'admin':
+        # Read from the database: a revoked admin must lose access on every worker at once
+        identity = get_current_identity(fresh=True)
+        if not identity or identity.user_type != 'admin' or not identity.is_active:
             return jsonify({'error': 'Access denied. Admin privileges required.'}), 403
         return f(*args, **kwargs)
     return decorated_function
@@ -24,103 +33,37 @@ def admin_required(f):
 @admin_required
 def dashboard():
     """Admin dashboard with overview statistics"""
-    # User statistics
-    total_users = User.query.count()
-    total_clients = User.query.filter_by(user_type='client').count()
-    total_lawyers = User.query.filter_by(user_type='lawyer').count()
-    pending_lawyers = User.query.filter_by(user_type='lawyer', approval_status='pending').count()
-    approved_lawyers = User.query.filter_by(user_type='lawyer', approval_status='approved').count()
-    rejected_lawyers = User.query.filter_by(user_type='lawyer', approval_status='rejected').count()
-    
-    # Case statistics
-    total_cases = Case.query.count()
-    open_cases = Case.query.filter_by(status='open').count()
-    active_cases = Case.query.filter(Case.status.in_(['assigned', 'in_progress'])).count()
-    resolved_cases = Case.query.filter_by(status='resolved').count()
-    closed_cases = Case.query.filter_by(status='closed').count()
-    
-    # Financial statistics
-    total_transactions = Transaction.query.count()
-    completed_transactions = Transaction.query.filter_by(status='completed').count()
-    pending_transactions = Transaction.query.filter_by(status='pending').count()
-    failed_transactions = Transaction.query.filter_by(status='failed').count()
-    
-    total_revenue = db.session.query(func.sum(Transaction.amount)).filter(
-        Transaction.status == 'completed'
-    ).scalar() or 0
-    
-    total_invoices = Invoice.query.count()
-    pending_invoices = Invoice.query.filter_by(status='sent').count()
-    paid_invoices = Invoice.query.filter_by(status='paid').count()
-    overdue_invoices = Invoice.query.filter_by(status='overdue').count()
-    draft_invoices = Invoice.query.filter_by(status='draft').count()
+    # All counters and chart series come from one grouped query per table
+    snapshot = get_dashboard_snapshot(
+        force_refresh=request.args.get('refresh', 'false').lower() == 'true'
+    )
+    user_stats = snapshot['user_stats']
+    case_stats = snapshot['case_stats']
+    financial_stats = snapshot['financial_stats']
     
     # Recent activities
-    recent_cases = Case.query.order_by(desc(Case.created_at)).limit(10).all()
-    recent_transactions = Transaction.query.order_by(desc(Transaction.created_at)).limit(10).all()
+    recent_cases = case_query('client', 'lawyer').order_by(desc(Case.created_at)).limit(10).all()
+    recent_transactions = transaction_query('client', 'lawyer').order_by(desc(Transaction.created_at)).limit(10).all()
     recent_users = User.query.order_by(desc(User.created_at)).limit(10).all()
     recent_activities = ActivityLog.query.order_by(desc(ActivityLog.created_at)).limit(15).all()
     
-    # Monthly statistics for charts (last 6 months)
-    current_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    monthly_stats = []
-    
-    for i in range(6):
-        month_start = current_month - timedelta(days=30*i)
-        month_end = month_start + timedelta(days=30)
-        
-        cases_count = Case.query.filter(
-            Case.created_at >= month_start,
-            Case.created_at < month_end
-        ).count()
-        
-        revenue = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.created_at >= month_start,
-            Transaction.created_at < month_end,
-            Transaction.status == 'completed'
-        ).scalar() or 0
-        
-        users_count = User.query.filter(
-            User.created_at >= month_start,
-            User.created_at < month_end
-        ).count()
-        
-        monthly_stats.append({
-            'month': month_start.strftime('%Y-%m'),
-            'month_name': month_start.strftime('%B %Y'),
-            'cases': cases_count,
-            'revenue': float(revenue),
-            'users': users_count
-        })
-    
     dashboard_data = {
         'user_stats': {
-            'total_users': total_users,
-            'total_clients': total_clients,
-            'total_lawyers': total_lawyers,
-            'pending_lawyers': pending_lawyers,
-            'approved_lawyers': approved_lawyers,
-            'rejected_lawyers': rejected_lawyers
+            'total_users': user_stats['total_users'],
+            'total_clients': user_stats['total_clients'],
+            'total_lawyers': user_stats['total_lawyers'],
+            'pending_lawyers': user_stats['pending_lawyers'],
+            'approved_lawyers': user_stats['approved_lawyers'],
+            'rejected_lawyers': user_stats['rejected_lawyers']
         },
         'case_stats': {
-            'total_cases': total_cases,
-            'open_cases': open_cases,
-            'active_cases': active_cases,
-            'resolved_cases': resolved_cases,
-            'closed_cases': closed_cases
-        },
-        'financial_stats': {
-            'total_transactions': total_transactions,
-            'completed_transactions': completed_transactions,
-            'pending_transactions': pending_transactions,
-            'failed_transactions': failed_transactions,
-            'total_revenue': float(total_revenue),
-            'total_invoices': total_invoices,
-            'pending_invoices': pending_invoices,
-            'paid_invoices': paid_invoices,
-            'overdue_invoices': overdue_invoices,
-            'draft_invoices': draft_invoices
+            'total_cases': case_stats['total_cases'],
+            'open_cases': case_stats['open_cases'],
+            'active_cases': case_stats['active_cases'],
+            'resolved_cases': case_stats['resolved_cases'],
+            'closed_cases': case_stats['closed_cases']
         },
+        'financial_stats': financial_stats,
         'recent_activity': {
             'recent_cases': [{
                 'id': case.id,
@@ -159,7 +102,7 @@ def dashboard():
                 'created_at': log.created_at.isoformat()
             } for log in recent_activities]
         },
-        'monthly_stats': list(reversed(monthly_stats))  # Most recent first
+        'monthly_stats': snapshot['monthly_stats']  # Oldest first
     }
     
     return jsonify(dashboard_data), 200
@@ -187,9 +130,10 @@ def lawyers():
             (User.username.ilike(search_term))
         )
     
-    lawyers_pagination = query.order_by(desc(User.created_at)).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    try:
+        lawyers_pagination = paginate_query(query, User.created_at, User.id, page, per_page)
+    except InvalidCursor:
+        return invalid_cursor_response()
     
     lawyers_data = [{
         'id': lawyer.id,
@@ -220,7 +164,8 @@ def lawyers():
             'has_prev': lawyers_pagination.has_prev,
             'has_next': lawyers_pagination.has_next,
             'prev_num': lawyers_pagination.prev_num,
-            'next_num': lawyers_pagination.next_num
+            'next_num': lawyers_pagination.next_num,
+            'next_cursor': lawyers_pagination.next_cursor
         },
         'filters': {
             'current_status': status_filter,
@@ -238,7 +183,7 @@ def lawyer_detail(lawyer_id):
         return jsonify({'error': 'Lawyer not found'}), 404
     
     # Get lawyer's cases
-    lawyer_cases = Case.query.filter_by(lawyer_id=lawyer.id).order_by(desc(Case.created_at)).all()
+    lawyer_cases = case_query('client').filter_by(lawyer_id=lawyer.id).order_by(desc(Case.created_at)).all()
     
     # Get lawyer's earnings
     total_earnings = db.session.query(func.sum(Transaction.amount)).filter(
@@ -325,6 +270,8 @@ def approve_lawyer(lawyer_id):
         db.session.add(activity)
         
         db.session.commit()
+        invalidate_identity(lawyer.id)
+        invalidate_dashboard_snapshot()
         
         return jsonify({
             'success': 'Lawyer approved successfully',
@@ -375,6 +322,8 @@ def reject_lawyer(lawyer_id):
         db.session.add(activity)
         
         db.session.commit()
+        invalidate_identity(lawyer.id)
+        invalidate_dashboard_snapshot()
         
         return jsonify({
             'success': 'Lawyer rejected successfully',
@@ -411,9 +360,10 @@ def clients():
         active_status = is_active.lower() == 'true'
         query = query.filter(User.is_active == active_status)
     
-    clients_pagination = query.order_by(desc(User.created_at)).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    try:
+        clients_pagination = paginate_query(query, User.created_at, User.id, page, per_page)
+    except InvalidCursor:
+        return invalid_cursor_response()
     
     clients_data = [{
         'id': client.id,
@@ -439,7 +389,8 @@ def clients():
             'has_prev': clients_pagination.has_prev,
             'has_next': clients_pagination.has_next,
             'prev_num': clients_pagination.prev_num,
-            'next_num': clients_pagination.next_num
+            'next_num': clients_pagination.next_num,
+            'next_cursor': clients_pagination.next_cursor
         },
         'filters': {
             'current_search': search,
@@ -457,7 +408,7 @@ def client_detail(client_id):
         return jsonify({'error': 'Client not found'}), 404
     
     # Get client's cases
-    client_cases = Case.query.filter_by(client_id=client_id).order_by(desc(Case.created_at)).all()
+    client_cases = case_query('lawyer').filter_by(client_id=client_id).order_by(desc(Case.created_at)).all()
     
     # Get client's spending
     total_spent = db.session.query(func.sum(Transaction.amount)).filter(
@@ -514,7 +465,7 @@ def cases():
     service_filter = request.args.get('service_id', type=int)
     search = request.args.get('search', '')
     
-    query = Case.query.join(User, Case.client_id == User.id)
+    query = case_query().join(User, Case.client_id == User.id)
     
     if status_filter:
         query = query.filter(Case.status == status_filter)
@@ -535,9 +486,10 @@ def cases():
             (User.last_name.ilike(search_term))
         )
     
-    cases_pagination = query.order_by(desc(Case.created_at)).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    try:
+        cases_pagination = paginate_query(query, Case.created_at, Case.id, page, per_page)
+    except InvalidCursor:
+        return invalid_cursor_response()
     
     # Get legal services for filters
     services = LegalService.query.filter_by(is_active=True).all()
@@ -581,7 +533,8 @@ def cases():
             'has_prev': cases_pagination.has_prev,
             'has_next': cases_pagination.has_next,
             'prev_num': cases_pagination.prev_num,
-            'next_num': cases_pagination.next_num
+            'next_num': cases_pagination.next_num,
+            'next_cursor': cases_pagination.next_cursor
         },
         'filters': {
             'current_status': status_filter,
@@ -605,7 +558,7 @@ def case_detail(case_id):
         return jsonify({'error': 'Case not found'}), 404
     
     # Get related data
-    documents = Document.query.filter_by(case_id=case_id).all()
+    documents = document_query('uploaded_by').filter_by(case_id=case_id).all()
     transactions = Transaction.query.filter_by(case_id=case_id).all()
     invoices = Invoice.query.filter_by(case_id=case_id).all()
     lawyer_requests = LawyerRequest.query.filter_by(case_id=case_id).all()
@@ -798,6 +751,7 @@ def assign_lawyers_to_case(case_id):
         if assigned:
             print(f"💾 DEBUG: Committing {len(assigned)} assignment(s) to database...")
             db.session.commit()
+            invalidate_dashboard_snapshot()
             print(f"🎉 DEBUG: Successfully committed assignment for case {case_id}")
             
             # VERIFY: Query the case again to confirm changes
@@ -886,7 +840,7 @@ def transactions():
     status_filter = request.args.get('status')
     type_filter = request.args.get('type')
     
-    query = Transaction.query
+    query = transaction_query()
     
     if status_filter:
         query = query.filter(Transaction.status == status_filter)
@@ -894,9 +848,10 @@ def transactions():
     if type_filter:
         query = query.filter(Transaction.transaction_type == type_filter)
     
-    transactions_pagination = query.order_by(desc(Transaction.created_at)).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    try:
+        transactions_pagination = paginate_query(query, Transaction.created_at, Transaction.id, page, per_page)
+    except InvalidCursor:
+        return invalid_cursor_response()
     
     transactions_data = [{
         'id': t.id,
@@ -934,7 +889,8 @@ def transactions():
             'has_prev': transactions_pagination.has_prev,
             'has_next': transactions_pagination.has_next,
             'prev_num': transactions_pagination.prev_num,
-            'next_num': transactions_pagination.next_num
+            'next_num': transactions_pagination.next_num,
+            'next_cursor': transactions_pagination.next_cursor
         },
         'filters': {
             'current_status': status_filter,
@@ -991,6 +947,7 @@ def create_legal_service():
         db.session.add(activity)
         
         db.session.commit()
+        invalidate_dashboard_snapshot()
         
         return jsonify({
             'success': 'Legal service created successfully',
@@ -1039,6 +996,7 @@ def edit_legal_service(service_id):
         db.session.add(activity)
         
         db.session.commit()
+        invalidate_dashboard_snapshot()
         
         return jsonify({
             'success': 'Legal service updated successfully',
@@ -1072,9 +1030,10 @@ def activity_logs():
     if user_filter:
         query = query.filter(ActivityLog.user_id == user_filter)
     
-    logs_pagination = query.order_by(desc(ActivityLog.created_at)).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    try:
+        logs_pagination = paginate_query(query, ActivityLog.created_at, ActivityLog.id, page, per_page)
+    except InvalidCursor:
+        return invalid_cursor_response()
     
     # Get all users for filter dropdown
     users = User.query.all()
@@ -1103,7 +1062,8 @@ def activity_logs():
             'has_prev': logs_pagination.has_prev,
             'has_next': logs_pagination.has_next,
             'prev_num': logs_pagination.prev_num,
-            'next_num': logs_pagination.next_num
+            'next_num': logs_pagination.next_num,
+            'next_cursor': logs_pagination.next_cursor
         },
         'filters': {
             'current_action': action_filter,
@@ -1116,6 +1076,56 @@ def activity_logs():
         } for user in users]
     }), 200
 
+@admin_bp.route('/exports/<dataset>', methods=['GET'])
+@admin_required
+def export_dataset(dataset):
+    """Download cases, invoices or transactions as Parquet or Arrow IPC.
+
+    ``partition=month`` returns a zip of ``month=YYYY-MM/part-0.*`` files.
+    """
+    if dataset not in DATASETS:
+        return jsonify({'error': f"Unknown dataset. Use one of: {', '.join(sorted(DATASETS))}"}), 404
+
+    file_format = request.args.get('format', 'parquet')
+    if file_format not in COLUMNAR_FORMATS:
+        return jsonify({'error': 'Invalid format. Use parquet or arrow'}), 400
+
+    partition_by_month = request.args.get('partition') == 'month'
+    date_from = request.args.get('date_from')
+    date_to = request.args.get('date_to')
+    try:
+        date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+        date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    if not columnar_exports_available():
+        return jsonify({'error': 'Parquet and Arrow exports require the pyarrow package'}), 501
+
+    # Spool to disk rather than memory; the temporary file is removed once the response is closed
+    output = tempfile.TemporaryFile()
+    try:
+        if partition_by_month:
+            with tempfile.TemporaryDirectory() as directory:
+                write_dataset(dataset, file_format, directory, date_from, date_to, partition_by_month=True)
+                with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+                    for root, _, files in os.walk(directory):
+                        for filename in sorted(files):
+                            path = os.path.join(root, filename)
+                            archive.write(path, os.path.relpath(path, directory))
+            download_name, mimetype = f'{dataset}.zip', 'application/zip'
+        else:
+            write_dataset(dataset, file_format, output, date_from, date_to)
+            download_name = f'{dataset}{COLUMNAR_FORMATS[file_format]}'
+            mimetype = 'application/vnd.apache.parquet' if file_format == 'parquet' else 'application/vnd.apache.arrow.file'
+        output.seek(0)
+    except Exception as e:
+        output.close()
+        current_app.logger.error(f"Error exporting {dataset}: {str(e)}")
+        return jsonify({'error': f'Failed to export {dataset}'}), 500
+
+    return send_file(output, mimetype=mimetype, as_attachment=True, download_name=download_name)
+
 @admin_bp.route('/reports', methods=['GET'])
 @admin_required
 def reports():
@@ -1231,6 +1241,8 @@ def toggle_user_active_status(user_id):
         db.session.add(activity)
         
         db.session.commit()
+        invalidate_identity(user.id)
+        invalidate_dashboard_snapshot()
         
         return jsonify({
             'success': f'User {status} successfully',
@@ -1242,75 +1254,138 @@ def toggle_user_active_status(user_id):
         db.session.rollback()
         return jsonify({'error': f'Failed to update user status: {str(e)}'}), 400
 
+def _recently_active_case_ids(limit, since=None):
+    """Ids of every case that can be among the ``limit`` most recently active.
+
+    That is the cases of the newest messages (read newest first through
+    ix_chats_created until ``limit`` distinct cases are found) plus the
+    ``limit`` newest cases, which count by their own created_at while they have
+    no messages.
+    """
+    chats = db.session.query(Chat.case_id, Chat.created_at, Chat.id)
+    cases = db.session.query(Case.id)
+    if since:
+        chats = chats.filter(Chat.created_at > since)
+        cases = cases.filter(Case.created_at > since)
+
+    case_ids = set()
+    batch_size = limit * 10
+    while len(case_ids) < limit:
+        rows = chats.order_by(Chat.created_at.desc(), Chat.id.desc()).limit(batch_size).all()
+        case_ids.update(row.case_id for row in rows)
+        if len(rows) < batch_size:
+            break
+        last = rows[-1]
+        chats = chats.filter(or_(
+            Chat.created_at < last.created_at,
+            and_(Chat.created_at == last.created_at, Chat.id < last.id)
+        ))
+
+    newest = cases.order_by(Case.created_at.desc(), Case.id.desc()).limit(limit)
+    case_ids.update(case_id for case_id, in newest)
+    return case_ids
+
 @admin_bp.route('/chat-activities', methods=['GET'])
 @admin_required
 def get_chat_activities():
-    """Get recent chat activities for admin dashboard"""
+    """Get recent chat activities for admin dashboard.
+
+    Optional ``since`` (ISO timestamp, e.g. the newest ``last_activity`` already shown)
+    returns only cases whose activity is newer, for incremental polling.
+    """
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({'error': 'Invalid since parameter'}), 400
+
     try:
-        # Get all cases with their chats
-        cases = Case.query.order_by(db.desc(Case.updated_at)).limit(50).all()
-        
+        # Window functions below only run over the chats of these cases
+        case_ids = _recently_active_case_ids(limit, since)
+        if not case_ids:
+            return jsonify([])
+
+        order = (Chat.created_at.desc(), Chat.id.desc())
+        ranked = db.session.query(
+            Chat.id, Chat.case_id, Chat.sender_id, Chat.message, Chat.is_read, Chat.created_at,
+            func.row_number().over(partition_by=Chat.case_id, order_by=order).label('position'),
+            func.first_value(Chat.sender_id).over(partition_by=Chat.case_id, order_by=order).label('latest_sender_id')
+        ).filter(Chat.case_id.in_(case_ids)).subquery()
+
+        # Latest message per case with message and unread counts (messages from the other party)
+        unread = sql_case((and_(ranked.c.is_read == False, ranked.c.sender_id != ranked.c.latest_sender_id), 1), else_=0)
+        counted = db.session.query(
+            ranked,
+            func.count().over(partition_by=ranked.c.case_id).label('message_count'),
+            func.sum(unread).over(partition_by=ranked.c.case_id).label('unread_count')
+        ).subquery()
+        latest = db.session.query(counted).filter(counted.c.position == 1).subquery()
+
+        client = aliased(User)
+        lawyer = aliased(User)
+        sender = aliased(User)
+        last_activity = func.coalesce(latest.c.created_at, Case.created_at)
+
+        query = db.session.query(
+            Case.id, Case.title, Case.case_number, Case.client_id, Case.lawyer_id, Case.status, Case.created_at,
+            latest.c.id.label('chat_id'), latest.c.sender_id, latest.c.message, latest.c.created_at.label('chat_created_at'),
+            latest.c.message_count, latest.c.unread_count,
+            client.first_name.label('client_first_name'), client.last_name.label('client_last_name'),
+            lawyer.first_name.label('lawyer_first_name'), lawyer.last_name.label('lawyer_last_name'),
+            sender.first_name.label('sender_first_name'), sender.last_name.label('sender_last_name')
+        ).outerjoin(latest, latest.c.case_id == Case.id)\
+            .outerjoin(client, client.id == Case.client_id)\
+            .outerjoin(lawyer, lawyer.id == Case.lawyer_id)\
+            .outerjoin(sender, sender.id == latest.c.sender_id)\
+            .filter(Case.id.in_(case_ids))
+
+        if since:
+            query = query.filter(last_activity > since)
+
+        rows = query.order_by(last_activity.desc(), Case.id.desc()).limit(limit).all()
+
         chat_activities = []
-        
-        for case in cases:
-            # Get the most recent chat message for this case
-            recent_chat = Chat.query.filter_by(case_id=case.id)\
-                .order_by(db.desc(Chat.created_at)).first()
-            
-            if recent_chat:
-                # Get message count
-                message_count = Chat.query.filter_by(case_id=case.id).count()
-                
-                # Get unread count (messages not read by the other party)
-                unread_count = Chat.query.filter(
-                    Chat.case_id == case.id,
-                    Chat.is_read == False,
-                    Chat.sender_id != recent_chat.sender_id  # Messages from the other party
-                ).count()
-                
-                chat_activities.append({
-                    'id': f"{case.id}-{recent_chat.id}",
-                    'case_id': case.id,
-                    'case_title': case.title,
-                    'case_number': case.case_number,
-                    'client_id': case.client_id,
-                    'client_name': case.client.get_full_name(),
-                    'lawyer_id': case.lawyer_id,
-                    'lawyer_name': case.lawyer.get_full_name() if case.lawyer else 'Unassigned',
-                    'last_message': recent_chat.message,
-                    'last_message_type': 'Client' if recent_chat.sender_id == case.client_id else 'Lawyer',
-                    'sender_name': recent_chat.sender.get_full_name(),
-                    'last_activity': recent_chat.created_at.isoformat(),
-                    'message_count': message_count,
+        for row in rows:
+            activity = {
+                'case_id': row.id,
+                'case_title': row.title,
+                'case_number': row.case_number,
+                'client_id': row.client_id,
+                'client_name': f"{row.client_first_name} {row.client_last_name}",
+                'lawyer_id': row.lawyer_id,
+                'lawyer_name': f"{row.lawyer_first_name} {row.lawyer_last_name}" if row.lawyer_id else 'Unassigned',
+                'case_status': row.status
+            }
+
+            if row.chat_id:
+                unread_count = row.unread_count or 0
+                activity.update({
+                    'id': f"{row.id}-{row.chat_id}",
+                    'last_message': row.message,
+                    'last_message_type': 'Client' if row.sender_id == row.client_id else 'Lawyer',
+                    'sender_name': f"{row.sender_first_name} {row.sender_last_name}",
+                    'last_activity': row.chat_created_at.isoformat(),
+                    'message_count': row.message_count,
                     'has_unread': unread_count > 0,
-                    'unread_count': unread_count,
-                    'case_status': case.status
+                    'unread_count': unread_count
                 })
             else:
                 # Include cases even if they have no chats yet
-                chat_activities.append({
-                    'id': f"case-{case.id}",
-                    'case_id': case.id,
-                    'case_title': case.title,
-                    'case_number': case.case_number,
-                    'client_id': case.client_id,
-                    'client_name': case.client.get_full_name(),
-                    'lawyer_id': case.lawyer_id,
-                    'lawyer_name': case.lawyer.get_full_name() if case.lawyer else 'Unassigned',
+                activity.update({
+                    'id': f"case-{row.id}",
                     'last_message': 'No messages yet',
                     'last_message_type': 'None',
                     'sender_name': 'System',
-                    'last_activity': case.created_at.isoformat(),
+                    'last_activity': row.created_at.isoformat(),
                     'message_count': 0,
                     'has_unread': False,
-                    'unread_count': 0,
-                    'case_status': case.status
+                    'unread_count': 0
                 })
-        
-        # Sort by most recent activity
-        chat_activities.sort(key=lambda x: x['last_activity'], reverse=True)
-        
-        return jsonify(chat_activities[:20])  # Return top 20 most recent
+            chat_activities.append(activity)
+
+        return jsonify(chat_activities)
         
     except Exception as e:
         current_app.logger.error(f"Error getting chat activities: {str(e)}")
@@ -1322,11 +1397,11 @@ def get_all_chats():
     """Get all chats for admin monitoring"""
     try:
         # Get recent chats across all cases
-        recent_chats = Chat.query.order_by(db.desc(Chat.created_at)).limit(100).all()
+        recent_chats = chat_query('sender', 'case.client', 'case.lawyer').order_by(db.desc(Chat.created_at)).limit(100).all()
         
         chats_data = []
         for chat in recent_chats:
-            case = Case.query.get(chat.case_id)
+            case = chat.case
             if case:
                 chats_data.append({
                     'id': chat.id,
@@ -1355,14 +1430,19 @@ def get_all_chats():
 @admin_required
 def api_dashboard_stats():
     """API endpoint for dashboard statistics (legacy)"""
+    snapshot = get_dashboard_snapshot()
+    user_stats = snapshot['user_stats']
+    case_stats = snapshot['case_stats']
+    financial_stats = snapshot['financial_stats']
+    
     stats = {
-        'totalLawyers': User.query.filter_by(user_type='lawyer').count(),
-        'totalClients': User.query.filter_by(user_type='client').count(),
-        'activeCases': Case.query.filter(Case.status.in_(['open', 'assigned', 'in_progress'])).count(),
-        'pendingApprovals': User.query.filter_by(user_type='lawyer', approval_status='pending').count(),
-        'unassignedCases': Case.query.filter_by(status='open').count(),
-        'revenue': float(db.session.query(func.sum(Transaction.amount)).filter(Transaction.status == 'completed').scalar() or 0),
-        'totalCases': Case.query.count(),
-        'pendingInvoices': Invoice.query.filter_by(status='sent').count()
+        'totalLawyers': user_stats['total_lawyers'],
+        'totalClients': user_stats['total_clients'],
+        'activeCases': case_stats['open_cases'] + case_stats['active_cases'],
+        'pendingApprovals': user_stats['pending_lawyers'],
+        'unassignedCases': case_stats['open_cases'],
+        'revenue': financial_stats['total_revenue'],
+        'totalCases': case_stats['total_cases'],
+        'pendingInvoices': financial_stats['pending_invoices']
     }
     return jsonify(stats), 200
\ No newline at end of file
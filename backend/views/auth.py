@@ -3,6 +3,7 @@ from models import db, User, TokenBlocklist
 from werkzeug.security import check_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, timezone
+from token_revocation import revocation_store
 
 auth_bp = Blueprint("auth_bp", __name__, url_prefix="/auth")
 
@@ -115,6 +116,7 @@ def logout():
     blocked_token = TokenBlocklist(jti=jti, created_at=now)
     db.session.add(blocked_token)
     db.session.commit()
+    revocation_store.revoke(jti, now)
     
     return jsonify({"success": "Successfully logged out"}), 200
 
@@ -3,6 +3,11 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Case, LegalService, LawyerRequest, Document, Notification, User
 from datetime import datetime
 from decimal import Decimal
+from decorators import get_current_identity, get_current_user
+from user_stats import get_user_stats
+from dashboard import get_dashboard_snapshot
+from queries import case_query, document_query, cases_matching_specializations
+from pagination import keyset_paginate, paginated_response, InvalidCursor, invalid_cursor_response
 
 case_bp = Blueprint("case_bp", __name__, url_prefix="/case")
 
@@ -11,7 +16,7 @@ case_bp = Blueprint("case_bp", __name__, url_prefix="/case")
 @jwt_required()
 def get_cases():
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_identity()
     
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -20,15 +25,14 @@ def get_cases():
     status_filter = request.args.get('status')
     priority_filter = request.args.get('priority')
     service_filter = request.args.get('service')
-    limit = request.args.get('limit', type=int)
     
     # Filter based on user type
     if user.user_type == 'client':
-        query = Case.query.filter_by(client_id=current_user_id)
+        query = case_query().filter_by(client_id=current_user_id)
     elif user.user_type == 'lawyer':
-        query = Case.query.filter_by(lawyer_id=current_user_id)
+        query = case_query().filter_by(lawyer_id=current_user_id)
     else:  # admin
-        query = Case.query
+        query = case_query()
     
     # Apply filters
     if status_filter:
@@ -40,12 +44,11 @@ def get_cases():
     if service_filter:
         query = query.filter_by(legal_service_id=service_filter)
     
-    query = query.order_by(Case.created_at.desc())
-    
-    if limit:
-        query = query.limit(limit)
-    
-    cases = query.all()
+    try:
+        page = keyset_paginate(query, Case.created_at, Case.id)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    cases = page.items
     
     case_list = []
     for case in cases:
@@ -71,14 +74,14 @@ def get_cases():
         }
         case_list.append(case_data)
     
-    return jsonify(case_list), 200
+    return paginated_response(case_list, page)
 
 # Get specific case
 @case_bp.route("/<case_id>", methods=["GET"])
 @jwt_required()
 def get_case(case_id):
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_identity()
     
     case = Case.query.get(case_id)
     if not case:
@@ -91,7 +94,7 @@ def get_case(case_id):
         return jsonify({"error": "Access denied"}), 403
     
     # Get case documents
-    documents = Document.query.filter_by(case_id=case_id).order_by(
+    documents = document_query('uploaded_by').filter_by(case_id=case_id).order_by(
         Document.created_at.desc()
     ).all()
     
@@ -158,7 +161,7 @@ def get_case(case_id):
 @jwt_required()
 def create_case():
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     
     if user.user_type != 'client':
         return jsonify({"error": "Only clients can create cases"}), 403
@@ -228,7 +231,7 @@ def create_case():
 @jwt_required()
 def update_case_status(case_id):
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_identity()
     
     case = Case.query.get(case_id)
     if not case:
@@ -277,7 +280,7 @@ def update_case_status(case_id):
 @jwt_required()
 def search_cases():
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_identity()
     
     search_query = request.args.get('q', '')
     if len(search_query) < 2:
@@ -285,11 +288,11 @@ def search_cases():
     
     # Filter based on user type
     if user.user_type == 'client':
-        query = Case.query.filter_by(client_id=current_user_id)
+        query = case_query('client', 'lawyer').filter_by(client_id=current_user_id)
     elif user.user_type == 'lawyer':
-        query = Case.query.filter_by(lawyer_id=current_user_id)
+        query = case_query('client', 'lawyer').filter_by(lawyer_id=current_user_id)
     else:  # admin
-        query = Case.query
+        query = case_query('client', 'lawyer')
     
     # Search in case title and case number
     cases = query.filter(
@@ -318,7 +321,7 @@ def search_cases():
 @jwt_required()
 def get_available_cases():
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     
     if user.user_type != 'lawyer':
         return jsonify({"error": "Only lawyers can view available cases"}), 403
@@ -326,21 +329,13 @@ def get_available_cases():
     if user.approval_status != 'approved':
         return jsonify({"error": "Lawyer account not approved"}), 403
     
-    # Get lawyer's specializations
-    specialization_list = user.specializations.split(',') if user.specializations else []
-    if not specialization_list:
-        return jsonify([]), 200
-    
-    specialization_ids = [int(id) for id in specialization_list]
-    
     # Query parameters
     priority_filter = request.args.get('priority')
     service_filter = request.args.get('service')
     limit = request.args.get('limit', 20, type=int)
     
-    query = Case.query.filter(
-        Case.status == 'open',
-        Case.legal_service_id.in_(specialization_ids)
+    query = cases_matching_specializations(current_user_id, case_query('client', 'legal_service')).filter(
+        Case.status == 'open'
     )
     
     if priority_filter:
@@ -380,34 +375,33 @@ def get_available_cases():
 @jwt_required()
 def get_case_stats():
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_identity()
     
     if not user:
         return jsonify({"error": "User not found"}), 404
     
-    # Filter based on user type
-    if user.user_type == 'client':
-        query = Case.query.filter_by(client_id=current_user_id)
-    elif user.user_type == 'lawyer':
-        query = Case.query.filter_by(lawyer_id=current_user_id)
+    # Clients and lawyers read their materialized row, admins the platform snapshot
+    if user.user_type in ['client', 'lawyer']:
+        user_stats = get_user_stats(current_user_id)
+        case_stats = {
+            "total_cases": user_stats.total_cases,
+            "open_cases": user_stats.open_cases,
+            "assigned_cases": user_stats.assigned_cases,
+            "in_progress_cases": user_stats.in_progress_cases,
+            "resolved_cases": user_stats.resolved_cases,
+            "closed_cases": user_stats.closed_cases
+        }
     else:  # admin
-        query = Case.query
-    
-    total_cases = query.count()
-    open_cases = query.filter_by(status='open').count()
-    assigned_cases = query.filter_by(status='assigned').count()
-    in_progress_cases = query.filter_by(status='in_progress').count()
-    resolved_cases = query.filter_by(status='resolved').count()
-    closed_cases = query.filter_by(status='closed').count()
+        case_stats = get_dashboard_snapshot()['case_stats']
     
     stats = {
-        "total_cases": total_cases,
-        "open_cases": open_cases,
-        "assigned_cases": assigned_cases,
-        "in_progress_cases": in_progress_cases,
-        "resolved_cases": resolved_cases,
-        "closed_cases": closed_cases,
-        "active_cases": assigned_cases + in_progress_cases
+        "total_cases": case_stats['total_cases'],
+        "open_cases": case_stats['open_cases'],
+        "assigned_cases": case_stats['assigned_cases'],
+        "in_progress_cases": case_stats['in_progress_cases'],
+        "resolved_cases": case_stats['resolved_cases'],
+        "closed_cases": case_stats['closed_cases'],
+        "active_cases": case_stats['assigned_cases'] + case_stats['in_progress_cases']
     }
     
     return jsonify(stats), 200
\ No newline at end of file
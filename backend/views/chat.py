@@ -1,10 +1,15 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, make_response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_login import login_required, current_user
 from models import db, Case, Chat, Notification, User
+from pagination import get_page_size
+from read_state import mark_chats_read
+from realtime import emit_to_case
+from blob_store import store_upload
+from numbering import next_number
 from datetime import datetime
-import os
-from werkzeug.utils import secure_filename
+import hashlib
+from sqlalchemy import func
 
 chat_bp = Blueprint('chat', __name__, url_prefix='/chat')
 
@@ -29,13 +34,53 @@ def api_messages(case_id):
     elif current_user.user_type == 'lawyer' and case.lawyer_id != current_user.id:
         return jsonify({'error': 'Access denied'}), 403
     
-    messages = Chat.query.filter_by(case_id=case_id).order_by(
-        Chat.created_at.asc()
-    ).all()
+    try:
+        after_id = int(request.args['after_id']) if 'after_id' in request.args else None
+        before_id = int(request.args['before_id']) if 'before_id' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'after_id and before_id must be integers'}), 400
+    # Without a limit the whole (remaining) history is returned, as before
+    limit = get_page_size() if 'limit' in request.args else None
+    
+    # Cheap validator over the (case_id, id) index: changes whenever a message is
+    # added, deleted or marked read, so unchanged polls can be answered with a 304
+    count, last_id, read_count = db.session.query(
+        func.count(Chat.id), func.max(Chat.id), func.count(Chat.id).filter(Chat.is_read == True)
+    ).filter(Chat.case_id == case.id).one()
+    etag = hashlib.sha1(
+        f'{case.id}:{current_user.id}:{count}:{last_id}:{read_count}:{request.query_string.decode()}'.encode()
+    ).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    
+    query = Chat.query.filter(Chat.case_id == case.id)
+    if after_id is not None:
+        query = query.filter(Chat.id > after_id)
+    if before_id is not None:
+        query = query.filter(Chat.id < before_id)
     
-    return jsonify([{
+    if limit is not None and after_id is None:
+        # Latest page (or the page just before before_id): newest rows first, then restore order
+        messages = query.order_by(Chat.id.desc()).limit(limit).all()
+        messages.reverse()
+    else:
+        query = query.order_by(Chat.id.asc())
+        messages = query.limit(limit).all() if limit is not None else query.all()
+    
+    # Resolve every sender's name with one query instead of one per message
+    sender_ids = {msg.sender_id for msg in messages}
+    sender_names = {
+        user_id: f"{first_name} {last_name}"
+        for user_id, first_name, last_name in db.session.query(
+            User.id, User.first_name, User.last_name
+        ).filter(User.id.in_(sender_ids))
+    } if sender_ids else {}
+    
+    response = jsonify([{
         'id': msg.id,
-        'sender_name': msg.sender.get_full_name(),
+        'sender_name': sender_names.get(msg.sender_id),
         'sender_id': msg.sender_id,
         'message': msg.message,
         'created_at': msg.created_at.strftime('%Y-%m-%d %H:%M:%S'),
@@ -43,6 +88,9 @@ def api_messages(case_id):
         'is_read': msg.is_read,
         'attachment': msg.attachment  # Use correct field name
     } for msg in messages])
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @chat_bp.route('/<case_id>/send', methods=['POST'])
 @jwt_required()
@@ -77,16 +125,11 @@ def send_message(case_id):
         return jsonify({'error': 'Message or file required'}), 400
 
     attachment_path = None
-    if file:
-        # Save file to uploads/documents/chat_<case_id>_<timestamp>_<filename>
-        uploads_dir = os.path.join('uploads', 'documents')
-        os.makedirs(uploads_dir, exist_ok=True)
-        filename = f"chat_{case_id}_{int(datetime.utcnow().timestamp())}_{secure_filename(file.filename)}"
-        file_path = os.path.join(uploads_dir, filename)
-        file.save(file_path)
-        attachment_path = f"/{file_path}"
-
     try:
+        if file:
+            # Save file to the content-addressed blob store (deduplicated by SHA-256)
+            attachment_path = f"/{store_upload(file)}"
+
         # Create chat message - only use fields that exist in your model
         message = Chat(
             case_id=case_id,
@@ -111,18 +154,16 @@ def send_message(case_id):
         db.session.commit()
 
         # Emit socket event for real-time chat
-        socketio = current_app.extensions.get('socketio')
-        if socketio:
-            socketio.emit('new_chat_message', {
-                'case_id': case_id,
-                'id': message.id,
-                'sender_name': current_user.get_full_name(),
-                'sender_id': current_user.id,
-                'message': message.message,
-                'created_at': message.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'attachment': message.attachment,  # Use correct field name
-                'is_read': message.is_read
-            }, room=f'case_{case_id}')
+        emit_to_case(case.id, 'new_chat_message', {
+            'case_id': case.id,
+            'id': message.id,
+            'sender_name': current_user.get_full_name(),
+            'sender_id': current_user.id,
+            'message': message.message,
+            'created_at': message.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'attachment': message.attachment,  # Use correct field name
+            'is_read': message.is_read
+        })
 
         return jsonify({
             'success': True,
@@ -194,7 +235,7 @@ def create_direct_chat_case():
         status='active',
         lawyer_id=current_user.id,
         client_id=client_id,
-        case_number=f"CHAT-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+        case_number=next_number('CHAT')
     )
     
     try:
@@ -237,16 +278,8 @@ def chat_room(case_id):
     ).all()
     
     # Mark messages as read
-    unread_messages = Chat.query.filter(
-        Chat.case_id == case_id,
-        Chat.sender_id != current_user.id,
-        Chat.is_read == False
-    ).all()
-    
-    for msg in unread_messages:
-        msg.is_read = True
-    
     try:
+        mark_chats_read(case_id, current_user.id)
         db.session.commit()
     except:
         db.session.rollback()
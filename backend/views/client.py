@@ -5,6 +5,8 @@ from models import (db, Case, LegalService, LawyerRequest, Notification,
 from werkzeug.security import generate_password_hash
 from datetime import datetime
 from decimal import Decimal
+from user_stats import get_user_stats
+from queries import case_query, document_query
 
 client_bp = Blueprint("client_bp", __name__, url_prefix="/client")
 
@@ -19,14 +21,10 @@ def get_dashboard():
         return jsonify({"error": "Client access required"}), 403
     
     # Get client statistics
-    total_cases = Case.query.filter_by(client_id=current_user_id).count()
-    active_cases = Case.query.filter_by(client_id=current_user_id).filter(
-        Case.status.in_(['open', 'assigned', 'in_progress'])
-    ).count()
-    resolved_cases = Case.query.filter_by(client_id=current_user_id, status='resolved').count()
+    user_stats = get_user_stats(current_user_id)
     
     # Get recent cases
-    recent_cases = Case.query.filter_by(client_id=current_user_id).order_by(
+    recent_cases = case_query('legal_service').filter_by(client_id=current_user_id).order_by(
         Case.created_at.desc()
     ).limit(5).all()
     
@@ -35,25 +33,13 @@ def get_dashboard():
         Notification.created_at.desc()
     ).limit(5).all()
     
-    # Get pending lawyer requests
-    pending_requests = LawyerRequest.query.join(Case).filter(
-        Case.client_id == current_user_id,
-        LawyerRequest.status == 'pending'
-    ).count()
-    
-    # Get total spent
-    total_spent = db.session.query(db.func.sum(Transaction.amount)).filter(
-        Transaction.client_id == current_user_id,
-        Transaction.status == 'completed'
-    ).scalar() or 0
-    
     dashboard_data = {
         "stats": {
-            "total_cases": total_cases,
-            "active_cases": active_cases,
-            "resolved_cases": resolved_cases,
-            "pending_requests": pending_requests,
-            "total_spent": float(total_spent)
+            "total_cases": user_stats.total_cases,
+            "active_cases": user_stats.open_cases + user_stats.assigned_cases + user_stats.in_progress_cases,
+            "resolved_cases": user_stats.resolved_cases,
+            "pending_requests": user_stats.pending_requests,
+            "total_spent": float(user_stats.completed_amount)
         },
         "recent_cases": [{
             "id": case.id,
@@ -144,7 +130,7 @@ def get_client_cases():
     service_filter = request.args.get('service')
     limit = request.args.get('limit', type=int)
     
-    query = Case.query.filter_by(client_id=current_user_id)
+    query = case_query('lawyer', 'legal_service').filter_by(client_id=current_user_id)
     
     if status_filter:
         query = query.filter_by(status=status_filter)
@@ -195,7 +181,7 @@ def get_case_detail(case_id):
     ).all()
     
     # Get case documents
-    documents = Document.query.filter_by(case_id=case_id).order_by(
+    documents = document_query('uploaded_by').filter_by(case_id=case_id).order_by(
         Document.created_at.desc()
     ).all()
     
@@ -419,24 +405,15 @@ def get_client_stats():
     if not user or user.user_type != 'client':
         return jsonify({"error": "Client access required"}), 403
     
+    user_stats = get_user_stats(current_user_id)
+    
     stats = {
-        "total_cases": Case.query.filter_by(client_id=current_user_id).count(),
-        "active_cases": Case.query.filter_by(client_id=current_user_id).filter(
-            Case.status.in_(['open', 'assigned', 'in_progress'])
-        ).count(),
-        "resolved_cases": Case.query.filter_by(client_id=current_user_id, status='resolved').count(),
-        "total_spent": float(db.session.query(db.func.sum(Transaction.amount)).filter(
-            Transaction.client_id == current_user_id,
-            Transaction.status == 'completed'
-        ).scalar() or 0),
-        "pending_requests": LawyerRequest.query.join(Case).filter(
-            Case.client_id == current_user_id,
-            LawyerRequest.status == 'pending'
-        ).count(),
-        "unread_notifications": Notification.query.filter_by(
-            recipient_id=current_user_id,
-            is_read=False
-        ).count()
+        "total_cases": user_stats.total_cases,
+        "active_cases": user_stats.open_cases + user_stats.assigned_cases + user_stats.in_progress_cases,
+        "resolved_cases": user_stats.resolved_cases,
+        "total_spent": float(user_stats.completed_amount),
+        "pending_requests": user_stats.pending_requests,
+        "unread_notifications": user_stats.unread_notifications
     }
     
     return jsonify(stats), 200
\ No newline at end of file
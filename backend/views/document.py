@@ -1,9 +1,9 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort
 from flask_login import login_required, current_user
 from models import db, Case, Document
 from werkzeug.utils import secure_filename
+from blob_store import store_upload, send_stored_file
 import os
-from datetime import datetime
 
 document_bp = Blueprint('document', __name__, url_prefix='/document')
 
@@ -54,14 +54,9 @@ def upload_post(case_id):
     if file and allowed_file(file.filename):
         try:
             filename = secure_filename(file.filename)
-            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S_')
-            filename = timestamp + filename
             
-            upload_folder = os.path.join('uploads', 'documents')
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            file_path = os.path.join(upload_folder, filename)
-            file.save(file_path)
+            # Stored once per distinct content; identical uploads share the blob
+            file_path = store_upload(file)
             
             # Get data from form instead of JSON
             document = Document(
@@ -97,25 +92,35 @@ def upload_post(case_id):
 @login_required
 def download(document_id):
     """Download a document"""
-    document = Document.query.get_or_404(document_id)
-    case = document.case
+    # Document and case ownership in one query
+    document = db.session.query(
+        Document.id, Document.title, Document.file_path, Case.id.label('case_id'), Case.client_id, Case.lawyer_id
+    ).join(Case, Document.case_id == Case.id).filter(Document.id == document_id).first()
+    if not document:
+        abort(404)
     
     # Check permissions
-    if current_user.user_type == 'client' and case.client_id != current_user.id:
+    if current_user.user_type == 'client' and document.client_id != current_user.id:
         flash('Access denied.', 'error')
         return redirect(url_for('main.home'))
-    elif current_user.user_type == 'lawyer' and case.lawyer_id != current_user.id:
+    elif current_user.user_type == 'lawyer' and document.lawyer_id != current_user.id:
         flash('Access denied.', 'error')
         return redirect(url_for('main.home'))
     elif current_user.user_type not in ['client', 'lawyer', 'admin']:
         flash('Access denied.', 'error')
         return redirect(url_for('main.home'))
     
+    # Name the download after the document rather than the stored (hashed) file
+    extension = os.path.splitext(document.file_path)[1]
+    download_name = secure_filename(document.title) or f'document-{document.id}'
+    if extension and not download_name.lower().endswith(extension.lower()):
+        download_name += extension
+    
     try:
-        return send_file(document.file_path, as_attachment=True)
+        return send_stored_file(document.file_path, download_name)
     except FileNotFoundError:
         flash('File not found.', 'error')
-        return redirect(url_for('case.detail', case_id=case.id))
+        return redirect(url_for('case.detail', case_id=document.case_id))
 
 @document_bp.route("/", methods=["GET"])
 def get_documents():
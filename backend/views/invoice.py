@@ -3,6 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Invoice, Transaction, Notification, User
 from datetime import datetime, date, timedelta
 from decimal import Decimal
+from queries import invoice_query
+from pagination import keyset_paginate, paginated_response, InvalidCursor, invalid_cursor_response
 
 invoice_bp = Blueprint("invoice_bp", __name__, url_prefix="/invoice")
 
@@ -18,11 +20,17 @@ def get_invoices():
     
     # Filter based on user type
     if user.user_type == 'client':
-        invoices = Invoice.query.filter_by(client_id=current_user_id).all()
+        query = invoice_query('client', 'lawyer').filter_by(client_id=current_user_id)
     elif user.user_type == 'lawyer':
-        invoices = Invoice.query.filter_by(lawyer_id=current_user_id).all()
+        query = invoice_query('client', 'lawyer').filter_by(lawyer_id=current_user_id)
     else:  # admin
-        invoices = Invoice.query.all()
+        query = invoice_query('client', 'lawyer')
+    
+    try:
+        page = keyset_paginate(query, Invoice.issue_date, Invoice.id)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    invoices = page.items
     
     invoice_list = []
     for invoice in invoices:
@@ -43,7 +51,7 @@ def get_invoices():
         }
         invoice_list.append(invoice_data)
     
-    return jsonify(invoice_list), 200
+    return paginated_response(invoice_list, page)
 
 # Get specific invoice
 @invoice_bp.route("/<invoice_id>", methods=["GET"])
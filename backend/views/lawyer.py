@@ -3,7 +3,15 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, Case, LegalService, LawyerRequest, Notification, Transaction, Invoice, Document
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from decorators import lawyer_required 
+from decorators import lawyer_required, get_current_user
+from user_stats import get_user_stats
+from queries import case_query, document_query, transaction_query, invoice_query, cases_matching_specializations
+from pagination import (keyset_paginate, paginated_response, get_page_size, encode_cursor, decode_cursor,
+                        Page, InvalidCursor, invalid_cursor_response)
+from dashboard import count_if
+from read_state import mark_notifications_read
+from numbering import next_number
+from sqlalchemy import func, or_, and_
 
 lawyer_bp = Blueprint('lawyer', __name__, url_prefix='/lawyer')
 
@@ -13,7 +21,7 @@ def pending_approval():
     """Pending approval status for lawyers"""
     current_user_id = get_jwt_identity()
     
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
@@ -30,38 +38,13 @@ def dashboard():
     current_user_id = get_jwt_identity()
     
     # Get lawyer statistics
-    total_cases = Case.query.filter_by(lawyer_id=current_user_id).count()
-    active_cases = Case.query.filter_by(
-        lawyer_id=current_user_id
-    ).filter(Case.status.in_(['assigned', 'in_progress'])).count()
-    
-    resolved_cases = Case.query.filter_by(
-        lawyer_id=current_user_id, 
-        status='resolved'
-    ).count()
+    user_stats = get_user_stats(current_user_id)
     
     # Get available cases based on specializations
-    lawyer = User.query.get(current_user_id)
-    available_cases_count = 0
-    if lawyer and lawyer.specializations:
-        specialization_list = lawyer.specializations.split(',')
-        available_cases_count = Case.query.filter(
-            Case.status == 'open',
-            Case.legal_service_id.in_([int(id) for id in specialization_list])
-        ).count()
-    
-    # Get pending requests sent by this lawyer
-    pending_requests = LawyerRequest.query.filter_by(
-        lawyer_id=current_user_id,
-        status='pending'
+    available_cases_count = cases_matching_specializations(current_user_id).filter(
+        Case.status == 'open'
     ).count()
     
-    # Get total earnings
-    total_earnings = db.session.query(db.func.sum(Transaction.amount)).filter(
-        Transaction.lawyer_id == current_user_id,
-        Transaction.status == 'completed'
-    ).scalar() or 0
-    
     # Get recent notifications
     recent_notifications = Notification.query.filter_by(
         recipient_id=current_user_id
@@ -78,12 +61,12 @@ def dashboard():
     
     return jsonify({
         'stats': {
-            'total_cases': total_cases,
-            'active_cases': active_cases,
-            'resolved_cases': resolved_cases,
+            'total_cases': user_stats.total_cases,
+            'active_cases': user_stats.assigned_cases + user_stats.in_progress_cases,
+            'resolved_cases': user_stats.resolved_cases,
             'available_cases': available_cases_count,
-            'pending_requests': pending_requests,
-            'total_earnings': float(total_earnings)
+            'pending_requests': user_stats.pending_requests,
+            'total_earnings': float(user_stats.completed_amount)
         },
         'recent_notifications': notifications_data
     }), 200
@@ -95,7 +78,7 @@ def get_profile():
     """Get lawyer profile"""
     current_user_id = get_jwt_identity()
     
-    lawyer = User.query.get(current_user_id)
+    lawyer = get_current_user()
     if not lawyer:
         return jsonify({'error': 'Profile not found'}), 404
     
@@ -127,7 +110,7 @@ def update_profile():
     data = request.get_json()
     
     try:
-        lawyer = User.query.get(current_user_id)
+        lawyer = get_current_user()
         if not lawyer:
             return jsonify({'error': 'Profile not found'}), 404
         
@@ -151,7 +134,7 @@ def update_profile():
         if 'hourly_rate' in data:
             lawyer.hourly_rate = Decimal(str(data['hourly_rate'])) if data['hourly_rate'] else None
         if 'specializations' in data:
-            lawyer.specializations = ','.join(map(str, data['specializations'])) if data['specializations'] else None
+            lawyer.set_specializations(data['specializations'])
         
         lawyer.updated_at = datetime.utcnow()
         db.session.commit()
@@ -232,7 +215,7 @@ def create_direct_chat_case():
             status='active',
             lawyer_id=current_user_id,
             client_id=client_id,
-            case_number=f"CHAT-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+            case_number=next_number('CHAT')
         )
         
         db.session.add(new_case)
@@ -264,7 +247,7 @@ def get_cases():
     priority_filter = request.args.get('priority')
     service_filter = request.args.get('service')
     
-    query = Case.query.filter_by(lawyer_id=current_user_id)
+    query = case_query('client', 'legal_service').filter_by(lawyer_id=current_user_id)
     
     if status_filter:
         query = query.filter_by(status=status_filter)
@@ -273,7 +256,11 @@ def get_cases():
     if service_filter:
         query = query.filter_by(legal_service_id=service_filter)
     
-    cases = query.order_by(Case.created_at.desc()).all()
+    try:
+        page = keyset_paginate(query, Case.created_at, Case.id)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    cases = page.items
     
     cases_data = []
     for case in cases:
@@ -296,7 +283,7 @@ def get_cases():
         }
         cases_data.append(case_data)
     
-    return jsonify(cases_data), 200
+    return paginated_response(cases_data, page)
 
 @lawyer_bp.route('/cases/<int:case_id>', methods=['GET'])
 @jwt_required()
@@ -310,7 +297,7 @@ def get_case_detail(case_id):
         return jsonify({'error': 'Case not found'}), 404
     
     # Get case documents
-    documents = Document.query.filter_by(case_id=case_id).order_by(
+    documents = document_query('uploaded_by').filter_by(case_id=case_id).order_by(
         Document.created_at.desc()
     ).all()
     
@@ -384,23 +371,12 @@ def get_available_cases():
     """Get available cases for lawyer's specializations"""
     current_user_id = get_jwt_identity()
     
-    lawyer = User.query.get(current_user_id)
-    if not lawyer or not lawyer.specializations:
-        return jsonify([]), 200
-    
-    specialization_list = lawyer.specializations.split(',')
-    specialization_ids = [int(id) for id in specialization_list if id.strip().isdigit()]
-    
-    if not specialization_ids:
-        return jsonify([]), 200
-    
     # Query parameters
     priority_filter = request.args.get('priority')
     service_filter = request.args.get('service')
     
-    query = Case.query.filter(
-        Case.status == 'open',
-        Case.legal_service_id.in_(specialization_ids)
+    query = cases_matching_specializations(current_user_id, case_query('client', 'legal_service')).filter(
+        Case.status == 'open'
     )
     
     if priority_filter:
@@ -586,12 +562,16 @@ def get_invoices():
     
     status_filter = request.args.get('status')
     
-    query = Invoice.query.filter_by(lawyer_id=current_user_id)
+    query = invoice_query('case', 'client').filter_by(lawyer_id=current_user_id)
     
     if status_filter:
         query = query.filter_by(status=status_filter)
     
-    invoices = query.order_by(Invoice.issue_date.desc()).all()
+    try:
+        page = keyset_paginate(query, Invoice.issue_date, Invoice.id)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    invoices = page.items
     
     invoices_data = []
     for invoice in invoices:
@@ -610,7 +590,7 @@ def get_invoices():
         }
         invoices_data.append(invoice_data)
     
-    return jsonify(invoices_data), 200
+    return paginated_response(invoices_data, page)
 
 @lawyer_bp.route('/invoices/<int:invoice_id>', methods=['GET'])
 @jwt_required()
@@ -738,12 +718,16 @@ def get_transactions():
     
     status_filter = request.args.get('status')
     
-    query = Transaction.query.filter_by(lawyer_id=current_user_id)
+    query = transaction_query('case', 'client').filter_by(lawyer_id=current_user_id)
     
     if status_filter:
         query = query.filter_by(status=status_filter)
     
-    transactions = query.order_by(Transaction.created_at.desc()).all()
+    try:
+        page = keyset_paginate(query, Transaction.created_at, Transaction.id)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    transactions = page.items
     
     transactions_data = []
     for transaction in transactions:
@@ -759,7 +743,7 @@ def get_transactions():
         }
         transactions_data.append(transaction_data)
     
-    return jsonify(transactions_data), 200
+    return paginated_response(transactions_data, page)
 
 @lawyer_bp.route('/documents', methods=['GET'])
 @jwt_required()
@@ -771,7 +755,7 @@ def get_documents():
     case_filter = request.args.get('case_id')
     doc_type_filter = request.args.get('type')
     
-    query = Document.query.join(Case).filter(Case.lawyer_id == current_user_id)
+    query = document_query().join(Case).filter(Case.lawyer_id == current_user_id)
     
     if case_filter:
         query = query.filter(Document.case_id == case_filter)
@@ -779,7 +763,11 @@ def get_documents():
     if doc_type_filter:
         query = query.filter(Document.document_type == doc_type_filter)
     
-    documents = query.order_by(Document.created_at.desc()).all()
+    try:
+        page = keyset_paginate(query, Document.created_at, Document.id)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    documents = page.items
     
     documents_data = []
     for doc in documents:
@@ -796,7 +784,7 @@ def get_documents():
         }
         documents_data.append(document_data)
     
-    return jsonify(documents_data), 200
+    return paginated_response(documents_data, page)
 
 @lawyer_bp.route('/notifications', methods=['GET'])
 @jwt_required()
@@ -805,9 +793,12 @@ def get_notifications():
     """Get lawyer notifications"""
     current_user_id = get_jwt_identity()
     
-    notifications = Notification.query.filter_by(
-        recipient_id=current_user_id
-    ).order_by(Notification.created_at.desc()).all()
+    query = Notification.query.filter_by(recipient_id=current_user_id)
+    try:
+        page = keyset_paginate(query, Notification.created_at, Notification.id)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    notifications = page.items
     
     notifications_data = [{
         'id': n.id,
@@ -820,22 +811,16 @@ def get_notifications():
     } for n in notifications]
     
     # Mark notifications as read
-    unread_notifications = Notification.query.filter_by(
-        recipient_id=current_user_id,
-        is_read=False
-    ).all()
-    
-    for notif in unread_notifications:
-        notif.is_read = True
-    
     try:
+        # Only this page: notifications on later pages have not been shown yet
+        mark_notifications_read(current_user_id, notification_ids=[n.id for n in notifications])
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         # Don't return error here, just log it
         print(f"Error marking notifications as read: {str(e)}")
     
-    return jsonify(notifications_data), 200
+    return paginated_response(notifications_data, page)
 
 @lawyer_bp.route('/stats', methods=['GET'])
 @jwt_required()
@@ -844,54 +829,22 @@ def get_stats():
     """Get lawyer statistics"""
     current_user_id = get_jwt_identity()
     
-    # Case statistics
-    total_cases = Case.query.filter_by(lawyer_id=current_user_id).count()
-    active_cases = Case.query.filter_by(lawyer_id=current_user_id).filter(
-        Case.status.in_(['assigned', 'in_progress'])
-    ).count()
-    resolved_cases = Case.query.filter_by(lawyer_id=current_user_id, status='resolved').count()
-    
-    # Financial statistics
-    total_earnings = db.session.query(db.func.sum(Transaction.amount)).filter(
-        Transaction.lawyer_id == current_user_id,
-        Transaction.status == 'completed'
-    ).scalar() or 0
-    
-    pending_invoices = Invoice.query.filter_by(
-        lawyer_id=current_user_id,
-        status='sent'
-    ).count()
-    
-    # Request statistics
-    pending_requests = LawyerRequest.query.filter_by(
-        lawyer_id=current_user_id,
-        status='pending'
-    ).count()
-    
-    # Notification statistics
-    unread_notifications = Notification.query.filter_by(
-        recipient_id=current_user_id,
-        is_read=False
-    ).count()
+    # Case, financial, request and notification counters from the materialized row
+    user_stats = get_user_stats(current_user_id)
     
     # Available cases based on specializations
-    lawyer = User.query.get(current_user_id)
-    available_cases = 0
-    if lawyer and lawyer.specializations:
-        specialization_list = lawyer.specializations.split(',')
-        available_cases = Case.query.filter(
-            Case.status == 'open',
-            Case.legal_service_id.in_([int(id) for id in specialization_list])
-        ).count()
+    available_cases = cases_matching_specializations(current_user_id).filter(
+        Case.status == 'open'
+    ).count()
     
     stats = {
-        'total_cases': total_cases,
-        'active_cases': active_cases,
-        'resolved_cases': resolved_cases,
-        'total_earnings': float(total_earnings),
-        'pending_invoices': pending_invoices,
-        'pending_requests': pending_requests,
-        'unread_notifications': unread_notifications,
+        'total_cases': user_stats.total_cases,
+        'active_cases': user_stats.assigned_cases + user_stats.in_progress_cases,
+        'resolved_cases': user_stats.resolved_cases,
+        'total_earnings': float(user_stats.completed_amount),
+        'pending_invoices': user_stats.pending_invoices,
+        'pending_requests': user_stats.pending_requests,
+        'unread_notifications': user_stats.unread_notifications,
         'available_cases': available_cases
     }
     
@@ -901,38 +854,76 @@ def get_stats():
 @jwt_required()
 @lawyer_required
 def get_clients():
-    """Get lawyer's clients"""
+    """Get lawyer's clients with per-client case counts.
+
+    Sorted by ``sort`` (last_activity, name, total_cases or active_cases) in ``order``
+    (asc/desc) and paged like the other list endpoints (``limit`` / ``cursor``).
+    """
     current_user_id = get_jwt_identity()
     
-    # Get cases assigned to this lawyer
-    cases = Case.query.filter_by(lawyer_id=current_user_id).all()
-    
-    # Extract unique clients from cases
-    client_ids = set(case.client_id for case in cases)
-    clients = User.query.filter(User.id.in_(client_ids)).all()
-    
-    clients_data = []
-    for client in clients:
-        # Get cases count for this client
-        client_cases = Case.query.filter_by(
-            lawyer_id=current_user_id,
-            client_id=client.id
-        ).all()
-        
-        # Get active cases
-        active_cases = [case for case in client_cases if case.status in ['assigned', 'in_progress']]
-        
-        clients_data.append({
-            'id': client.id,
-            'name': client.get_full_name(),
-            'email': client.email,
-            'phone': client.phone,
-            'total_cases': len(client_cases),
-            'active_cases': len(active_cases),
-            'last_case_date': max([case.created_at for case in client_cases]).isoformat() if client_cases else None
-        })
-    
-    return jsonify(clients_data), 200
+    sort = request.args.get('sort', 'last_activity')
+    total_cases = func.count(Case.id)
+    active_cases = count_if(Case.status.in_(['assigned', 'in_progress']))
+    last_case_date = func.max(Case.created_at)
+    sort_columns = {
+        'last_activity': last_case_date,
+        'name': User.first_name + ' ' + User.last_name,
+        'total_cases': total_cases,
+        'active_cases': active_cases
+    }
+    if sort not in sort_columns:
+        return jsonify({'error': f"Invalid sort. Must be one of: {', '.join(sort_columns)}"}), 400
+    sort_column = sort_columns[sort]
+    descending = request.args.get('order', 'asc' if sort == 'name' else 'desc').lower() != 'asc'
+    
+    # One grouped query over the lawyer's cases instead of a case query per client
+    query = db.session.query(
+        User.id, User.first_name, User.last_name, User.email, User.phone,
+        total_cases.label('total_cases'),
+        active_cases.label('active_cases'),
+        last_case_date.label('last_case_date')
+    ).join(Case, Case.client_id == User.id).filter(
+        Case.lawyer_id == current_user_id
+    ).group_by(User.id)
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            sort_value, client_id = decode_cursor(cursor, sort_column)
+        except InvalidCursor:
+            return invalid_cursor_response()
+        if descending:
+            query = query.having(or_(sort_column < sort_value, and_(sort_column == sort_value, User.id < client_id)))
+        else:
+            query = query.having(or_(sort_column > sort_value, and_(sort_column == sort_value, User.id > client_id)))
+    
+    ordering = (sort_column.desc(), User.id.desc()) if descending else (sort_column.asc(), User.id.asc())
+    limit = get_page_size()
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        last_sort_value = {
+            'last_activity': last.last_case_date,
+            'name': f"{last.first_name} {last.last_name}",
+            'total_cases': last.total_cases,
+            'active_cases': last.active_cases
+        }[sort]
+        next_cursor = encode_cursor(last_sort_value, last.id)
+    
+    clients_data = [{
+        'id': row.id,
+        'name': f"{row.first_name} {row.last_name}",
+        'email': row.email,
+        'phone': row.phone,
+        'total_cases': row.total_cases,
+        'active_cases': row.active_cases,
+        'last_case_date': row.last_case_date.isoformat() if row.last_case_date else None
+    } for row in rows]
+    
+    return paginated_response(clients_data, Page(rows, next_cursor))
 
 # ADD THE MISSING ENDPOINTS FOR MESSAGES
 
@@ -977,7 +968,7 @@ def get_lawyer_settings():
     """Get lawyer settings - alias for profile"""
     current_user_id = get_jwt_identity()
     
-    lawyer = User.query.get(current_user_id)
+    lawyer = get_current_user()
     if not lawyer:
         return jsonify({'error': 'Profile not found'}), 404
     
@@ -1007,7 +998,7 @@ def update_lawyer_settings():
     data = request.get_json()
     
     try:
-        lawyer = User.query.get(current_user_id)
+        lawyer = get_current_user()
         if not lawyer:
             return jsonify({'error': 'Profile not found'}), 404
         
@@ -1031,7 +1022,7 @@ def update_lawyer_settings():
         if 'hourly_rate' in data:
             lawyer.hourly_rate = Decimal(str(data['hourly_rate'])) if data['hourly_rate'] else None
         if 'specializations' in data:
-            lawyer.specializations = ','.join(map(str, data['specializations'])) if data['specializations'] else None
+            lawyer.set_specializations(data['specializations'])
         
         lawyer.updated_at = datetime.utcnow()
         db.session.commit()
@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify
-from models import db, LegalService, User
+import hmac
+from flask import Blueprint, Response, current_app, request, jsonify
+from models import db, LegalService, User, lawyer_specializations
 from datetime import datetime
+from dashboard import get_dashboard_snapshot
+from metrics import render_metrics
 
 main_bp = Blueprint('main', __name__, url_prefix='/main')
 @main_bp.route('/api/services', methods=['POST'])
@@ -81,9 +84,16 @@ def api_lawyers_search():
         )
     
     if specialization:
-        lawyers_query = lawyers_query.filter(
-            User.specializations.contains(specialization)
+        # Indexed lookup through lawyer_specializations (by service id or name)
+        lawyers_query = lawyers_query.join(
+            lawyer_specializations, lawyer_specializations.c.lawyer_id == User.id
         )
+        if specialization.isdigit():
+            lawyers_query = lawyers_query.filter(lawyer_specializations.c.legal_service_id == int(specialization))
+        else:
+            lawyers_query = lawyers_query.join(
+                LegalService, LegalService.id == lawyer_specializations.c.legal_service_id
+            ).filter(LegalService.name.ilike(specialization))
     
     lawyers = lawyers_query.limit(20).all()
     
@@ -112,25 +122,28 @@ def health_check():
         "version": "1.0"
     })
 
+@main_bp.route('/api/metrics')
+def metrics():
+    """Request and SQL metrics in the Prometheus text format"""
+    # Route names, traffic and latency are not public: hidden entirely until a token is configured
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        return jsonify({"error": "Not found"}), 404
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @main_bp.route('/api/stats')
 def api_stats():
     """API endpoint for platform statistics"""
-    total_lawyers = User.query.filter_by(
-        user_type='lawyer', 
-        approval_status='approved',
-        is_active=True
-    ).count()
-    
-    total_services = LegalService.query.filter_by(is_active=True).count()
-    
-    # You can add more stats as needed
-    from models import Case
-    total_cases = Case.query.count()
+    # Served from the same cached snapshot as the admin dashboard
+    snapshot = get_dashboard_snapshot()
     
     return jsonify({
-        'total_lawyers': total_lawyers,
-        'total_services': total_services,
-        'total_cases': total_cases
+        'total_lawyers': snapshot['user_stats']['active_approved_lawyers'],
+        'total_services': snapshot['active_services'],
+        'total_cases': snapshot['case_stats']['total_cases']
     })
 
 @main_bp.route('/api/contact', methods=['POST'])
@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Notification, User
+from pagination import keyset_paginate, paginated_response, InvalidCursor, invalid_cursor_response
+from read_state import mark_notifications_read
+from user_stats import get_user_stats
+from datetime import datetime
 
 notification_bp = Blueprint("notification_bp", __name__, url_prefix="/notification")
 
@@ -12,19 +16,17 @@ def get_notifications():
     
     # Query parameters for filtering
     unread_only = request.args.get('unread_only', 'false').lower() == 'true'
-    limit = request.args.get('limit', type=int)
     
     query = Notification.query.filter_by(recipient_id=current_user_id)
     
     if unread_only:
         query = query.filter_by(is_read=False)
     
-    query = query.order_by(Notification.created_at.desc())
-    
-    if limit:
-        query = query.limit(limit)
-    
-    notifications = query.all()
+    try:
+        page = keyset_paginate(query, Notification.created_at, Notification.id)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    notifications = page.items
     
     notification_list = []
     for notif in notifications:
@@ -39,7 +41,7 @@ def get_notifications():
         }
         notification_list.append(notification_data)
     
-    return jsonify(notification_list), 200
+    return paginated_response(notification_list, page)
 
 # Get unread notification count
 @notification_bp.route("/unread-count", methods=["GET"])
@@ -47,10 +49,8 @@ def get_notifications():
 def get_unread_count():
     current_user_id = get_jwt_identity()
     
-    count = Notification.query.filter_by(
-        recipient_id=current_user_id,
-        is_read=False
-    ).count()
+    # Read the maintained counter; connected clients also receive it as 'unread_count' socket events
+    count = get_user_stats(current_user_id).unread_notifications
     
     return jsonify({"count": count}), 200
 
@@ -84,19 +84,50 @@ def mark_all_as_read():
     current_user_id = get_jwt_identity()
     
     try:
-        unread_notifications = Notification.query.filter_by(
-            recipient_id=current_user_id,
-            is_read=False
-        ).all()
+        count = mark_notifications_read(current_user_id)
+        db.session.commit()
         
-        for notif in unread_notifications:
-            notif.is_read = True
+        return jsonify({
+            "success": "All notifications marked as read",
+            "count": count
+        }), 200
         
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to mark notifications as read"}), 400
+
+# Mark a list of notifications, or everything up to a timestamp, as read
+@notification_bp.route("/mark-read", methods=["PATCH"])
+@jwt_required()
+def mark_many_as_read():
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    notification_ids = data.get("ids")
+    until = data.get("until")
+    
+    if notification_ids is None and until is None:
+        return jsonify({"error": "Either ids or until is required"}), 400
+    
+    if notification_ids is not None:
+        try:
+            notification_ids = [int(notification_id) for notification_id in notification_ids]
+        except (TypeError, ValueError):
+            return jsonify({"error": "ids must be a list of notification IDs"}), 400
+    
+    if until is not None:
+        try:
+            until = datetime.fromisoformat(until)
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid until parameter"}), 400
+    
+    try:
+        count = mark_notifications_read(current_user_id, notification_ids=notification_ids, until=until)
         db.session.commit()
         
         return jsonify({
-            "success": "All notifications marked as read",
-            "count": len(unread_notifications)
+            "success": "Notifications marked as read",
+            "count": count
         }), 200
         
     except Exception as e:
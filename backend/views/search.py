@@ -0,0 +1,39 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from decorators import get_current_identity
+from pagination import get_page_size, paginated_response, InvalidCursor, invalid_cursor_response
+from search import SEARCH_SOURCES, search, search_available
+
+search_bp = Blueprint("search_bp", __name__, url_prefix="/search")
+
+# Full-text search across cases, chat messages, documents, lawyers and transactions
+@search_bp.route("/", methods=["GET"])
+@jwt_required()
+def search_all():
+    user = get_current_identity()
+
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    terms = request.args.get('q', '').strip()
+    if not terms:
+        return jsonify({"error": "Search query (q) is required"}), 400
+
+    # ?types=case,document limits results to some kinds
+    kinds = [kind.strip() for kind in request.args.get('types', '').split(',') if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in SEARCH_SOURCES]
+    if unknown:
+        return jsonify({
+            "error": f"Unknown search types: {', '.join(unknown)}",
+            "valid_types": list(SEARCH_SOURCES)
+        }), 400
+
+    if not search_available():
+        return jsonify({"error": "Search is not available on this database"}), 501
+
+    try:
+        page = search(user, terms, kinds, cursor=request.args.get('cursor'), limit=get_page_size(20))
+    except InvalidCursor:
+        return invalid_cursor_response()
+
+    return paginated_response(page.items, page)
@@ -1,15 +1,19 @@
 
-import csv
-from io import StringIO
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Transaction, User
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import select
 from decimal import Decimal
+from user_stats import get_user_stats
+from dashboard import get_dashboard_snapshot
+from queries import transaction_query
+from pagination import keyset_paginate, paginated_response, InvalidCursor, invalid_cursor_response
+from exports import csv_response
 
 transaction_bp = Blueprint("transaction_bp", __name__, url_prefix="/transaction")
 
-# Export transactions as CSV
+# Export transactions as CSV, streamed in batches (optionally gzipped)
 @transaction_bp.route("/export", methods=["GET"])
 @jwt_required()
 def export_transactions():
@@ -18,22 +22,53 @@ def export_transactions():
     if not user:
         return jsonify({"error": "User not found"}), 404
 
+    # Query parameters for filtering
+    status_filter = request.args.get('status')
+    transaction_type_filter = request.args.get('type')
+    case_id_filter = request.args.get('case_id')
+    date_from = request.args.get('date_from')
+    date_to = request.args.get('date_to')
+    compress = request.args.get('gzip', 'false').lower() == 'true'
+
+    statement = select(
+        Transaction.transaction_number,
+        Transaction.transaction_type,
+        Transaction.amount,
+        Transaction.status,
+        Transaction.description,
+        Transaction.payment_method,
+        Transaction.payment_reference,
+        Transaction.created_at
+    ).order_by(Transaction.created_at.desc(), Transaction.id.desc())
+
     # Filter based on user type
     if user.user_type == 'client':
-        query = Transaction.query.filter_by(client_id=current_user_id)
+        statement = statement.where(Transaction.client_id == current_user_id)
     elif user.user_type == 'lawyer':
-        query = Transaction.query.filter_by(lawyer_id=current_user_id)
-    else:  # admin
-        query = Transaction.query
+        statement = statement.where(Transaction.lawyer_id == current_user_id)
 
-    transactions = query.order_by(Transaction.created_at.desc()).all()
+    # Apply filters
+    if status_filter:
+        statement = statement.where(Transaction.status == status_filter)
 
-    # Prepare CSV
-    si = StringIO()
-    writer = csv.writer(si)
-    writer.writerow(["Transaction Number", "Type", "Amount", "Status", "Description", "Payment Method", "Payment Reference", "Created At"])
-    for t in transactions:
-        writer.writerow([
+    if transaction_type_filter:
+        statement = statement.where(Transaction.transaction_type == transaction_type_filter)
+
+    if case_id_filter:
+        statement = statement.where(Transaction.case_id == case_id_filter)
+
+    try:
+        if date_from:
+            statement = statement.where(Transaction.created_at >= datetime.strptime(date_from, '%Y-%m-%d'))
+        if date_to:
+            statement = statement.where(Transaction.created_at < datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1))
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    header = ["Transaction Number", "Type", "Amount", "Status", "Description", "Payment Method", "Payment Reference", "Created At"]
+
+    def format_row(t):
+        return [
             t.transaction_number,
             t.transaction_type,
             float(t.amount),
@@ -42,17 +77,9 @@ def export_transactions():
             t.payment_method,
             t.payment_reference,
             t.created_at.strftime('%Y-%m-%d %H:%M:%S') if t.created_at else ''
-        ])
-    output = si.getvalue()
+        ]
 
-    return (
-        output,
-        200,
-        {
-            "Content-Type": "text/csv",
-            "Content-Disposition": "attachment; filename=transactions.csv"
-        }
-    )
+    return csv_response("transactions.csv", header, statement, format_row, compress=compress)
 
 # Get all transactions for current user
 @transaction_bp.route("/", methods=["GET"])
@@ -68,15 +95,14 @@ def get_transactions():
     status_filter = request.args.get('status')
     transaction_type_filter = request.args.get('type')
     case_id_filter = request.args.get('case_id')
-    limit = request.args.get('limit', type=int)
     
     # Filter based on user type
     if user.user_type == 'client':
-        query = Transaction.query.filter_by(client_id=current_user_id)
+        query = transaction_query().filter_by(client_id=current_user_id)
     elif user.user_type == 'lawyer':
-        query = Transaction.query.filter_by(lawyer_id=current_user_id)
+        query = transaction_query().filter_by(lawyer_id=current_user_id)
     else:  # admin
-        query = Transaction.query
+        query = transaction_query()
     
     # Apply filters
     if status_filter:
@@ -88,12 +114,11 @@ def get_transactions():
     if case_id_filter:
         query = query.filter_by(case_id=case_id_filter)
     
-    query = query.order_by(Transaction.created_at.desc())
-    
-    if limit:
-        query = query.limit(limit)
-    
-    transactions = query.all()
+    try:
+        page = keyset_paginate(query, Transaction.created_at, Transaction.id)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    transactions = page.items
     
     transaction_list = []
     for transaction in transactions:
@@ -118,7 +143,7 @@ def get_transactions():
         }
         transaction_list.append(transaction_data)
     
-    return jsonify(transaction_list), 200
+    return paginated_response(transaction_list, page)
 
 # Get specific transaction
 @transaction_bp.route("/<transaction_id>", methods=["GET"])
@@ -278,41 +303,25 @@ def get_transaction_stats():
     if not user:
         return jsonify({"error": "User not found"}), 404
     
-    # Filter based on user type
-    if user.user_type == 'client':
-        total_query = Transaction.query.filter_by(client_id=current_user_id)
-        completed_query = Transaction.query.filter_by(client_id=current_user_id, status='completed')
-    elif user.user_type == 'lawyer':
-        total_query = Transaction.query.filter_by(lawyer_id=current_user_id)
-        completed_query = Transaction.query.filter_by(lawyer_id=current_user_id, status='completed')
+    # Clients and lawyers read their materialized row, admins the platform snapshot
+    if user.user_type in ['client', 'lawyer']:
+        user_stats = get_user_stats(current_user_id)
+        stats = {
+            "total_transactions": user_stats.total_transactions,
+            "completed_transactions": user_stats.completed_transactions,
+            "pending_transactions": user_stats.pending_transactions,
+            "failed_transactions": user_stats.failed_transactions,
+            "total_amount": float(user_stats.completed_amount)
+        }
     else:  # admin
-        total_query = Transaction.query
-        completed_query = Transaction.query.filter_by(status='completed')
-    
-    total_transactions = total_query.count()
-    completed_transactions = completed_query.count()
-    pending_transactions = total_query.filter_by(status='pending').count()
-    failed_transactions = total_query.filter_by(status='failed').count()
-    
-    # Calculate total amount
-    total_amount = db.session.query(db.func.sum(Transaction.amount)).filter(
-        Transaction.status == 'completed'
-    )
-    
-    if user.user_type == 'client':
-        total_amount = total_amount.filter(Transaction.client_id == current_user_id)
-    elif user.user_type == 'lawyer':
-        total_amount = total_amount.filter(Transaction.lawyer_id == current_user_id)
-    
-    total_amount = total_amount.scalar() or 0
-    
-    stats = {
-        "total_transactions": total_transactions,
-        "completed_transactions": completed_transactions,
-        "pending_transactions": pending_transactions,
-        "failed_transactions": failed_transactions,
-        "total_amount": float(total_amount)
-    }
+        financial_stats = get_dashboard_snapshot()['financial_stats']
+        stats = {
+            "total_transactions": financial_stats['total_transactions'],
+            "completed_transactions": financial_stats['completed_transactions'],
+            "pending_transactions": financial_stats['pending_transactions'],
+            "failed_transactions": financial_stats['failed_transactions'],
+            "total_amount": financial_stats['total_revenue']
+        }
     
     return jsonify(stats), 200
 
@@ -329,11 +338,11 @@ def search_transactions():
     
     # Filter based on user type
     if user.user_type == 'client':
-        query = Transaction.query.filter_by(client_id=current_user_id)
+        query = transaction_query('case').filter_by(client_id=current_user_id)
     elif user.user_type == 'lawyer':
-        query = Transaction.query.filter_by(lawyer_id=current_user_id)
+        query = transaction_query('case').filter_by(lawyer_id=current_user_id)
     else:  # admin
-        query = Transaction.query
+        query = transaction_query('case')
     
     # Search in transaction number, description, and payment reference
     transactions = query.filter(
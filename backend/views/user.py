@@ -1,10 +1,10 @@
 
 from flask import Flask, request, jsonify, Blueprint
 from models import db, User, LegalService
-from flask_mail import Message
 from flask import current_app
-from flask_mail import Mail
-mail = Mail()
+from decorators import invalidate_identity
+from pagination import keyset_paginate, paginated_response, InvalidCursor, invalid_cursor_response
+from mail_queue import enqueue_email
 
 user_bp = Blueprint("user_bp", __name__, url_prefix="/user")
 
@@ -93,44 +93,31 @@ def create_user():
             years_of_experience=int(years_of_experience) if years_of_experience else None,
             education=education,
             hourly_rate=float(hourly_rate) if hourly_rate else None,
-            bio=bio,
-            specializations=','.join(map(str, specializations)) if specializations else None
+            bio=bio
             # approval_status will be automatically set by the model's __init__ method based on user_type
         )
         
         # Set password using model method for consistency
         new_user.set_password(password)
+        new_user.set_specializations(specializations)
         
         db.session.add(new_user)
 
-        # Send welcome email
-        try:
-            subject = f"Welcome to Legal Services Platform"
-            if user_type == 'lawyer':
-                body = f"Hello {first_name},\n\nThank you for registering as a lawyer on our Legal Services Platform. Your account is pending approval from our admin team. We'll notify you once your account is approved.\n\nBest regards,\nLegal Services Platform Team"
-            else:
-                body = f"Hello {first_name},\n\nThank you for registering on our Legal Services Platform. You can now access our legal services and connect with qualified lawyers.\n\nBest regards,\nLegal Services Platform Team"
-            
-            msg = Message(
-                subject=subject,
-                recipients=[email],
-                sender=current_app.config['MAIL_DEFAULT_SENDER'],
-                body=body
-            )
-            mail.send(msg)
-            
-            # Commit after successful email
-            db.session.commit()
-            
-            return jsonify({
-                "success": "User created successfully",
-                "user_id": new_user.id,
-                "approval_required": user_type == 'lawyer'
-            }), 201
-
-        except Exception as e:
-            db.session.rollback()
-            return jsonify({"error": "Failed to register user or send welcome email"}), 400
+        # Queue welcome email (sent in the background once the user is committed)
+        subject = f"Welcome to Legal Services Platform"
+        if user_type == 'lawyer':
+            body = f"Hello {first_name},\n\nThank you for registering as a lawyer on our Legal Services Platform. Your account is pending approval from our admin team. We'll notify you once your account is approved.\n\nBest regards,\nLegal Services Platform Team"
+        else:
+            body = f"Hello {first_name},\n\nThank you for registering on our Legal Services Platform. You can now access our legal services and connect with qualified lawyers.\n\nBest regards,\nLegal Services Platform Team"
+        enqueue_email(subject, [email], body)
+        
+        db.session.commit()
+        
+        return jsonify({
+            "success": "User created successfully",
+            "user_id": new_user.id,
+            "approval_required": user_type == 'lawyer'
+        }), 201
 
     except Exception as e:
         db.session.rollback()
@@ -165,7 +152,7 @@ def update_user(user_id):
         # Update specializations
         specializations = data.get("specializations")
         if specializations is not None:
-            user.specializations = ','.join(map(str, specializations))
+            user.set_specializations(specializations)
     
     # Admin-only updates
     approval_status = data.get("approval_status")
@@ -178,16 +165,15 @@ def update_user(user_id):
         user.approval_status = 'pending'
 
     try:
-        # Send update notification email
-        msg = Message(
+        # Queue update notification email
+        enqueue_email(
             subject="Profile Updated - Legal Services Platform",
             recipients=[user.email],
-            sender=current_app.config['MAIL_DEFAULT_SENDER'],
             body=f"Hello {user.first_name},\n\nYour profile has been updated successfully on Legal Services Platform.\n\nBest regards,\nLegal Services Platform Team"
         )
-        mail.send(msg)        
         
         db.session.commit()
+        invalidate_identity(user_id)
         return jsonify({"success": "User updated successfully"}), 200
 
     except Exception as e:
@@ -248,7 +234,11 @@ def fetch_all_users():
         active = is_active.lower() == 'true'
         query = query.filter(User.is_active == active)
     
-    users = query.all()
+    try:
+        page = keyset_paginate(query, User.created_at, User.id)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    users = page.items
 
     user_list = []
     for user in users:
@@ -277,7 +267,7 @@ def fetch_all_users():
         
         user_list.append(user_data)
         
-    return jsonify(user_list), 200
+    return paginated_response(user_list, page)
 
 # Delete user
 @user_bp.route("/<user_id>", methods=["DELETE"])
@@ -290,6 +280,7 @@ def delete_user(user_id):
     try:
         db.session.delete(user)
         db.session.commit()
+        invalidate_identity(user_id)
         return jsonify({"success": "User deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -312,16 +303,15 @@ def approve_lawyer(user_id):
     try:
         user.approval_status = 'approved'
         
-        # Send approval email
-        msg = Message(
+        # Queue approval email
+        enqueue_email(
             subject="Account Approved - Legal Services Platform",
             recipients=[user.email],
-            sender=current_app.config['MAIL_DEFAULT_SENDER'],
             body=f"Hello {user.first_name},\n\nCongratulations! Your lawyer account has been approved. You can now access the platform and start accepting cases.\n\nBest regards,\nLegal Services Platform Team"
         )
-        mail.send(msg)
         
         db.session.commit()
+        invalidate_identity(user_id)
         return jsonify({"success": "Lawyer approved successfully"}), 200
 
     except Exception as e:
@@ -345,16 +335,15 @@ def reject_lawyer(user_id):
     try:
         user.approval_status = 'rejected'
         
-        # Send rejection email
-        msg = Message(
+        # Queue rejection email
+        enqueue_email(
             subject="Account Application - Legal Services Platform",
             recipients=[user.email],
-            sender=current_app.config['MAIL_DEFAULT_SENDER'],
             body=f"Hello {user.first_name},\n\nThank you for your interest in joining our Legal Services Platform. Unfortunately, your lawyer account application has been declined.\n\nReason: {rejection_reason}\n\nYou may reapply with updated information.\n\nBest regards,\nLegal Services Platform Team"
         )
-        mail.send(msg)
         
         db.session.commit()
+        invalidate_identity(user_id)
         return jsonify({"success": "Lawyer application rejected"}), 200
 
     except Exception as e:
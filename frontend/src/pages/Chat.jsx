@@ -191,8 +191,8 @@ export default function Chat() {
 
     // Socket message handler
     if (socketRef.current && selectedCase) {
-      const roomName = `case_${selectedCase.id}`;
-      socketRef.current.emit('join', { room: roomName });
+      const caseId = selectedCase.id;
+      socketRef.current.emit('join_case', { case_id: caseId });
 
       const messageHandler = (msg) => {
         if (msg.case_id === selectedCase.id) {
@@ -211,6 +211,7 @@ export default function Chat() {
 
       return () => {
         socketRef.current.off('new_chat_message', messageHandler);
+        socketRef.current.emit('leave_case', { case_id: caseId });
       };
     }
   }, [selectedCase, role, navigate]);
@@ -40,6 +40,19 @@ axios.interceptors.response.use(
   }
 );
 
+// List endpoints return one page at a time and advertise the next one in the
+// X-Next-Cursor header; fetch every page and concatenate them
+async function getAllPages(url, params = {}) {
+  let items = [];
+  let cursor = null;
+  do {
+    const res = await axios.get(url, { params: cursor ? { ...params, cursor } : params });
+    items = items.concat(Array.isArray(res.data) ? res.data : []);
+    cursor = res.headers['x-next-cursor'] || null;
+  } while (cursor);
+  return items;
+}
+
 // ===== CHAT ENDPOINTS =====
 export async function getClientChats(params = {}) {
   const caseId = params.case_id || params.contact_id;
@@ -187,8 +200,7 @@ export async function deactivateLawyer(lawyerId) {
 }
 
 export async function getLawyers() {
-  const res = await axios.get(`/user/?user_type=lawyer`);
-  return res.data;
+  return getAllPages(`/user/`, { user_type: 'lawyer' });
 }
 
 export async function getClients() {
@@ -380,8 +392,7 @@ export async function getLawyerDashboard() {
 
 export async function getLawyerCases() {
   try {
-    const res = await axios.get(`${LAWYER_BASE}/cases`);
-    return Array.isArray(res.data) ? res.data : [];
+    return await getAllPages(`${LAWYER_BASE}/cases`);
   } catch (err) {
     console.error('Error fetching lawyer cases:', err);
     return [];
@@ -412,8 +423,7 @@ export async function updateCaseStatus(caseId, status) {
 }
 
 export async function getLawyerInvoices(params = {}) {
-  const res = await axios.get(`${LAWYER_BASE}/invoices`, { params });
-  return res.data;
+  return getAllPages(`${LAWYER_BASE}/invoices`, params);
 }
 
 export async function createLawyerInvoice(data) {
@@ -425,18 +435,15 @@ export async function sendInvoice(invoiceId) {
 }
 
 export async function getLawyerTransactions(params = {}) {
-  const res = await axios.get(`${LAWYER_BASE}/transactions`, { params });
-  return res.data;
+  return getAllPages(`${LAWYER_BASE}/transactions`, params);
 }
 
 export async function getLawyerDocuments(params = {}) {
-  const res = await axios.get(`${LAWYER_BASE}/documents`, { params });
-  return res.data;
+  return getAllPages(`${LAWYER_BASE}/documents`, params);
 }
 
 export async function getLawyerNotifications(params = {}) {
-  const res = await axios.get(`${LAWYER_BASE}/notifications`, { params });
-  return res.data;
+  return getAllPages(`${LAWYER_BASE}/notifications`, params);
 }
 
 export async function getLawyerStats() {
@@ -446,8 +453,7 @@ export async function getLawyerStats() {
 
 export async function getLawyerClients() {
   try {
-    const res = await axios.get(`${LAWYER_BASE}/clients`);
-    return Array.isArray(res.data) ? res.data : [];
+    return await getAllPages(`${LAWYER_BASE}/clients`);
   } catch (err) {
     console.error('Error fetching lawyer clients:', err);
     return [];